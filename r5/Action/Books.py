@@ -1,11 +1,26 @@
 import enum
+import functools
 import typing
 
 import pydantic
 
-from r5.Framework.Apis import GoogleBooks, OpenLibrary
+from r5.Framework import Cache, Log
+from r5.Framework.Apis import GoogleBooks, Http, OpenLibrary, RateLimit
+from r5.Framework.Helpers import Parallel
+from r5.Service.Config import Service
 from r5.Service.Schemas.Books import BookSource
 
+logger = Log.get_logger(__name__)
+
+Http.configure(
+    pool_size=Service.HTTP_POOL_SIZE,
+    connect_timeout=Service.HTTP_CONNECT_TIMEOUT,
+    read_timeout=Service.HTTP_READ_TIMEOUT,
+    retries=Service.HTTP_RETRIES,
+    backoff_factor=Service.HTTP_BACKOFF_FACTOR,
+    backoff_max=Service.HTTP_BACKOFF_MAX,
+)
+
 
 class Apis(enum.Enum):
     """Api list"""
@@ -25,6 +40,15 @@ class BookSearchFilters(pydantic.BaseModel):
     publisher: typing.Optional[str] = pydantic.Field(alias="publisher")
     description: typing.Optional[str] = pydantic.Field(alias="description")
 
+    def cache_key(self) -> tuple:
+        """Normalized filters, equivalent searches share the same key"""
+
+        return tuple(
+            (name, " ".join(value.split()).lower())
+            for name, value in sorted(self.dict(exclude_none=True).items())
+            if value.strip()
+        )
+
 
 class BookInfo(pydantic.BaseModel):
     """Model representing volume information for a book."""
@@ -65,21 +89,39 @@ class BookSearchResults(pydantic.BaseModel):
 class Books:
     """Books Action"""
 
-    def __init__(self, api_name: Apis, api_key: typing.Optional[str] = None):
+    # External search results shared by every action of the worker
+    search_cache = Cache.TTLCache(
+        max_size=Service.SEARCH_CACHE_SIZE,
+        ttl=Service.SEARCH_CACHE_TTL,
+        stale=Service.SEARCH_CACHE_STALE,
+    )
+
+    def __init__(
+        self,
+        api_name: Apis,
+        api_key: typing.Optional[str] = None,
+        priority: RateLimit.Priority = RateLimit.Priority.INTERACTIVE,
+    ):
         """
         Initialize the Books class.
 
         Args:
             api (Apis): The API to use for book search.
             api_key (str, optional): The API key. Defaults to None.
+            priority (RateLimit.Priority, optional): Priority on the API quota. Defaults to INTERACTIVE.
         """
         self.api_name = api_name
+        self.api_key = api_key
 
         if self.api_name == Apis.GOOGLE:
-            self.api = GoogleBooks.GoogleBooksApi(api_key=api_key)
+            self.api = GoogleBooks.GoogleBooksApi(api_key=api_key, priority=priority)
+            # Background refreshes do not compete with interactive requests
+            self.background_api = GoogleBooks.GoogleBooksApi(
+                api_key=api_key, priority=RateLimit.Priority.BULK
+            )
 
         elif self.api_name == Apis.OPENLIBRARY:
-            self.api = OpenLibrary.OpenLibraryApi(api_key=api_key)
+            self.api = self.background_api = OpenLibrary.OpenLibraryApi(api_key=api_key)
 
         else:
             raise ValueError("Invalid API name")
@@ -93,6 +135,9 @@ class Books:
         """
         Search for books based on the provided filters.
 
+        Results are cached by source, normalized filters and page, failed
+        searches are not cached.
+
         Args:
             filters (BookSearchFilters): The filters to apply for the book search.
 
@@ -100,6 +145,29 @@ class Books:
             typing.Optional[BookSearchResults]: The search results or None if no results are found.
         """
 
+        key = (self.api_name.value, filters.cache_key(), page, max_per_page)
+        loader = functools.partial(
+            self._search, filters=filters, page=page, max_per_page=max_per_page
+        )
+        refresher = functools.partial(
+            self._search,
+            filters=filters,
+            page=page,
+            max_per_page=max_per_page,
+            api=self.background_api,
+        )
+
+        return self.search_cache.load(key=key, loader=loader, refresher=refresher)
+
+    def _search(
+        self,
+        filters: BookSearchFilters,
+        page: int,
+        max_per_page: int,
+        api: typing.Union[GoogleBooks.GoogleBooksApi, OpenLibrary.OpenLibraryApi, None] = None,
+    ) -> typing.Optional[BookSearchResults]:
+        """Search for books on the api, or on another client of it"""
+
         if self.api_name == Apis.GOOGLE:
             filters = GoogleBooks.BookSearchFilters(**filters.dict())
 
@@ -109,7 +177,7 @@ class Books:
         else:
             raise ValueError("Invalid API name")
 
-        api_results = self.api.search_books(
+        api_results = (api or self.api).search_books(
             filters=filters, page=page, max_per_page=max_per_page
         )
 
@@ -140,13 +208,60 @@ class Books:
 
         api_result = self.api.get_book(book_id=book_id)
         if api_result:
-            if self.api_name == Apis.OPENLIBRARY:
-                book_item = BookItem(
-                    id=api_result.id,
-                    book_info=BookInfo(**api_result.dict()),
-                )
+            return self._to_book_item(api_result=api_result)
 
-            else:
-                book_item = BookItem(**api_result.dict())
+        return None
+
+    def get_many(self, book_ids: list[str]) -> dict[str, typing.Optional[BookItem]]:
+        """Get many books at once.
+
+        OpenLibrary works are fetched in batches, Google volumes concurrently,
+        at most Service.LOOKUP_CONCURRENCY upstream requests at a time.
+
+        Args:
+            book_ids (list[str]): Ids on the api.
+
+        Returns:
+            dict: Mapping of id to the book, None when it was not found or its lookup failed.
+        """
+
+        book_ids = list(dict.fromkeys(book_ids))
+
+        if self.api_name == Apis.OPENLIBRARY:
+            api_results = self.api.get_books(
+                book_ids=book_ids, concurrency=Service.LOOKUP_CONCURRENCY
+            )
+
+        else:
+            outcomes = Parallel.run(
+                calls={
+                    book_id: functools.partial(self.api.get_book, book_id=book_id)
+                    for book_id in book_ids
+                },
+                size=Service.LOOKUP_CONCURRENCY,
+            )
+
+            api_results = {}
+            for book_id, outcome in outcomes.items():
+                if outcome.error:
+                    logger.warning(f"Book {book_id} lookup failed: {outcome.error}")
+
+                api_results[book_id] = outcome.result
+
+        return {
+            book_id: self._to_book_item(api_result=api_results[book_id])
+            if api_results.get(book_id)
+            else None
+            for book_id in book_ids
+        }
+
+    def _to_book_item(self, api_result: pydantic.BaseModel) -> BookItem:
+        """Book of the api to book item"""
+
+        if self.api_name == Apis.OPENLIBRARY:
+            return BookItem(
+                id=api_result.id,
+                book_info=BookInfo(**api_result.dict()),
+            )
 
-            return book_item
+        return BookItem(**api_result.dict())
@@ -0,0 +1,199 @@
+import collections
+import enum
+import threading
+import time
+import typing
+
+import gevent
+import requests
+
+from r5.Framework import Log
+from r5.Framework.Apis import Http
+from r5.Framework.Apis.Errors import CircuitOpenError, UpstreamError
+from r5.Framework.Helpers import Environment
+
+logger = Log.get_logger(__name__)
+
+# Consecutive failed or slow calls opening the circuit
+FAILURES = int(Environment.var_get("R5_BREAKER_FAILURES", 5))
+
+# Seconds the circuit stays open before letting a probe call through
+RESET_TIMEOUT = float(Environment.var_get("R5_BREAKER_RESET_TIMEOUT", 30))
+
+# Seconds after which a successful call still counts as a failure
+SLOW_CALL = float(Environment.var_get("R5_BREAKER_SLOW_CALL", 5))
+
+# Adaptive read timeout: latency percentile of the last calls times a multiplier
+TIMEOUT_PERCENTILE = float(Environment.var_get("R5_ADAPTIVE_TIMEOUT_PERCENTILE", 0.99))
+TIMEOUT_MULTIPLIER = float(Environment.var_get("R5_ADAPTIVE_TIMEOUT_MULTIPLIER", 3))
+TIMEOUT_MIN = float(Environment.var_get("R5_ADAPTIVE_TIMEOUT_MIN", 1))
+
+# Latencies kept, and needed before adapting the timeout
+WINDOW_SIZE = 100
+WINDOW_MIN_SIZE = 20
+
+FAILED_STATUSES = (429, 500, 502, 503, 504)
+
+
+class State(enum.Enum):
+    """Circuit states"""
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreaker:
+    """Circuit breaker of an external source, with a read timeout adapted to its latency"""
+
+    def __init__(self, name: str):
+        """
+        Initializes an instance of the CircuitBreaker class.
+
+        Args:
+            name (str): Name of the external source.
+        """
+        self.name = name
+
+        self.state = State.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+        self._probing = False
+        self._latencies: collections.deque = collections.deque(maxlen=WINDOW_SIZE)
+        self._lock = threading.Lock()
+
+    def read_timeout(self) -> float:
+        """Read timeout adapted to the observed latency percentile"""
+
+        if len(self._latencies) < WINDOW_MIN_SIZE:
+            return Http.settings.read_timeout
+
+        latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * TIMEOUT_PERCENTILE), len(latencies) - 1)
+        timeout = latencies[index] * TIMEOUT_MULTIPLIER
+
+        return min(max(timeout, TIMEOUT_MIN), Http.settings.read_timeout)
+
+    def is_open(self) -> bool:
+        """Calls are being skipped"""
+
+        with self._lock:
+            if self.state == State.OPEN:
+                return time.monotonic() - self.opened_at < RESET_TIMEOUT
+
+            return self.state == State.HALF_OPEN and self._probing
+
+    def call(
+        self,
+        request: typing.Callable[[float], requests.Response],
+        acquire: typing.Optional[typing.Callable[[], None]] = None,
+    ) -> requests.Response:
+        """Run a request through the circuit
+
+        Args:
+            request (typing.Callable): Sends the request given its read timeout.
+            acquire (typing.Callable, optional): Run once the circuit lets the call
+                through, before the request and its timing, e.g. to take a rate limit token.
+
+        Raises:
+            CircuitOpenError: The circuit is open.
+            UpstreamError: The request failed or the source answered 429/5xx.
+
+        Returns:
+            requests.Response: The response.
+        """
+
+        self._before()
+
+        if acquire is not None:
+            try:
+                acquire()
+            except BaseException:
+                self._release_probe()
+                raise
+
+        start = time.monotonic()
+        try:
+            response = request(self.read_timeout())
+        except requests.RequestException as err:
+            self._on_failure(reason=str(err))
+            raise UpstreamError(f"{self.name} request failed: {err}") from err
+        except (gevent.GreenletExit, gevent.Timeout):
+            # Killed at the deadline of the caller, it lasted at least that long
+            elapsed = time.monotonic() - start
+            self._on_failure(reason=f"call killed after {elapsed:.2f}s", elapsed=elapsed)
+            raise
+        except BaseException:
+            self._release_probe()
+            raise
+
+        elapsed = time.monotonic() - start
+        if response.status_code in FAILED_STATUSES:
+            response.close()
+            self._on_failure(reason=f"status {response.status_code}")
+            raise UpstreamError(f"{self.name} answered {response.status_code}")
+
+        if elapsed > SLOW_CALL:
+            self._on_failure(reason=f"slow call {elapsed:.2f}s", elapsed=elapsed)
+        else:
+            self._on_success(elapsed=elapsed)
+
+        return response
+
+    def _before(self) -> None:
+        """Skip the call while open, let a single probe through once the reset timeout expires"""
+
+        with self._lock:
+            if self.state == State.OPEN:
+                if time.monotonic() - self.opened_at < RESET_TIMEOUT:
+                    raise CircuitOpenError(f"{self.name} circuit is open")
+
+                self.state = State.HALF_OPEN
+
+            if self.state == State.HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError(f"{self.name} circuit is half open")
+
+                self._probing = True
+
+    def _release_probe(self) -> None:
+        """Let another probe through"""
+
+        with self._lock:
+            self._probing = False
+
+    def _on_success(self, elapsed: float) -> None:
+        """Record a successful call"""
+
+        with self._lock:
+            self._latencies.append(elapsed)
+            self.failures = 0
+            self._probing = False
+            if self.state != State.CLOSED:
+                logger.info(f"Circuit {self.name} closed")
+                self.state = State.CLOSED
+
+    def _on_failure(self, reason: str, elapsed: typing.Optional[float] = None) -> None:
+        """Record a failed call, and its latency when it answered late or was killed"""
+
+        with self._lock:
+            if elapsed is not None:
+                self._latencies.append(elapsed)
+            self.failures += 1
+            self._probing = False
+            if self.state == State.HALF_OPEN or self.failures >= FAILURES:
+                if self.state != State.OPEN:
+                    logger.warning(f"Circuit {self.name} opened: {reason}")
+
+                self.state = State.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        """Breaker counters"""
+
+        return dict(
+            state=self.state.value,
+            failures=self.failures,
+            read_timeout=self.read_timeout(),
+        )
@@ -1,2 +1,14 @@
 class ClientError(Exception):
     """Client Error"""
+
+
+class UpstreamError(Exception):
+    """Upstream service failed or is unavailable"""
+
+
+class CircuitOpenError(UpstreamError):
+    """Upstream service skipped while its circuit is open"""
+
+
+class RateLimitedError(UpstreamError):
+    """Upstream quota exhausted until the request deadline"""
@@ -0,0 +1,161 @@
+"""Offline stand-in for the Google Books, OpenLibrary and OpenLibrary covers APIs.
+
+Recorded responses in Fixtures are served under one prefix per api, point the
+apis at it with:
+
+    R5_GOOGLE_BOOKS_URL=http://<host>:<port>/google/books/v1
+    R5_OPENLIBRARY_URL=http://<host>:<port>/openlibrary
+    R5_OPENLIBRARY_COVERS_URL=http://<host>:<port>/covers/b
+"""
+import copy
+import json
+import os
+import random
+import re
+import time
+
+from flask import Flask, Response, jsonify, request
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "Fixtures")
+
+# Smallest valid JPEG, served for every cover
+COVER = bytes.fromhex(
+    "ffd8ffe000104a46494600010100000100010000ffdb004300080606070605080707070909080a0c"
+    "140d0c0b0b0c1912130f141d1a1f1e1d1a1c1c20242e2720222c231c1c2837292c30313434341f27"
+    "393d38323c2e333432ffc0000b080001000101011100ffc4001400010000000000000000000000000"
+    "0000009ffc40014100100000000000000000000000000000000ffda0008010100003f00d2cf20ffd9"
+)
+
+WORK_KEYS = re.compile(r'"/works/(\w+)"')
+
+
+def load_fixture(name: str) -> dict:
+    """Recorded response"""
+
+    with open(os.path.join(FIXTURES_PATH, f"{name}.json"), encoding="utf-8") as fixture:
+        return json.load(fixture)
+
+
+def setup(  # pylint: disable=too-many-arguments,too-many-locals
+    latency: float = 0,
+    jitter: float = 0,
+    error_rate: float = 0,
+    items: int = 0,
+    padding: int = 0,
+) -> Flask:
+    """Create the fake apis app
+
+    Args:
+        latency (float): Seconds every response is delayed.
+        jitter (float): Maximum random seconds added to latency.
+        error_rate (float): Fraction of requests answered with a 503.
+        items (int): Results per search page, 0 serves as many as requested.
+        padding (int): Characters added to the description of every book.
+    """
+
+    app = Flask(__name__)
+
+    google_volume = load_fixture("google_volume")
+    google_volumes = load_fixture("google_volumes")["items"]
+    openlibrary_work = load_fixture("openlibrary_work")
+    openlibrary_author = load_fixture("openlibrary_author")
+    openlibrary_docs = load_fixture("openlibrary_search")["docs"]
+
+    def page_size(requested: str) -> int:
+        """Results of a search page"""
+
+        return items or int(requested or 10)
+
+    def pad(text: str) -> str:
+        """Inflate a description to the configured payload size"""
+
+        return (text or "") + "x" * padding
+
+    @app.before_request
+    def degrade():
+        """Delay and fail requests as configured"""
+
+        delay = latency + random.uniform(0, jitter)
+        if delay:
+            time.sleep(delay)
+
+        if random.random() < error_rate:
+            return jsonify(error="Fake upstream error"), 503
+
+        return None
+
+    @app.route("/google/books/v1/volumes")
+    def google_search():
+        """Google Books search"""
+
+        start_index = int(request.args.get("startIndex", 0))
+        results = []
+        for index in range(page_size(request.args.get("maxResults"))):
+            volume = copy.deepcopy(google_volumes[index % len(google_volumes)])
+            volume["id"] = f"{volume['id']}-{start_index + index}"
+            volume["volumeInfo"]["description"] = pad(volume["volumeInfo"].get("description"))
+            results.append(volume)
+
+        return jsonify(kind="books#volumes", totalItems=1000, items=results)
+
+    @app.route("/google/books/v1/volumes/<book_id>")
+    def google_volume_details(book_id):
+        """Google Books volume"""
+
+        volume = copy.deepcopy(google_volume)
+        volume["id"] = book_id
+        volume["volumeInfo"]["description"] = pad(volume["volumeInfo"].get("description"))
+        return jsonify(volume)
+
+    @app.route("/openlibrary/search.json")
+    def openlibrary_search():
+        """OpenLibrary search, works searched by key are answered with those keys"""
+
+        fields = request.args.get("fields")
+        work_keys = WORK_KEYS.findall(request.args.get("q", ""))
+        offset = int(request.args.get("offset", 0))
+
+        if work_keys:
+            keys = work_keys
+        else:
+            keys = [
+                f"OL{offset + index + 1}W"
+                for index in range(page_size(request.args.get("limit")))
+            ]
+
+        docs = []
+        for index, key in enumerate(keys):
+            doc = copy.deepcopy(openlibrary_docs[index % len(openlibrary_docs)])
+            doc["key"] = f"/works/{key}"
+            doc["title"] = pad(doc["title"]) if padding else doc["title"]
+            if fields:
+                doc = {name: value for name, value in doc.items() if name in fields.split(",")}
+            docs.append(doc)
+
+        num_found = len(keys) if work_keys else 1000
+        return jsonify(numFound=num_found, start=offset, numFoundExact=True, docs=docs)
+
+    @app.route("/openlibrary/works/<book_id>.json")
+    def openlibrary_work_details(book_id):
+        """OpenLibrary work"""
+
+        work = copy.deepcopy(openlibrary_work)
+        work["key"] = f"/works/{book_id}"
+        work["description"] = pad(work["description"])
+        return jsonify(work)
+
+    @app.route("/openlibrary/authors/<author_id>.json")
+    def openlibrary_author_details(author_id):
+        """OpenLibrary author"""
+
+        author = copy.deepcopy(openlibrary_author)
+        author["key"] = f"/authors/{author_id}"
+        return jsonify(author)
+
+    @app.route("/covers/b/<key>/<cover>.jpg")
+    def openlibrary_cover(key, cover):  # pylint: disable=unused-argument
+        """OpenLibrary cover"""
+
+        return Response(COVER, mimetype="image/jpeg")
+
+    return app
@@ -1,10 +1,19 @@
+import functools
 import math
 import typing
 
 import pydantic
 import requests
 
-from r5.Framework.Apis.Errors import ClientError
+from r5.Framework.Apis import Breaker, Http, RateLimit
+from r5.Framework.Apis.Errors import ClientError, UpstreamError
+from r5.Framework.Helpers import Environment, Hash, SingleFlight
+
+# Identical requests in flight on the worker
+flights = SingleFlight.Group()
+
+# Circuit of the api on the worker
+breaker = Breaker.CircuitBreaker(name="GOOGLE")
 
 
 class QueryStringError(ClientError):
@@ -86,16 +95,43 @@ class GoogleBooksApi:
     More info: https://developers.google.com/books
     """
 
-    BASE_URL = "https://www.googleapis.com/books/v1"
+    BASE_URL = Environment.var_get("R5_GOOGLE_BOOKS_URL", "https://www.googleapis.com/books/v1")
+
+    # Requests per second and burst allowed per API key, shared by the workers
+    RATE_LIMIT = float(Environment.var_get("R5_GOOGLE_RATE_LIMIT", 5))
+    RATE_BURST = float(Environment.var_get("R5_GOOGLE_RATE_BURST", 10))
+
+    # Fraction of the burst kept for interactive requests
+    RATE_RESERVE = float(Environment.var_get("R5_GOOGLE_RATE_RESERVE", 0.2))
+
+    # Seconds a request can wait for its turn
+    RATE_WAIT = float(Environment.var_get("R5_GOOGLE_RATE_WAIT", 5))
 
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        client: typing.Optional[Http.Client] = None,
+        priority: RateLimit.Priority = RateLimit.Priority.INTERACTIVE,
+    ):
         """
         Initializes an instance of the GoogleBooksAPI class.
 
         Args:
             api_key (str): The API key obtained from the Google Cloud Console.
+            client (Http.Client, optional): HTTP client. Defaults to the worker shared client.
+            priority (RateLimit.Priority, optional): Priority of the requests on the API key quota.
+                Defaults to INTERACTIVE.
         """
         self.api_key = api_key
+        self.client = client or Http.shared()
+        self.priority = priority
+
+        self.limiter = RateLimit.TokenBucket(
+            name=f"GOOGLE:{Hash.encode(api_key or '')}",
+            rate=self.RATE_LIMIT,
+            capacity=self.RATE_BURST,
+            reserve=self.RATE_RESERVE,
+        )
 
     def search_books(
         self,
@@ -114,6 +150,28 @@ class GoogleBooksApi:
             list: The list of book search results.
         """
 
+        return flights.do(
+            key=(
+                "search_books",
+                self.api_key,
+                self.priority,
+                filters.json(),
+                int(page),
+                int(max_per_page),
+            ),
+            call=functools.partial(
+                self._search_books, filters=filters, page=page, max_per_page=max_per_page
+            ),
+        )
+
+    def _search_books(
+        self,
+        filters: BookSearchFilters,
+        page: int,
+        max_per_page: int,
+    ) -> BookSearchResults:
+        """Search for books on the api"""
+
         q_param = self._filters_to_query_string(filters=filters)
         start_index = (int(page) - 1) * int(max_per_page)
 
@@ -126,13 +184,14 @@ class GoogleBooksApi:
 
         query_string = "&".join([f"{key}={value}" for key, value in query_params.items()])
         url = f"{self.BASE_URL}/volumes?{query_string}"
-        response = requests.get(url=url, timeout=60)
+        response = self._get(url=url)
 
-        if response.status_code == 200:
-            data = response.json()
-            return BookSearchResults(page=page, max_per_page=max_per_page, **data)
+        if response.status_code != 200:
+            # Not an empty result, it must not be cached as one
+            raise UpstreamError(f"{breaker.name} answered {response.status_code}")
 
-        return BookSearchResults(page=page, max_per_page=max_per_page)
+        data = response.json()
+        return BookSearchResults(page=page, max_per_page=max_per_page, **data)
 
     def _filters_to_query_string(self, filters: BookSearchFilters) -> str:
         """Convert the book search filters to a query string.
@@ -165,12 +224,30 @@ class GoogleBooksApi:
         return query_string
 
     def get_book(self, book_id: int) -> typing.Optional[BookItem]:
-        """"""
+        """Get a volume, identical concurrent lookups share one call"""
+
+        return flights.do(
+            key=("get_book", self.api_key, self.priority, book_id),
+            call=functools.partial(self._get_book, book_id=book_id),
+        )
+
+    def _get_book(self, book_id: int) -> typing.Optional[BookItem]:
+        """Get a volume from the api"""
 
         query_string = f"key={self.api_key}"
         url = f"{self.BASE_URL}/volumes/{book_id}?{query_string}"
-        response = requests.get(url=url, timeout=60)
+        response = self._get(url=url)
 
         if response.status_code == 200:
             data = response.json()
             return BookItem(**data)
+
+    def _get(self, url: str) -> requests.Response:
+        """GET through the circuit, a quota token is only taken once it lets the call through"""
+
+        return breaker.call(
+            request=functools.partial(self.client.get, url),
+            acquire=functools.partial(
+                self.limiter.acquire, priority=self.priority, timeout=self.RATE_WAIT
+            ),
+        )
@@ -0,0 +1,138 @@
+import dataclasses
+import os
+import random
+import typing
+
+import requests
+import requests.adapters
+from urllib3.util.retry import Retry
+
+# Retries on throttling and server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+@dataclasses.dataclass
+class Settings:
+    """Settings of the shared clients, timeouts and backoffs in seconds"""
+
+    # Connections kept alive per upstream host
+    pool_size: int = 20
+    connect_timeout: float = 5
+    read_timeout: float = 30
+    retries: int = 2
+    backoff_factor: float = 0.5
+    backoff_max: float = 10
+
+
+settings = Settings()
+
+
+class JitteredRetry(Retry):
+    """Retry policy with full jitter on the exponential backoff"""
+
+    def get_backoff_time(self):
+        """Random backoff between zero and the exponential backoff"""
+
+        backoff = min(super().get_backoff_time(), settings.backoff_max)
+        return random.uniform(0, backoff)
+
+
+class Client:
+    """HTTP client keeping a pool of keep-alive connections per upstream host"""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        pool_size: typing.Optional[int] = None,
+        connect_timeout: typing.Optional[float] = None,
+        read_timeout: typing.Optional[float] = None,
+        retries: typing.Optional[int] = None,
+        backoff_factor: typing.Optional[float] = None,
+    ):
+        """
+        Initializes an instance of the Client class.
+
+        Arguments left out are taken from the module settings.
+
+        Args:
+            pool_size (int, optional): Connections kept alive per upstream host.
+            connect_timeout (float, optional): Seconds to wait for the connection to be established.
+            read_timeout (float, optional): Seconds to wait between bytes of the response.
+            retries (int, optional): Retries on connection errors and on RETRY_STATUSES responses.
+            backoff_factor (float, optional): Base of the jittered exponential backoff between retries.
+        """
+        pool_size = pool_size or settings.pool_size
+        self.timeout = (
+            connect_timeout or settings.connect_timeout,
+            read_timeout or settings.read_timeout,
+        )
+
+        max_retries = JitteredRetry(
+            total=settings.retries if retries is None else retries,
+            backoff_factor=settings.backoff_factor if backoff_factor is None else backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=False,
+        )
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=max_retries,
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(
+        self, url: str, read_timeout: typing.Optional[float] = None, **kwargs
+    ) -> requests.Response:
+        """GET request"""
+
+        kwargs.setdefault("timeout", self._timeout(read_timeout=read_timeout))
+        return self.session.get(url=url, **kwargs)
+
+    def head(
+        self, url: str, read_timeout: typing.Optional[float] = None, **kwargs
+    ) -> requests.Response:
+        """HEAD request"""
+
+        kwargs.setdefault("timeout", self._timeout(read_timeout=read_timeout))
+        return self.session.head(url=url, **kwargs)
+
+    def _timeout(self, read_timeout: typing.Optional[float] = None) -> tuple:
+        """Connect and read timeouts"""
+
+        if read_timeout is None:
+            return self.timeout
+
+        return self.timeout[0], read_timeout
+
+
+_clients: dict[int, Client] = {}
+
+
+def configure(**values) -> None:
+    """Replace settings, clients are created again with them
+
+    Args:
+        **values: Settings fields and their values.
+    """
+
+    for name, value in values.items():
+        if name not in {field.name for field in dataclasses.fields(Settings)}:
+            raise ValueError(f"Unknown http setting: {name}")
+        setattr(settings, name, value)
+
+    _clients.clear()
+
+
+def shared() -> Client:
+    """Client shared by every api of the current worker process"""
+
+    pid = os.getpid()
+    client: typing.Optional[Client] = _clients.get(pid)
+    if not client:
+        # Connections must not be shared with a forked parent
+        _clients.clear()
+        client = _clients[pid] = Client()
+
+    return client
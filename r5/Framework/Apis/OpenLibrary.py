@@ -1,8 +1,23 @@
+import functools
 import math
 import typing
 
 import pydantic
-import requests
+
+from r5.Framework import Cache, Log
+from r5.Framework.Apis import Breaker, Http
+from r5.Framework.Apis.Errors import UpstreamError
+from r5.Framework.Cache import Sqlite
+from r5.Framework.Helpers import Environment, JsonStream, Parallel, SingleFlight
+
+logger = Log.get_logger(__name__)
+
+# Identical requests in flight on the worker
+flights = SingleFlight.Group()
+
+# Circuits of the api and of the covers api on the worker
+breaker = Breaker.CircuitBreaker(name="OPENLIBRARY")
+covers_breaker = Breaker.CircuitBreaker(name="OPENLIBRARY_COVERS")
 
 
 class AuthorInfo(pydantic.BaseModel):
@@ -36,6 +51,9 @@ class BookItem(pydantic.BaseModel):
     author_keys: typing.Optional[list[AuthorItem]] = pydantic.Field(
         alias="authors", default=[]
     )
+    author_ids: typing.Optional[list[str]] = pydantic.Field(
+        alias="author_key", default=[]
+    )
     categories: typing.Optional[list[str]] = pydantic.Field(alias="subject", default=[])
     subjects: typing.Optional[list[str]] = pydantic.Field(alias="subjects", default=[])
     first_publish_date: typing.Optional[str] = pydantic.Field(
@@ -45,6 +63,7 @@ class BookItem(pydantic.BaseModel):
     publisher: typing.Union[list, str] = pydantic.Field(alias="publisher", default="")
     description: typing.Optional[str] = pydantic.Field(alias="description", default="")
     covers: typing.Optional[list[str]] = pydantic.Field(alias="covers", default=[])
+    cover_id: typing.Optional[int] = pydantic.Field(alias="cover_i")
     image: typing.Optional[str] = pydantic.Field(alias="image")
 
     @pydantic.validator("publisher")
@@ -56,6 +75,15 @@ class BookItem(pydantic.BaseModel):
 
         return publisher
 
+    @pydantic.validator("description", pre=True)
+    def validate_description(cls, description):  # pylint: disable=no-self-argument
+        """Validate description, works may have it as a typed text"""
+
+        if isinstance(description, dict):
+            description = description.get("value", "")
+
+        return description
+
     @pydantic.validator("id")
     def validate_id(cls, _id):  # pylint: disable=no-self-argument
         """Validate id"""
@@ -78,6 +106,23 @@ class BookItem(pydantic.BaseModel):
         return values
 
 
+# search.json fields mapped by BookItem, the only ones requested
+SEARCH_FIELDS = (
+    "key",
+    "title",
+    "subtitle",
+    "author_name",
+    "author_key",
+    "subject",
+    "first_publish_year",
+    "publisher",
+    "cover_i",
+)
+
+# Bytes read at once from search.json responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
 class BookSearchResults(pydantic.BaseModel):
     """Model representing the search results from the Google Books API."""
 
@@ -116,17 +161,44 @@ class OpenLibraryApi:
     More info: https://openlibrary.org/dev/docs/api/search
     """
 
-    BASE_URL = "https://openlibrary.org"
-    COVERS_BASE_URL = "https://covers.openlibrary.org/b"
+    BASE_URL = Environment.var_get("R5_OPENLIBRARY_URL", "https://openlibrary.org")
+    COVERS_BASE_URL = Environment.var_get(
+        "R5_OPENLIBRARY_COVERS_URL", "https://covers.openlibrary.org/b"
+    )
+
+    # Deadline (seconds) for the cover and author lookups of a work
+    DETAIL_DEADLINE = float(Environment.var_get("R5_OPENLIBRARY_DETAIL_DEADLINE", 10))
+
+    # Covers: size returned (S, M or L) and probe used to check they exist (HEAD or GET)
+    COVER_SIZE = Environment.var_get("R5_OPENLIBRARY_COVER_SIZE", "S")
+    COVER_PROBE = Environment.var_get("R5_OPENLIBRARY_COVER_PROBE", "HEAD").upper()
+
+    # Works looked up per search.json request
+    LOOKUP_BATCH_SIZE = int(Environment.var_get("R5_OPENLIBRARY_LOOKUP_BATCH_SIZE", 50))
+
+    # Author names cached by author key, shared by the worker processes
+    _authors = Sqlite.SqliteCache(
+        table="openlibrary_authors",
+        max_size=int(Environment.var_get("R5_OPENLIBRARY_AUTHOR_CACHE_SIZE", 100000)),
+        ttl=float(Environment.var_get("R5_OPENLIBRARY_AUTHOR_CACHE_TTL", 3600 * 24 * 7)),
+    )
+
+    # Resolved covers cached by url, known absences included
+    _covers = Cache.TTLCache(
+        max_size=int(Environment.var_get("R5_OPENLIBRARY_COVER_CACHE_SIZE", 10000)),
+        ttl=float(Environment.var_get("R5_OPENLIBRARY_COVER_CACHE_TTL", 3600 * 24)),
+    )
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, client: typing.Optional[Http.Client] = None):
         """
         Initializes an instance of the OpenLibraryAPI class.
 
         Args:
             api_key (str): The API key obtained from the Google Cloud Console.
+            client (Http.Client, optional): HTTP client. Defaults to the worker shared client.
         """
         self.api_key = api_key
+        self.client = client or Http.shared()
 
     def search_books(
         self,
@@ -145,11 +217,27 @@ class OpenLibraryApi:
             list: The list of book search results.
         """
 
+        return flights.do(
+            key=("search_books", filters.json(), int(page), int(max_per_page)),
+            call=functools.partial(
+                self._search_books, filters=filters, page=page, max_per_page=max_per_page
+            ),
+        )
+
+    def _search_books(
+        self,
+        filters: BookSearchFilters,
+        page: int,
+        max_per_page: int,
+    ) -> BookSearchResults:
+        """Search for books on the api"""
+
         start_index = (int(page) - 1) * int(max_per_page)
 
         query_params = {
             "offset": start_index,
             "limit": max_per_page,
+            "fields": ",".join(SEARCH_FIELDS),
             **filters.dict(exclude_none=True),
         }
 
@@ -157,64 +245,236 @@ class OpenLibraryApi:
             [f"{key}={value}" for key, value in query_params.items()]
         )
         url = f"{self.BASE_URL}/search.json?{query_string}"
-        response = requests.get(url=url, timeout=60)
+        response = breaker.call(functools.partial(self.client.get, url, stream=True))
 
-        if response.status_code == 200:
-            data = response.json()
-            return BookSearchResults(page=page, max_per_page=max_per_page, **data)
+        with response:
+            if response.status_code != 200:
+                # Not an empty result, it must not be cached as one
+                raise UpstreamError(f"{breaker.name} answered {response.status_code}")
+
+            # Docs are validated one by one while the body is read
+            data = JsonStream.parse_object(
+                chunks=response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+                array_key="docs",
+                item=lambda doc: BookItem(**doc),
+            )
+
+        book_results = BookSearchResults(page=page, max_per_page=max_per_page, **data)
+        self._seed_author_names(book_items=book_results.items)
+        self._set_search_images(book_items=book_results.items)
+        return book_results
+
+    def get_books(
+        self, book_ids: list[str], concurrency: int
+    ) -> dict[str, typing.Optional[BookItem]]:
+        """Get many works.
+
+        Works are searched by key in batches of LOOKUP_BATCH_SIZE, the ones not
+        found that way (editions, unknown keys) are then looked up one by one.
+
+        Args:
+            book_ids (list[str]): Work ids.
+            concurrency (int): Maximum number of requests running at once.
+
+        Returns:
+            dict: Mapping of work id to the work, None when it was not found.
+        """
+
+        batches = [
+            book_ids[index : index + self.LOOKUP_BATCH_SIZE]
+            for index in range(0, len(book_ids), self.LOOKUP_BATCH_SIZE)
+        ]
+        outcomes = Parallel.run(
+            calls={
+                index: functools.partial(self._search_keys, book_ids=batch)
+                for index, batch in enumerate(batches)
+            },
+            size=concurrency,
+        )
+
+        books = {}
+        for outcome in outcomes.values():
+            if outcome.error:
+                logger.warning(f"Works lookup failed: {outcome.error}")
+                continue
+
+            books.update(outcome.result)
+
+        missing = [book_id for book_id in book_ids if book_id not in books]
+        outcomes = Parallel.run(
+            calls={
+                book_id: functools.partial(self.get_book, book_id=book_id)
+                for book_id in missing
+            },
+            size=concurrency,
+        )
 
-        return BookSearchResults(page=page, max_per_page=max_per_page)
+        for book_id, outcome in outcomes.items():
+            if outcome.error:
+                logger.warning(f"Work {book_id} lookup failed: {outcome.error}")
+
+            books[book_id] = outcome.result
+
+        return books
+
+    def _search_keys(self, book_ids: list[str]) -> dict[str, BookItem]:
+        """Search works by key"""
+
+        # Work ids are alphanumeric (OL123W), anything else would break the query
+        keys = " OR ".join(
+            f'"/works/{book_id}"' for book_id in book_ids if book_id.isalnum()
+        )
+        if not keys:
+            return {}
+
+        query_params = {
+            "q": f"key:({keys})",
+            "fields": ",".join(SEARCH_FIELDS),
+            "limit": len(book_ids),
+        }
+        url = f"{self.BASE_URL}/search.json"
+        response = breaker.call(
+            functools.partial(self.client.get, url, params=query_params, stream=True)
+        )
+
+        with response:
+            if response.status_code != 200:
+                return {}
+
+            data = JsonStream.parse_object(
+                chunks=response.iter_content(chunk_size=STREAM_CHUNK_SIZE),
+                array_key="docs",
+                item=lambda doc: BookItem(**doc),
+            )
+
+        book_items = data.get("docs", [])
+        self._seed_author_names(book_items=book_items)
+        self._set_search_images(book_items=book_items)
+
+        return {book_item.id: book_item for book_item in book_items}
+
+    def _set_search_images(self, book_items: list[BookItem]) -> None:
+        """Set the image of search results from their cover id"""
+
+        for book_item in book_items:
+            if book_item.cover_id and not book_item.image:
+                book_item.image = (
+                    f"{self.COVERS_BASE_URL}/id/{book_item.cover_id}-{self.COVER_SIZE}.jpg"
+                )
 
     def get_book(self, book_id: int) -> typing.Optional[BookItem]:
-        """"""
+        """Get a work, identical concurrent lookups share one call"""
+
+        return flights.do(
+            key=("get_book", book_id),
+            call=functools.partial(self._get_book, book_id=book_id),
+        )
+
+    def _get_book(self, book_id: int) -> typing.Optional[BookItem]:
+        """Get a work enriched with its cover and author names.
+
+        Cover probing and author lookups run concurrently under DETAIL_DEADLINE,
+        lookups that fail or do not finish in time are left out.
+        """
 
         url = f"{self.BASE_URL}/works/{book_id}.json"
-        response = requests.get(url=url, timeout=60)
+        response = breaker.call(functools.partial(self.client.get, url))
 
         if response.status_code == 200:
             data = response.json()
             book = BookItem(**data)
-            for cover_id in book.covers:
-                image = self._get_cover_url(cover_id=cover_id)
-                if image:
-                    book.image = image
-                    break
-
-            if not book.authors and book.author_keys:
-                author_names = []
-                for author_item in book.author_keys:
-                    author_name = self._get_author_name(
-                        author_id=author_item.author.key
+
+            calls = {}
+            if book.covers:
+                calls["image"] = functools.partial(
+                    self._get_first_cover_url, cover_ids=book.covers
+                )
+
+            resolve_authors = not book.authors and book.author_keys
+            if resolve_authors:
+                for index, author_item in enumerate(book.author_keys):
+                    calls[index] = functools.partial(
+                        self._get_author_name, author_id=author_item.author.key
+                    )
+
+            outcomes = Parallel.run(calls=calls, timeout=self.DETAIL_DEADLINE)
+
+            for name, outcome in outcomes.items():
+                if outcome.error or outcome.timed_out:
+                    logger.warning(
+                        f"Lookup {name} of {book_id} failed - timed out: {outcome.timed_out} - error: {outcome.error}"
                     )
-                    if author_name:
-                        author_names.append(author_name)
 
-                book.authors = author_names
+            image = outcomes.pop("image", None)
+            if image and image.result:
+                book.image = image.result
+
+            if resolve_authors:
+                book.authors = [
+                    outcome.result for outcome in outcomes.values() if outcome.result
+                ]
 
             return book
 
+    def _get_first_cover_url(self, cover_ids: list[str]) -> typing.Optional[str]:
+        """Get the url of the first cover found"""
+
+        return Parallel.first(
+            calls=[
+                functools.partial(self._get_cover_url, cover_id=cover_id)
+                for cover_id in cover_ids
+            ]
+        )
+
     def _get_cover_url(
         self,
         cover_id: str,
         key: typing.Optional[str] = "id",
-        size: typing.Optional[str] = "S",
+        size: typing.Optional[str] = None,
     ) -> typing.Optional[str]:
-        """Get cover url"""
+        """Get cover url
 
+        The url, or its absence, is cached per cover. With the HEAD probe the
+        existence is checked through the `default=false` 404 of the covers api
+        without downloading the image.
+        """
+
+        size = size or self.COVER_SIZE
         url = f"{self.COVERS_BASE_URL}/{key}/{cover_id}-{size}.jpg"
-        response = requests.get(url=url, timeout=60)
 
-        if response.status_code == 200:
-            if response.content:
-                return url
+        cached = self._covers.get(url)
+        if cached is not Cache.MISSING:
+            return cached
+
+        if self.COVER_PROBE == "HEAD":
+            response = covers_breaker.call(
+                functools.partial(
+                    self.client.head,
+                    url,
+                    params=dict(default="false"),
+                    allow_redirects=True,
+                )
+            )
+            found = response.status_code == 200
+        else:
+            response = covers_breaker.call(functools.partial(self.client.get, url))
+            found = response.status_code == 200 and bool(response.content)
+
+        cover_url = url if found else None
+        if found or response.status_code == 404:
+            self._covers.set(url, cover_url)
 
-        return None
+        return cover_url
 
     def _get_author_name(self, author_id: str) -> typing.Optional[str]:
         """Get author name"""
 
+        cached = self._authors.get(author_id)
+        if cached is not Cache.MISSING:
+            return cached
+
         url = f"{self.BASE_URL}/authors/{author_id}.json"
-        response = requests.get(url=url, timeout=60)
+        response = breaker.call(functools.partial(self.client.get, url))
 
         name = None
         if response.status_code == 200:
@@ -226,4 +486,18 @@ class OpenLibraryApi:
                     or data.get("personal_name")
                 )
 
+        if name or response.status_code == 404:
+            self._authors.set(author_id, name)
+
         return name
+
+    def _seed_author_names(self, book_items: list[BookItem]) -> None:
+        """Cache the author names that come along with search results"""
+
+        self._authors.set_many(
+            {
+                author_id: author_name
+                for book_item in book_items
+                for author_id, author_name in zip(book_item.author_ids, book_item.authors)
+            }
+        )
@@ -0,0 +1,172 @@
+import enum
+import os
+import sqlite3
+import threading
+import time
+
+import gevent
+
+from r5.Framework import Log
+from r5.Framework.Apis.Errors import RateLimitedError
+from r5.Framework.Cache import Sqlite
+
+logger = Log.get_logger(__name__)
+
+TABLE = "rate_limits"
+
+
+class Priority(enum.Enum):
+    """Request priorities"""
+
+    # User waiting for the answer, may use every token
+    INTERACTIVE = "INTERACTIVE"
+
+    # Bulk or background work, leaves the reserved tokens to interactive requests
+    BULK = "BULK"
+
+
+class TokenBucket:
+    """Token bucket shared by the worker processes through the local SQLite cache file.
+
+    Requests wait for a token up to their deadline. Bulk requests only take
+    tokens above the reserve, which stays available to interactive requests.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        rate: float,
+        capacity: float,
+        reserve: float,
+        path: str = Sqlite.PATH,
+    ):
+        """
+        Initializes an instance of the TokenBucket class.
+
+        Args:
+            name (str): Bucket name, one bucket per API key.
+            rate (float): Tokens added per second.
+            capacity (float): Maximum tokens, the allowed burst.
+            reserve (float): Fraction of the capacity only interactive requests can take.
+            path (str, optional): SQLite file. Defaults to Sqlite.PATH.
+        """
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.reserve = reserve * capacity
+        self.path = path
+
+        self._ready_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the current worker process"""
+
+        connection = Sqlite.connect(path=self.path)
+        if self._ready_pid != os.getpid():
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+                "consumed INTEGER NOT NULL DEFAULT 0, throttled INTEGER NOT NULL DEFAULT 0, "
+                "rejected INTEGER NOT NULL DEFAULT 0)"
+            )
+            connection.execute(
+                f"INSERT OR IGNORE INTO {TABLE} (name, tokens, updated_at) VALUES (?, ?, ?)",
+                (self.name, self.capacity, time.time()),
+            )
+            self._ready_pid = os.getpid()
+
+        return connection
+
+    def acquire(self, priority: Priority, timeout: float) -> None:
+        """Take a token, waiting for it up to timeout
+
+        Args:
+            priority (Priority): Request priority.
+            timeout (float): Seconds the request can wait for a token.
+
+        Raises:
+            RateLimitedError: No token became available before the deadline.
+        """
+
+        deadline = time.monotonic() + timeout
+        floor = 0 if priority == Priority.INTERACTIVE else self.reserve
+
+        throttled = False
+        while True:
+            try:
+                wait = self._take(floor=floor, throttled=throttled)
+            except sqlite3.Error as err:
+                logger.warning(f"Rate limit {self.name} error: {err}")
+                return
+
+            if wait is None:
+                return
+
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                self._count(column="rejected")
+                raise RateLimitedError(f"{self.name} quota exhausted")
+
+            throttled = True
+            gevent.sleep(wait)
+
+    def _take(self, floor: float, throttled: bool):
+        """Take a token above floor, or return the seconds until one is available"""
+
+        with self._lock:
+            connection = self.connection
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated_at = connection.execute(
+                    f"SELECT tokens, updated_at FROM {TABLE} WHERE name = ?", (self.name,)
+                ).fetchone()
+
+                now = time.time()
+                tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+                if tokens - 1 >= floor:
+                    connection.execute(
+                        f"UPDATE {TABLE} SET tokens = ?, updated_at = ?, consumed = consumed + 1, "
+                        "throttled = throttled + ? WHERE name = ?",
+                        (tokens - 1, now, int(throttled), self.name),
+                    )
+                    wait = None
+                else:
+                    wait = (floor + 1 - tokens) / self.rate
+            finally:
+                connection.execute("COMMIT")
+
+        return wait
+
+    def _count(self, column: str) -> None:
+        """Increase a counter"""
+
+        try:
+            with self._lock:
+                self.connection.execute(
+                    f"UPDATE {TABLE} SET {column} = {column} + 1 WHERE name = ?", (self.name,)
+                )
+        except sqlite3.Error as err:
+            logger.warning(f"Rate limit {self.name} error: {err}")
+
+    def stats(self) -> dict:
+        """Quota counters of every worker"""
+
+        try:
+            with self._lock:
+                tokens, consumed, throttled, rejected = self.connection.execute(
+                    f"SELECT tokens, consumed, throttled, rejected FROM {TABLE} WHERE name = ?",
+                    (self.name,),
+                ).fetchone()
+        except sqlite3.Error as err:
+            logger.warning(f"Rate limit {self.name} error: {err}")
+            return {}
+
+        return dict(
+            tokens=tokens,
+            consumed=consumed,
+            throttled=throttled,
+            rejected=rejected,
+        )
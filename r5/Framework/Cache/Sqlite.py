@@ -0,0 +1,239 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import typing
+
+from r5.Framework import Log
+from r5.Framework.Cache import MISSING
+from r5.Framework.Helpers import Environment
+
+logger = Log.get_logger(__name__)
+
+# Local file shared by the worker processes
+PATH = Environment.var_get(
+    "R5_CACHE_PATH", os.path.join(tempfile.gettempdir(), "r5-cache.db")
+)
+
+# Sets between two evictions of the least recently used entries
+EVICT_EVERY = 100
+
+# Keys per query of get_many
+GET_MANY_BATCH_SIZE = 500
+
+_connections: dict[tuple[int, str], sqlite3.Connection] = {}
+
+
+def connect(path: str = PATH) -> sqlite3.Connection:
+    """Connection to a SQLite file for the current worker process"""
+
+    pid = os.getpid()
+    connection = _connections.get((pid, path))
+    if not connection:
+        # Connections must not be shared with a forked parent
+        for key in [key for key in _connections if key[0] != pid]:
+            del _connections[key]
+
+        connection = sqlite3.connect(
+            path, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        _connections[(pid, path)] = connection
+
+    return connection
+
+
+class SqliteCache:
+    """Cache shared by the worker processes through a local SQLite file,
+    with LRU eviction and a time to live per entry.
+
+    Values are stored as JSON, errors of the store are logged and handled as misses.
+    """
+
+    def __init__(self, table: str, max_size: int, ttl: float, path: str = PATH):
+        """
+        Initializes an instance of the SqliteCache class.
+
+        Args:
+            table (str): Table holding the entries of this cache.
+            max_size (int): Maximum number of entries, the least recently used are evicted first.
+            ttl (float): Seconds an entry is valid after being set.
+            path (str, optional): SQLite file. Defaults to PATH.
+        """
+        self.table = table
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+
+        self._ready_pid = None
+        self._lock = threading.Lock()
+        self._sets = 0
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the current worker process"""
+
+        connection = connect(path=self.path)
+        if self._ready_pid != os.getpid():
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_accessed_at ON {self.table} (accessed_at)"
+            )
+            self._ready_pid = os.getpid()
+
+        return connection
+
+    def get(self, key: str, default: typing.Any = MISSING) -> typing.Any:
+        """Get a valid entry or default"""
+
+        now = time.time()
+        try:
+            with self._lock:
+                row = self.connection.execute(
+                    f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row is None:
+                    return default
+
+                self.connection.execute(
+                    f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        except sqlite3.Error as err:
+            logger.warning(f"Cache {self.table} get error: {err}")
+            return default
+
+        return json.loads(row[0])
+
+    def get_many(self, keys: typing.Iterable[str]) -> dict[str, typing.Any]:
+        """Get the valid entries of many keys, missing keys are left out"""
+
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        entries = {}
+        try:
+            with self._lock:
+                for index in range(0, len(keys), GET_MANY_BATCH_SIZE):
+                    batch = keys[index : index + GET_MANY_BATCH_SIZE]
+                    rows = self.connection.execute(
+                        f"SELECT key, value FROM {self.table} "
+                        f"WHERE key IN ({','.join('?' * len(batch))}) AND expires_at > ?",
+                        (*batch, now),
+                    ).fetchall()
+                    entries.update((key, json.loads(value)) for key, value in rows)
+        except sqlite3.Error as err:
+            logger.warning(f"Cache {self.table} get error: {err}")
+
+        return entries
+
+    def set(self, key: str, value: typing.Any) -> None:
+        """Set an entry"""
+
+        self.set_many({key: value})
+
+    def set_many(self, entries: dict[str, typing.Any]) -> None:
+        """Set many entries at once"""
+
+        if not entries:
+            return
+
+        now = time.time()
+        rows = [
+            (key, json.dumps(value), now + self.ttl, now) for key, value in entries.items()
+        ]
+        try:
+            with self._lock:
+                self.connection.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+
+                self._sets += len(rows)
+                if self._sets >= EVICT_EVERY:
+                    self._sets = 0
+                    self._evict(now=now)
+        except sqlite3.Error as err:
+            logger.warning(f"Cache {self.table} set error: {err}")
+
+    def _evict(self, now: float) -> None:
+        """Remove expired entries and the least recently used above max_size"""
+
+        self.connection.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+        self.connection.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,),
+        )
+
+
+class SqliteCounters:
+    """Counters shared by the worker processes through a local SQLite file.
+
+    Errors of the store are logged, reads then return None so callers can skip
+    what depends on the counters.
+    """
+
+    def __init__(self, table: str, path: str = PATH):
+        """
+        Initializes an instance of the SqliteCounters class.
+
+        Args:
+            table (str): Table holding the counters.
+            path (str, optional): SQLite file. Defaults to PATH.
+        """
+        self.table = table
+        self.path = path
+
+        self._ready_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the current worker process"""
+
+        connection = connect(path=self.path)
+        if self._ready_pid != os.getpid():
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._ready_pid = os.getpid()
+
+        return connection
+
+    def get(self, keys: typing.Iterable[str]) -> typing.Optional[tuple[int, ...]]:
+        """Values of many counters, in the order of keys, missing counters are 0"""
+
+        keys = list(keys)
+        try:
+            with self._lock:
+                rows = self.connection.execute(
+                    f"SELECT key, value FROM {self.table} WHERE key IN ({','.join('?' * len(keys))})",
+                    keys,
+                ).fetchall()
+        except sqlite3.Error as err:
+            logger.warning(f"Counters {self.table} get error: {err}")
+            return None
+
+        values = dict(rows)
+        return tuple(values.get(key, 0) for key in keys)
+
+    def incr(self, keys: typing.Iterable[str]) -> None:
+        """Increment many counters"""
+
+        try:
+            with self._lock:
+                self.connection.executemany(
+                    f"INSERT INTO {self.table} (key, value) VALUES (?, 1) "
+                    "ON CONFLICT (key) DO UPDATE SET value = value + 1",
+                    [(key,) for key in keys],
+                )
+        except sqlite3.Error as err:
+            logger.warning(f"Counters {self.table} incr error: {err}")
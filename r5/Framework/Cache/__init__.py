@@ -0,0 +1,136 @@
+import collections
+import threading
+import time
+import typing
+
+import gevent
+
+from r5.Framework import Log
+
+logger = Log.get_logger(__name__)
+
+# Returned by get when the key is not cached, so None can be cached as a value
+MISSING = object()
+
+
+class TTLCache:  # pylint: disable=too-many-instance-attributes
+    """In-process cache with LRU eviction and a time to live per entry"""
+
+    def __init__(self, max_size: int, ttl: float, stale: float = 0):
+        """
+        Initializes an instance of the TTLCache class.
+
+        Args:
+            max_size (int): Maximum number of entries, the least recently used is evicted first.
+            ttl (float): Seconds an entry is valid after being set.
+            stale (float, optional): Seconds an expired entry is kept to be served by load
+                while it is refreshed. Defaults to 0.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale = stale
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: typing.Hashable) -> typing.Optional[tuple[typing.Any, bool]]:
+        """Get the value of an entry and whether it is still fresh"""
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            now = time.monotonic()
+            if expires_at + self.stale < now:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value, expires_at >= now
+
+    def get(self, key: typing.Hashable, default: typing.Any = MISSING) -> typing.Any:
+        """Get a valid entry or default"""
+
+        entry = self._lookup(key)
+        if entry is None or not entry[1]:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: typing.Hashable, value: typing.Any) -> None:
+        """Set an entry"""
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def load(
+        self,
+        key: typing.Hashable,
+        loader: typing.Callable,
+        refresher: typing.Optional[typing.Callable] = None,
+    ) -> typing.Any:
+        """Get an entry, loading it when missing.
+
+        Expired entries still in the stale window are served as they are
+        while a background greenlet refreshes them with refresher (loader by default).
+        """
+
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            value = loader()
+            self.set(key, value)
+            return value
+
+        value, fresh = entry
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+            if key not in self._refreshing:
+                self._refreshing.add(key)
+                gevent.spawn(self._refresh, key, refresher or loader)
+
+        return value
+
+    def _refresh(self, key: typing.Hashable, loader: typing.Callable) -> None:
+        """Refresh an entry"""
+
+        try:
+            self.set(key, loader())
+        except Exception as err:  # pylint: disable=broad-except
+            logger.warning(f"Cache refresh of {key} failed: {err}")
+        finally:
+            self._refreshing.discard(key)
+
+    def stats(self) -> dict:
+        """Cache counters"""
+
+        return dict(
+            size=len(self._entries),
+            hits=self.hits,
+            stale_hits=self.stale_hits,
+            misses=self.misses,
+        )
+
+    def clear(self) -> None:
+        """Remove every entry"""
+
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
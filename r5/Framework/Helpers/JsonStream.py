@@ -0,0 +1,127 @@
+import codecs
+import json
+import typing
+
+_decoder = json.JSONDecoder()
+
+WHITESPACE = " \t\n\r"
+
+
+class _Buffer:
+    """Text read incrementally from chunks of UTF-8 bytes"""
+
+    def __init__(self, chunks: typing.Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.text = ""
+        self.pos = 0
+        self.ended = False
+
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def more(self) -> bool:
+        """Read the next chunk, dropping the text already consumed"""
+
+        if self.ended:
+            return False
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.ended = True
+            text = self._utf8.decode(b"", final=True)
+        else:
+            text = self._utf8.decode(chunk)
+
+        self.text = self.text[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next character that is not whitespace, without consuming it"""
+
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+
+            if not self.more():
+                raise ValueError("Unexpected end of JSON document")
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars"""
+
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(f"Expected one of {chars!r} at {self.pos}, found {char!r}")
+
+        self.pos += 1
+        return char
+
+    def value(self) -> typing.Any:
+        """Decode the next JSON value, reading chunks until it is complete"""
+
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.more():
+                    raise
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.text) and self.more():
+                continue
+
+            self.pos = end
+            return value
+
+
+def parse_object(
+    chunks: typing.Iterable[bytes],
+    array_key: str,
+    item: typing.Callable[[typing.Any], typing.Any],
+) -> dict:
+    """Parse a JSON object incrementally.
+
+    The elements of its array_key array are decoded one by one and converted
+    with item as they arrive, so the raw array is never held in memory.
+
+    Args:
+        chunks (typing.Iterable[bytes]): The document, in chunks of UTF-8 bytes.
+        array_key (str): Key of the array streamed element by element.
+        item (typing.Callable): Converts each element of the array.
+
+    Returns:
+        dict: The object, with the converted elements under array_key.
+    """
+
+    buffer = _Buffer(chunks=chunks)
+    result = {}
+
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return result
+
+    while True:
+        key = buffer.value()
+        buffer.expect(":")
+
+        if key == array_key and buffer.peek() == "[":
+            buffer.expect("[")
+            items = []
+            if buffer.peek() == "]":
+                buffer.expect("]")
+            else:
+                while True:
+                    items.append(item(buffer.value()))
+                    if buffer.expect(",]") == "]":
+                        break
+
+            result[key] = items
+        else:
+            result[key] = buffer.value()
+
+        if buffer.expect(",}") == "}":
+            return result
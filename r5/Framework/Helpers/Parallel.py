@@ -0,0 +1,105 @@
+import dataclasses
+import typing
+
+import gevent
+import gevent.lock
+import gevent.pool
+import gevent.queue
+
+
+@dataclasses.dataclass
+class Outcome:
+    """Outcome of a call executed in parallel"""
+
+    done: bool = False
+    timed_out: bool = False
+    result: typing.Any = None
+    error: typing.Optional[BaseException] = None
+
+
+def run(
+    calls: dict[typing.Any, typing.Callable],
+    timeout: typing.Optional[float] = None,
+    size: typing.Optional[int] = None,
+) -> dict[typing.Any, Outcome]:
+    """Run callables concurrently and wait for them up to an overall deadline.
+
+    Calls still running when the deadline expires are killed and reported as timed out.
+
+    Args:
+        calls (dict): Mapping of name to a callable without arguments.
+        timeout (float, optional): Overall deadline in seconds. Defaults to None (wait for all).
+        size (int, optional): Maximum number of calls running at once. Defaults to all of them.
+
+    Returns:
+        dict: Mapping of name to Outcome, in the same order as calls.
+    """
+
+    group = gevent.pool.Group()
+    slots = gevent.lock.BoundedSemaphore(size or max(len(calls), 1))
+
+    def limited(call):
+        outcome = Outcome()
+        with slots:
+            try:
+                outcome.result = call()
+            except Exception as err:  # pylint: disable=broad-except
+                outcome.error = err
+
+        outcome.done = True
+        return outcome
+
+    greenlets = {name: group.spawn(limited, call) for name, call in calls.items()}
+    try:
+        gevent.joinall(list(greenlets.values()), timeout=timeout)
+
+        outcomes = {}
+        for name, greenlet in greenlets.items():
+            if greenlet.ready():
+                outcomes[name] = greenlet.value
+            else:
+                outcomes[name] = Outcome(timed_out=True)
+
+        return outcomes
+    finally:
+        group.kill(block=False)
+
+
+def first(
+    calls: list[typing.Callable],
+    timeout: typing.Optional[float] = None,
+) -> typing.Any:
+    """Run callables concurrently and return the first truthy result.
+
+    The remaining calls are killed as soon as a result is found or the deadline expires.
+
+    Args:
+        calls (list): Callables without arguments.
+        timeout (float, optional): Overall deadline in seconds. Defaults to None (wait for all).
+
+    Returns:
+        typing.Any: The first truthy result or None if no call produced one, failed calls are ignored.
+    """
+
+    group = gevent.pool.Group()
+    finished = gevent.queue.Queue()
+
+    def quiet(call):
+        try:
+            return call()
+        except Exception:  # pylint: disable=broad-except
+            return None
+
+    for call in calls:
+        group.spawn(quiet, call).link(finished.put)
+
+    try:
+        with gevent.Timeout(timeout, False):
+            for _ in calls:
+                greenlet = finished.get()
+                if greenlet.successful() and greenlet.value:
+                    return greenlet.value
+
+        return None
+    finally:
+        group.kill(block=False)
@@ -0,0 +1,70 @@
+import typing
+
+import gevent.event
+
+
+class CallAbortedError(Exception):
+    """The call waited for was killed before finishing"""
+
+
+class Group:
+    """Merge concurrent calls with the same key into a single one,
+    its result (or error) is shared with every caller waiting for it.
+
+    A call killed before finishing (e.g. at the deadline of its caller) is
+    run again by one of the callers waiting for it, each caller is bound by
+    its own deadline only.
+    """
+
+    def __init__(self):
+        """Initializes an instance of the Group class."""
+
+        self.calls = 0
+        self.coalesced = 0
+
+        self._in_flight: dict[typing.Hashable, gevent.event.AsyncResult] = {}
+
+    def do(self, key: typing.Hashable, call: typing.Callable) -> typing.Any:
+        """Run call unless an identical one is already in flight, then wait for its result
+
+        Args:
+            key (typing.Hashable): Identifies identical calls.
+            call (typing.Callable): Callable without arguments.
+
+        Returns:
+            typing.Any: The result of the call.
+        """
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            while in_flight is not None:
+                try:
+                    return in_flight.get()
+                except CallAbortedError:
+                    # Another waiter may already be running it again
+                    in_flight = self._in_flight.get(key)
+
+        self.calls += 1
+        result = self._in_flight[key] = gevent.event.AsyncResult()
+        try:
+            value = call()
+            result.set(value)
+            return value
+        except Exception as err:
+            result.set_exception(err)
+            raise
+        finally:
+            del self._in_flight[key]
+            if not result.ready():
+                # The call was killed, waiters must not hang
+                result.set_exception(CallAbortedError(f"Call {key} aborted"))
+
+    def stats(self) -> dict:
+        """Group counters"""
+
+        return dict(
+            in_flight=len(self._in_flight),
+            calls=self.calls,
+            coalesced=self.coalesced,
+        )
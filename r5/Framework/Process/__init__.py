@@ -1,5 +1,7 @@
+import collections
 import multiprocessing as mp
 import multiprocessing.connection as mpc
+import typing
 
 from r5.Framework import Log
 
@@ -37,3 +39,80 @@ class New:
 
         for p in self.procs:
             p.terminate()
+
+
+def _serve(
+    func: typing.Callable, tasks: mpc.Connection, results: mpc.Connection
+) -> None:
+    """Apply func to the items received until None"""
+
+    while True:
+        item = tasks.recv()
+        if item is None:
+            break
+
+        try:
+            results.send((True, func(item)))
+        except Exception as err:  # pylint: disable=broad-except
+            results.send((False, err))
+
+
+def imap(
+    func: typing.Callable, items: typing.Iterable, workers: int
+) -> typing.Iterator:
+    """Apply func to items in worker processes, results are yielded in order
+
+    Unlike multiprocessing.Pool no helper threads are involved, and one way pipes
+    (not patched sockets) are used, so it also runs under gevent monkey patching.
+    Each worker holds one item at a time, items are dealt round robin.
+
+    Args:
+        func (typing.Callable): Function of a single item, not None.
+        items (typing.Iterable): Items, read as workers become free.
+        workers (int): Worker processes.
+    """
+
+    items = iter(items)
+    procs = []
+    try:
+        for _ in range(max(workers, 1)):
+            tasks_reader, tasks = mp.Pipe(duplex=False)
+            results, results_writer = mp.Pipe(duplex=False)
+            proc = mp.Process(
+                target=_serve, args=(func, tasks_reader, results_writer), daemon=True
+            )
+            proc.start()
+            tasks_reader.close()
+            results_writer.close()
+            procs.append((proc, tasks, results))
+
+        busy = collections.deque()
+        for _, tasks, results in procs:
+            item = next(items, None)
+            if item is None:
+                break
+            tasks.send(item)
+            busy.append((tasks, results))
+
+        while busy:
+            tasks, results = busy.popleft()
+            ok, result = results.recv()
+
+            item = next(items, None)
+            if item is not None:
+                tasks.send(item)
+                busy.append((tasks, results))
+
+            if not ok:
+                raise result
+
+            yield result
+    finally:
+        for proc, tasks, _ in procs:
+            try:
+                tasks.send(None)
+            except OSError:
+                pass
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
@@ -0,0 +1,185 @@
+import bisect
+import heapq
+import itertools
+import typing
+
+from r5.Framework.Search import tokenize
+
+# Words of a text it can be found by, from its first one
+MAX_WORDS = 8
+
+# Keys read per search at most, short prefixes rank the texts of the first ones
+MAX_SCAN = 20000
+
+# Searches whose results are kept until the next change of the index
+MAX_RESULTS = 10000
+
+
+def normalize(text: typing.Optional[str]) -> str:
+    """Words of a text, lower cased and without accents, separated by one space"""
+
+    return " ".join(tokenize(text))
+
+
+class PrefixIndex:
+    """Texts found by the prefix of any of their first words, most counted first
+
+    Keys are the normalized texts from each of their words on, kept in a sorted
+    array searched with bisect. Texts are counted (e.g. by the books having
+    them), the index holds at most max_keys keys and evicts the least counted
+    texts when full.
+    """
+
+    def __init__(self, max_keys: int):
+        """
+        Initializes an instance of the PrefixIndex class.
+
+        Args:
+            max_keys (int): Maximum number of keys, a text has one per word.
+        """
+        self.max_keys = max_keys
+
+        # Sorted (normalized text from a word on, kind, normalized text)
+        self._keys: list[tuple[str, str, str]] = []
+        # Text as given and count by (kind, normalized text)
+        self._entries: dict[tuple[str, str], list] = {}
+        # Results by normalized prefix and limit
+        self._results: dict[tuple[str, int], list[tuple[str, str, int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, text: typing.Optional[str], kind: str, count: int = 1) -> None:
+        """Count a text of a kind, e.g. a title or an author name"""
+
+        normalized = normalize(text)
+        if not normalized:
+            return
+
+        self._results.clear()
+        entry = self._entries.get((kind, normalized))
+        if entry:
+            entry[1] += count
+            return
+
+        self._entries[(kind, normalized)] = [text, count]
+        for key in self._text_keys(kind=kind, normalized=normalized):
+            bisect.insort(self._keys, key)
+
+        if len(self._keys) > self.max_keys:
+            self._evict()
+
+    def add_many(self, entries: typing.Iterable[tuple[str, str, int]]) -> None:
+        """Add many texts, kinds and counts at once, most counted first
+
+        Keys are sorted once, texts are ignored once the index is full.
+        """
+
+        self._results.clear()
+        keys = []
+        for text, kind, count in entries:
+            normalized = normalize(text)
+            if not normalized:
+                continue
+
+            entry = self._entries.get((kind, normalized))
+            if entry:
+                entry[1] += count
+                continue
+
+            text_keys = self._text_keys(kind=kind, normalized=normalized)
+            if len(self._keys) + len(keys) + len(text_keys) > self.max_keys:
+                break
+
+            self._entries[(kind, normalized)] = [text, count]
+            keys.extend(text_keys)
+
+        self._keys.extend(keys)
+        self._keys.sort()
+
+    def remove(self, text: typing.Optional[str], kind: str, count: int = 1) -> None:
+        """Uncount a text, removed once its count is 0"""
+
+        normalized = normalize(text)
+        entry = self._entries.get((kind, normalized))
+        if not entry:
+            return
+
+        self._results.clear()
+        entry[1] -= count
+        if entry[1] > 0:
+            return
+
+        del self._entries[(kind, normalized)]
+        for key in self._text_keys(kind=kind, normalized=normalized):
+            position = bisect.bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def search(self, prefix: str, limit: int) -> list[tuple[str, str, int]]:
+        """Texts having a word starting with prefix
+
+        Args:
+            prefix (str): Start of the words searched, normalized like the texts.
+            limit (int): Maximum number of texts.
+
+        Returns:
+            list[tuple[str, str, int]]: Texts, kinds and counts, most counted first.
+        """
+
+        prefix = normalize(prefix)
+        if not prefix or limit < 1:
+            return []
+
+        results = self._results.get((prefix, limit))
+        if results is not None:
+            return results
+
+        found: dict[tuple[str, str], list] = {}
+        position = bisect.bisect_left(self._keys, (prefix,))
+        for key in itertools.islice(self._keys, position, position + MAX_SCAN):
+            if not key[0].startswith(prefix):
+                break
+
+            found.setdefault(key[1:], self._entries[key[1:]])
+
+        ranked = heapq.nsmallest(
+            limit, found.items(), key=lambda item: (-item[1][1], len(item[0][1]), item[0][1])
+        )
+        results = [(entry[0], kind, entry[1]) for (kind, _), entry in ranked]
+
+        if len(self._results) >= MAX_RESULTS:
+            self._results.clear()
+        self._results[(prefix, limit)] = results
+
+        return results
+
+    @staticmethod
+    def _text_keys(kind: str, normalized: str) -> list[tuple[str, str, str]]:
+        """Keys of a text, one per word"""
+
+        keys = [(normalized, kind, normalized)]
+        position = normalized.find(" ")
+        while position != -1 and len(keys) < MAX_WORDS:
+            keys.append((normalized[position + 1 :], kind, normalized))
+            position = normalized.find(" ", position + 1)
+
+        return keys
+
+    def _evict(self) -> None:
+        """Remove the least counted texts, down to 90% of the keys"""
+
+        target = int(self.max_keys * 0.9)
+        removed = set()
+        keys = len(self._keys)
+        for entry_key, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if keys <= target:
+                break
+
+            removed.add(entry_key)
+            keys -= len(self._text_keys(kind=entry_key[0], normalized=entry_key[1]))
+
+        self._results.clear()
+        for entry_key in removed:
+            del self._entries[entry_key]
+        self._keys = [key for key in self._keys if key[1:] not in removed]
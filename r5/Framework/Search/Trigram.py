@@ -0,0 +1,133 @@
+import array
+import bisect
+import math
+import typing
+
+from r5.Framework.Search import tokenize
+
+# Trigrams counted per text at most, as stored in an unsigned byte
+MAX_TRIGRAMS = 255
+
+
+def trigrams(text: typing.Optional[str]) -> set[str]:
+    """Trigrams of the words of a text, padded like pg_trgm ("  w", " wo", "wor", ...)"""
+
+    grams = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        grams.update(padded[index : index + 3] for index in range(len(padded) - 2))
+
+    return grams
+
+
+class TrigramIndex:
+    """In-memory trigram index of short texts (titles, names) for typo tolerant search
+
+    Similarity is close to the word_similarity of pg_trgm: the share of the
+    trigrams of the query found in the text, so a misspelled word still finds
+    the longer titles and names having it. Postings are sorted ids in typed
+    arrays, texts are not kept: removing a text requires it.
+    """
+
+    def __init__(self):
+        """Initializes an instance of the TrigramIndex class."""
+
+        self._postings: dict[str, array.array] = {}
+        # Trigrams of each text, by id, 0 when not indexed
+        self._sizes = array.array("B")
+        self._texts = 0
+
+    def __len__(self) -> int:
+        return self._texts
+
+    def add(self, text_id: int, text: typing.Optional[str]) -> None:
+        """Index the text of an id, the id must not be indexed already"""
+
+        grams = trigrams(text)
+        if not grams:
+            return
+
+        if text_id >= len(self._sizes):
+            self._sizes.extend(bytes(text_id + 1 - len(self._sizes)))
+        if not self._sizes[text_id]:
+            self._texts += 1
+        self._sizes[text_id] = min(len(grams), MAX_TRIGRAMS)
+
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array.array("I")
+
+            if not postings or postings[-1] < text_id:
+                postings.append(text_id)
+            else:
+                position = bisect.bisect_left(postings, text_id)
+                if position == len(postings) or postings[position] != text_id:
+                    postings.insert(position, text_id)
+
+    def remove(self, text_id: int, text: typing.Optional[str]) -> None:
+        """Remove the text of an id"""
+
+        if text_id < len(self._sizes) and self._sizes[text_id]:
+            self._sizes[text_id] = 0
+            self._texts -= 1
+
+        for gram in trigrams(text):
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+
+            position = bisect.bisect_left(postings, text_id)
+            if position < len(postings) and postings[position] == text_id:
+                del postings[position]
+            if not postings:
+                del self._postings[gram]
+
+    def search(
+        self, text: str, threshold: float, limit: typing.Optional[int] = None
+    ) -> list[tuple[int, float]]:
+        """Ids of the texts similar to a text
+
+        Candidates are read from the postings of the rarest trigrams only: a
+        text at least threshold similar shares ceil(threshold * n) of the n
+        trigrams of the query, so one of the n - ceil(threshold * n) + 1 rarest.
+        Equally similar texts are ranked by their trigrams in common over the
+        trigrams of both, closer lengths first.
+
+        Args:
+            text (str): Text searched.
+            threshold (float): Minimum similarity, between 0 and 1.
+            limit (int, optional): Maximum number of ids. Defaults to every id.
+
+        Returns:
+            list[tuple[int, float]]: Ids and similarities, most similar first.
+        """
+
+        grams = sorted(trigrams(text), key=lambda gram: len(self._postings.get(gram, ())))
+        if not grams:
+            return []
+
+        shared_min = max(1, math.ceil(threshold * len(grams)))
+        candidates = set()
+        for gram in grams[: len(grams) - shared_min + 1]:
+            candidates.update(self._postings.get(gram, ()))
+
+        results = []
+        for text_id in candidates:
+            shared = 0
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is None:
+                    continue
+
+                position = bisect.bisect_left(postings, text_id)
+                if position < len(postings) and postings[position] == text_id:
+                    shared += 1
+
+            similarity = shared / len(grams)
+            if similarity >= threshold:
+                overlap = shared / (len(grams) + self._sizes[text_id] - shared)
+                results.append((text_id, similarity, overlap))
+
+        results.sort(key=lambda item: (-item[1], -item[2], item[0]))
+        return [(text_id, similarity) for text_id, similarity, _ in results[:limit]]
@@ -0,0 +1,334 @@
+import array
+import base64
+import bisect
+import json
+import math
+import os
+import re
+import stat
+import sys
+import typing
+import unicodedata
+
+from r5.Framework import Log
+
+logger = Log.get_logger(__name__)
+
+TOKEN = re.compile(r"\w+")
+
+# Term frequencies are stored as unsigned shorts
+MAX_FREQUENCY = 2**16 - 1
+
+# Format of the snapshots, snapshots of other versions are ignored
+SNAPSHOT_VERSION = 1
+
+
+def tokenize(text: typing.Optional[str]) -> list[str]:
+    """Words of a text, lower cased and without accents"""
+
+    if not text:
+        return []
+
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return TOKEN.findall(text)
+
+
+class Postings:
+    """Documents having a term, sorted ids and term frequencies in typed arrays"""
+
+    __slots__ = ("ids", "frequencies")
+
+    def __init__(self):
+        self.ids = array.array("I")
+        self.frequencies = array.array("H")
+
+    def set(self, doc_id: int, frequency: int) -> None:
+        """Add a document, ids are mostly added in increasing order"""
+
+        frequency = min(frequency, MAX_FREQUENCY)
+        if not self.ids or self.ids[-1] < doc_id:
+            self.ids.append(doc_id)
+            self.frequencies.append(frequency)
+            return
+
+        position = bisect.bisect_left(self.ids, doc_id)
+        if position < len(self.ids) and self.ids[position] == doc_id:
+            self.frequencies[position] = frequency
+        else:
+            self.ids.insert(position, doc_id)
+            self.frequencies.insert(position, frequency)
+
+    def remove(self, doc_id: int) -> None:
+        """Remove a document"""
+
+        position = bisect.bisect_left(self.ids, doc_id)
+        if position < len(self.ids) and self.ids[position] == doc_id:
+            del self.ids[position]
+            del self.frequencies[position]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+class InvertedIndex:  # pylint: disable=too-many-instance-attributes
+    """In-memory inverted index of documents made of text fields, ranked with BM25
+
+    Documents are dicts of field texts, searches match documents having any of
+    the words of every field searched and score them with the sum of the BM25
+    score of each field. The index is updated document by document and saved
+    to a JSON snapshot file along with meta, data of the owner of the index.
+    """
+
+    def __init__(self, fields: typing.Iterable[str], k1: float = 1.2, b: float = 0.75):
+        """
+        Initializes an instance of the InvertedIndex class.
+
+        Args:
+            fields (typing.Iterable[str]): Text fields of the documents.
+            k1 (float, optional): BM25 term frequency saturation. Defaults to 1.2.
+            b (float, optional): BM25 length normalization. Defaults to 0.75.
+        """
+        self.fields = tuple(fields)
+        self.k1 = k1
+        self.b = b
+        self.meta: dict = {}
+
+        self._postings: dict[str, dict[str, Postings]] = {field: {} for field in self.fields}
+        # Length in words of each field of each document, and its total per field
+        self._lengths: dict[int, tuple[int, ...]] = {}
+        self._total_lengths = [0] * len(self.fields)
+        # Distinct words of each field of each document, to remove it
+        self._terms: dict[int, tuple[tuple[str, ...], ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._lengths
+
+    def ids(self) -> list[int]:
+        """Ids of the documents indexed"""
+
+        return list(self._lengths)
+
+    def add(self, doc_id: int, document: dict[str, typing.Optional[str]]) -> None:
+        """Index a document, replacing the one with the same id"""
+
+        self.remove(doc_id=doc_id)
+
+        lengths = []
+        terms = []
+        for position, field in enumerate(self.fields):
+            words = tokenize(document.get(field))
+            frequencies: dict[str, int] = {}
+            for word in words:
+                frequencies[word] = frequencies.get(word, 0) + 1
+
+            # Interned, the words kept per document share the posting keys
+            field_terms = tuple(sys.intern(word) for word in frequencies)
+            postings = self._postings[field]
+            for word in field_terms:
+                postings.setdefault(word, Postings()).set(
+                    doc_id=doc_id, frequency=frequencies[word]
+                )
+
+            lengths.append(len(words))
+            terms.append(field_terms)
+            self._total_lengths[position] += len(words)
+
+        self._lengths[doc_id] = tuple(lengths)
+        self._terms[doc_id] = tuple(terms)
+
+    def remove(self, doc_id: int) -> None:
+        """Remove a document, if indexed"""
+
+        terms = self._terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        lengths = self._lengths.pop(doc_id)
+        for position, field in enumerate(self.fields):
+            postings = self._postings[field]
+            for word in terms[position]:
+                word_postings = postings[word]
+                word_postings.remove(doc_id=doc_id)
+                if not word_postings:
+                    del postings[word]
+
+            self._total_lengths[position] -= lengths[position]
+
+    def search(
+        self,
+        query: dict[str, str],
+        weights: typing.Optional[dict[str, float]] = None,
+    ) -> list[tuple[int, float]]:
+        """Documents matching a query, best scores first
+
+        Args:
+            query (dict[str, str]): Words searched by field, a document must have
+                at least one word of each field.
+            weights (dict[str, float], optional): Multiplier of the score of each field.
+                Defaults to 1 for every field.
+
+        Returns:
+            list[tuple[int, float]]: Ids and scores, by decreasing score then increasing id.
+        """
+
+        weights = weights or {}
+        documents = len(self._lengths)
+
+        scores: typing.Optional[dict[int, float]] = None
+        for field, text in query.items():
+            words = set(tokenize(text))
+            if not words or not documents:
+                return []
+
+            field_scores = self._field_scores(
+                field=field, words=words, weight=weights.get(field, 1.0)
+            )
+            if scores is None:
+                scores = field_scores
+            else:
+                scores = {
+                    doc_id: score + field_scores[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in field_scores
+                }
+
+            if not scores:
+                return []
+
+        return sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+
+    def _field_scores(self, field: str, words: set[str], weight: float) -> dict[int, float]:
+        """Weighted BM25 score of a field of the documents having any of the words"""
+
+        documents = len(self._lengths)
+        position = self.fields.index(field)
+        average_length = self._total_lengths[position] / documents or 1
+
+        field_scores: dict[int, float] = {}
+        for word in words:
+            postings = self._postings[field].get(word)
+            if not postings:
+                continue
+
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in zip(postings.ids, postings.frequencies):
+                length = self._lengths[doc_id][position]
+                norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                field_scores[doc_id] = field_scores.get(doc_id, 0.0) + (
+                    weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+                )
+
+        return field_scores
+
+    def save(self, path: str) -> None:
+        """Save a snapshot of the index as JSON, atomically
+
+        The snapshot and its directory are only readable and writable by the
+        current user, postings are base64 encoded typed arrays.
+        """
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        snapshot = dict(
+            version=SNAPSHOT_VERSION,
+            fields=self.fields,
+            k1=self.k1,
+            b=self.b,
+            meta=self.meta,
+            lengths=dict(self._lengths),
+            postings={
+                field: {
+                    word: [_encode(postings.ids), _encode(postings.frequencies)]
+                    for word, postings in field_postings.items()
+                }
+                for field, field_postings in self._postings.items()
+            },
+        )
+
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(descriptor, "w", encoding="utf-8") as snapshot_file:
+            json.dump(snapshot, snapshot_file, separators=(",", ":"))
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> typing.Optional["InvertedIndex"]:
+        """Index of a snapshot, None when missing, unreadable or writable by other users"""
+
+        try:
+            status = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        if status.st_uid != os.getuid() or status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            logger.warning(f"Search snapshot {path} ignored, not private to the current user")
+            return None
+
+        try:
+            with open(path, "r", encoding="utf-8") as snapshot_file:
+                snapshot = json.load(snapshot_file)
+
+            if snapshot["version"] != SNAPSHOT_VERSION:
+                logger.warning(f"Search snapshot {path} ignored, version {snapshot['version']}")
+                return None
+
+            index = cls(fields=snapshot["fields"], k1=snapshot["k1"], b=snapshot["b"])
+            index.meta = snapshot["meta"]
+            index._restore(lengths=snapshot["lengths"], postings=snapshot["postings"])
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            logger.warning(f"Search snapshot {path} unreadable: {err}")
+            return None
+
+        return index
+
+    def _restore(self, lengths: dict[str, list[int]], postings: dict[str, dict]) -> None:
+        """Fill the index with the lengths and postings of a snapshot"""
+
+        self._lengths = {
+            int(doc_id): tuple(doc_lengths) for doc_id, doc_lengths in lengths.items()
+        }
+        self._total_lengths = [0] * len(self.fields)
+        for doc_lengths in self._lengths.values():
+            for position, length in enumerate(doc_lengths):
+                self._total_lengths[position] += length
+
+        terms: dict[int, list[list[str]]] = {
+            doc_id: [[] for _ in self.fields] for doc_id in self._lengths
+        }
+        for position, field in enumerate(self.fields):
+            field_postings = self._postings[field]
+            for word, (ids, frequencies) in postings[field].items():
+                word = sys.intern(word)
+                word_postings = field_postings[word] = Postings()
+                word_postings.ids = _decode("I", ids)
+                word_postings.frequencies = _decode("H", frequencies)
+                if len(word_postings.ids) != len(word_postings.frequencies):
+                    raise ValueError(f"Postings of {word} on {field} do not match")
+
+                for doc_id in word_postings.ids:
+                    terms[doc_id][position].append(word)
+
+        self._terms = {
+            doc_id: tuple(tuple(field_terms) for field_terms in doc_terms)
+            for doc_id, doc_terms in terms.items()
+        }
+
+
+def _encode(values: array.array) -> str:
+    """Typed array as base64 text"""
+
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def _decode(typecode: str, text: str) -> array.array:
+    """Typed array of base64 text"""
+
+    values = array.array(typecode)
+    values.frombytes(base64.b64decode(text))
+    return values
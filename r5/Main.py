@@ -8,3 +8,5 @@ cli = Cli.New(name="r5")
 
 cli.add(Tasks.Start)
 cli.add(Tasks.Migration)
+cli.add(Tasks.Import)
+cli.add(Tasks.Fake)
@@ -16,6 +16,12 @@ branch_labels = None
 depends_on = None
 
 
+def is_mysql() -> bool:
+    """FULLTEXT indexes are MySQL only, their names are only unique per table there"""
+
+    return op.get_bind().dialect.name == "mysql"
+
+
 def upgrade():
     # ### commands auto generated by Alembic - please adjust! ###
     op.create_table(
@@ -33,11 +39,12 @@ def upgrade():
         sa.Column("external_id", sa.String(length=30), nullable=True),
         sa.PrimaryKeyConstraint("id"),
     )
-    op.create_index("title", "books", ["title"], mysql_prefix='FULLTEXT')
-    op.create_index("subtitle", "books", ["subtitle"], mysql_prefix='FULLTEXT')
-    op.create_index("published_date", "books", ["published_date"], mysql_prefix='FULLTEXT')
-    op.create_index("publisher", "books", ["publisher"], mysql_prefix='FULLTEXT')
-    op.create_index("description", "books", ["description"], mysql_prefix='FULLTEXT')
+    if is_mysql():
+        op.create_index("title", "books", ["title"], mysql_prefix='FULLTEXT')
+        op.create_index("subtitle", "books", ["subtitle"], mysql_prefix='FULLTEXT')
+        op.create_index("published_date", "books", ["published_date"], mysql_prefix='FULLTEXT')
+        op.create_index("publisher", "books", ["publisher"], mysql_prefix='FULLTEXT')
+        op.create_index("description", "books", ["description"], mysql_prefix='FULLTEXT')
     op.create_table(
         "authors",
         sa.Column("updated_at", sa.DateTime(), nullable=True),
@@ -46,7 +53,8 @@ def upgrade():
         sa.Column("name", sa.String(length=100), nullable=False),
         sa.PrimaryKeyConstraint("id"),
     )
-    op.create_index("name", "authors", ["name"], mysql_prefix='FULLTEXT')
+    if is_mysql():
+        op.create_index("name", "authors", ["name"], mysql_prefix='FULLTEXT')
     op.create_table(
         "categories",
         sa.Column("updated_at", sa.DateTime(), nullable=True),
@@ -55,7 +63,8 @@ def upgrade():
         sa.Column("name", sa.String(length=100), nullable=False),
         sa.PrimaryKeyConstraint("id"),
     )
-    op.create_index("name", "categories", ["name"], mysql_prefix='FULLTEXT')
+    if is_mysql():
+        op.create_index("name", "categories", ["name"], mysql_prefix='FULLTEXT')
     op.create_table(
         "book_authors",
         sa.Column("updated_at", sa.DateTime(), nullable=True),
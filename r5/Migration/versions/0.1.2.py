@@ -0,0 +1,91 @@
+"""lookup_indexes
+
+Revision ID: v0.1.2
+Revises: v0.1.1
+Create Date: 2026-10-18 10:12:41.310254
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "v0.1.2"
+down_revision = "v0.1.1"
+branch_labels = None
+depends_on = None
+
+
+def insert_ignore() -> str:
+    """INSERT ignoring duplicated keys on the current dialect"""
+
+    if op.get_bind().dialect.name == "sqlite":
+        return "INSERT OR IGNORE"
+
+    return "INSERT IGNORE"
+
+
+def dedupe(table: str, key: str, links: list[tuple[str, str, str]], where: str = "") -> None:
+    """Merge the rows of table sharing key into the one with the lowest id
+
+    Links (table, column pointing to table, other column) to a duplicate are
+    moved to the row kept, then duplicates are removed.
+    """
+
+    kept = f"SELECT {key}, MIN(id) AS id FROM {table} {where} GROUP BY {key}"
+    same_key = " AND ".join(f"kept.{column} = row_.{column}" for column in key.split(", "))
+    duplicates = (
+        f"SELECT id FROM {table} {where or 'WHERE 1 = 1'} "
+        f"AND id NOT IN (SELECT id FROM ({kept}) kept)"
+    )
+
+    for link_table, link_column, other_column in links:
+        op.execute(
+            f"{insert_ignore()} INTO {link_table} "
+            f"(updated_at, created_at, {other_column}, {link_column}) "
+            f"SELECT link.updated_at, link.created_at, link.{other_column}, kept.id "
+            f"FROM {link_table} link "
+            f"JOIN {table} row_ ON row_.id = link.{link_column} "
+            f"JOIN ({kept}) kept ON {same_key} "
+            "WHERE kept.id <> row_.id"
+        )
+        op.execute(
+            f"DELETE FROM {link_table} WHERE {link_column} IN "
+            f"(SELECT id FROM ({duplicates}) duplicated)"
+        )
+
+    op.execute(f"DELETE FROM {table} WHERE id IN (SELECT id FROM ({duplicates}) duplicated)")
+
+
+def upgrade():
+    # Unique keys below require merging the duplicates saved so far
+    dedupe(table="authors", key="name", links=[("book_authors", "author_id", "book_id")])
+    dedupe(
+        table="categories",
+        key="name",
+        links=[("book_categories", "category_id", "book_id")],
+    )
+    dedupe(
+        table="books",
+        key="original_source, external_id",
+        links=[
+            ("book_authors", "book_id", "author_id"),
+            ("book_categories", "book_id", "category_id"),
+        ],
+        where="WHERE external_id IS NOT NULL",
+    )
+
+    op.create_index("ix_book_authors_author_id", "book_authors", ["author_id"])
+    op.create_index("ix_book_categories_category_id", "book_categories", ["category_id"])
+    op.create_index("ux_authors_name", "authors", ["name"], unique=True)
+    op.create_index("ux_categories_name", "categories", ["name"], unique=True)
+    op.create_index(
+        "ux_books_source_external_id", "books", ["original_source", "external_id"], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index("ux_books_source_external_id", table_name="books")
+    op.drop_index("ux_categories_name", table_name="categories")
+    op.drop_index("ux_authors_name", table_name="authors")
+    op.drop_index("ix_book_categories_category_id", table_name="book_categories")
+    op.drop_index("ix_book_authors_author_id", table_name="book_authors")
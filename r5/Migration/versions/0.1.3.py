@@ -0,0 +1,70 @@
+"""sqlite_full_text
+
+Revision ID: v0.1.3
+Revises: v0.1.2
+Create Date: 2026-10-18 11:02:17.480391
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "v0.1.3"
+down_revision = "v0.1.2"
+branch_labels = None
+depends_on = None
+
+# Text columns searched per table, MySQL has a FULLTEXT index on each of them
+FULL_TEXT_COLUMNS = {
+    "books": ["title", "subtitle", "published_date", "publisher", "description"],
+    "authors": ["name"],
+    "categories": ["name"],
+}
+
+
+def is_sqlite() -> bool:
+    """SQLite has no FULLTEXT indexes, FTS5 tables stand in for them"""
+
+    return op.get_bind().dialect.name == "sqlite"
+
+
+def upgrade():
+    if not is_sqlite():
+        return
+
+    for table, columns in FULL_TEXT_COLUMNS.items():
+        fts = f"{table}_fts"
+        names = ", ".join(columns)
+        new_values = ", ".join(f"new.{column}" for column in columns)
+        old_values = ", ".join(f"old.{column}" for column in columns)
+
+        # External content table: only the index is stored, rows are read from table
+        op.execute(
+            f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', "
+            "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+
+        insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});"
+        delete = (
+            f"INSERT INTO {fts}({fts}, rowid, {names}) "
+            f"VALUES ('delete', old.id, {old_values});"
+        )
+        op.execute(f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END")
+        op.execute(f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END")
+        op.execute(
+            f"CREATE TRIGGER {fts}_update AFTER UPDATE ON {table} BEGIN {delete} {insert} END"
+        )
+
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade():
+    if not is_sqlite():
+        return
+
+    for table in FULL_TEXT_COLUMNS:
+        fts = f"{table}_fts"
+        op.execute(f"DROP TRIGGER {fts}_update")
+        op.execute(f"DROP TRIGGER {fts}_delete")
+        op.execute(f"DROP TRIGGER {fts}_insert")
+        op.execute(f"DROP TABLE {fts}")
@@ -0,0 +1,27 @@
+"""orphan_links
+
+Revision ID: v0.1.4
+Revises: v0.1.3
+Create Date: 2026-10-18 20:41:05.118302
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "v0.1.4"
+down_revision = "v0.1.3"
+branch_labels = None
+depends_on = None
+
+# Link tables of the books, SQLite left the links of deleted books behind
+LINK_TABLES = ["book_authors", "book_categories"]
+
+
+def upgrade():
+    for table in LINK_TABLES:
+        op.execute(f"DELETE FROM {table} WHERE book_id NOT IN (SELECT id FROM books)")
+
+
+def downgrade():
+    pass
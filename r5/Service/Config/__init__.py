@@ -26,6 +26,58 @@ class Service:
     # API KEYS
     GOOGLE_API_KEY = Environment.var_get("GOOGLE_API_KEY", "")
 
+    # HTTP clients of the external sources, timeouts and backoffs in seconds
+    HTTP_POOL_SIZE = int(Environment.var_get("R5_HTTP_POOL_SIZE", 20))
+    HTTP_CONNECT_TIMEOUT = float(Environment.var_get("R5_HTTP_CONNECT_TIMEOUT", 5))
+    HTTP_READ_TIMEOUT = float(Environment.var_get("R5_HTTP_READ_TIMEOUT", 30))
+    HTTP_RETRIES = int(Environment.var_get("R5_HTTP_RETRIES", 2))
+    HTTP_BACKOFF_FACTOR = float(Environment.var_get("R5_HTTP_BACKOFF_FACTOR", 0.5))
+    HTTP_BACKOFF_MAX = float(Environment.var_get("R5_HTTP_BACKOFF_MAX", 10))
+
+    # External search deadline (seconds) shared by all sources
+    EXTERNAL_SEARCH_DEADLINE = float(Environment.var_get("R5_EXTERNAL_SEARCH_DEADLINE", 10))
+
+    # External search results cache, TTL and stale window in seconds
+    SEARCH_CACHE_SIZE = int(Environment.var_get("R5_SEARCH_CACHE_SIZE", 1000))
+    SEARCH_CACHE_TTL = float(Environment.var_get("R5_SEARCH_CACHE_TTL", 300))
+    SEARCH_CACHE_STALE = float(Environment.var_get("R5_SEARCH_CACHE_STALE", 600))
+
+    # Batch lookups: references per request, deadline (seconds) and upstream requests at once
+    LOOKUP_MAX_ITEMS = int(Environment.var_get("R5_LOOKUP_MAX_ITEMS", 100))
+    LOOKUP_DEADLINE = float(Environment.var_get("R5_LOOKUP_DEADLINE", 15))
+    LOOKUP_CONCURRENCY = int(Environment.var_get("R5_LOOKUP_CONCURRENCY", 10))
+
+    # Listing counts cache, TTL in seconds bounds writes made outside of the models
+    COUNT_CACHE_SIZE = int(Environment.var_get("R5_COUNT_CACHE_SIZE", 10000))
+    COUNT_CACHE_TTL = float(Environment.var_get("R5_COUNT_CACHE_TTL", 600))
+
+    # Values returned per facet of the listings
+    FACETS_SIZE = int(Environment.var_get("R5_FACETS_SIZE", 10))
+
+    # Approximate counts (MySQL optimizer estimate) are used from this many rows on
+    APPROXIMATE_COUNT_MIN = int(Environment.var_get("R5_APPROXIMATE_COUNT_MIN", 10000))
+
+    # Listing searches: database (full text queries) or memory (in-process index)
+    SEARCH_BACKEND = Environment.var_get("R5_SEARCH_BACKEND", "database")
+    SEARCH_SNAPSHOT_PATH = Environment.var_get(
+        "R5_SEARCH_SNAPSHOT_PATH", os.path.join(os.path.expanduser("~"), ".r5", "search-index.json")
+    )
+
+    # Weights of the filters in the relevance of the listings, other filters weigh 1
+    SEARCH_WEIGHTS = dict(
+        title=float(Environment.var_get("R5_SEARCH_WEIGHT_TITLE", 3)),
+        author=float(Environment.var_get("R5_SEARCH_WEIGHT_AUTHOR", 2)),
+        category=float(Environment.var_get("R5_SEARCH_WEIGHT_CATEGORY", 1)),
+    )
+
+    # Type-ahead suggestions, keys kept in memory per worker (one per word of a text)
+    SUGGEST_MAX_KEYS = int(Environment.var_get("R5_SUGGEST_MAX_KEYS", 500000))
+    SUGGEST_MAX_ITEMS = int(Environment.var_get("R5_SUGGEST_MAX_ITEMS", 20))
+
+    # Typo tolerant search of titles and authors, before the external sources
+    FUZZY_THRESHOLD = float(Environment.var_get("R5_FUZZY_THRESHOLD", 0.5))
+    FUZZY_MAX_RESULTS = int(Environment.var_get("R5_FUZZY_MAX_RESULTS", 100))
+
     # Database Variables
     R5_DRIVER = Environment.var_get("R5_DRIVER", "mysql+pymysql")
     R5_DATABASE_HOSTNAME = Environment.var_get("R5_DATABASE_HOSTNAME", False)
@@ -1,3 +1,6 @@
+import typing
+
+import pydantic
 from flask import request
 
 from r5.Framework import Log
@@ -40,3 +43,14 @@ def get_filters(query_args: dict, arg_names: tuple):
         if query_value is not None:
             filtered_dict[arg_name] = query_value
     return filtered_dict
+
+
+def get_payload(payload_class: typing.Type[pydantic.BaseModel]) -> tuple:
+    """Get the payload of the request json, or the response of an invalid one"""
+    try:
+        return payload_class(**request.json), None
+    except ValueError as err:
+        return None, Response.with_conflict(str(err))
+    except Exception as err:
+        logger.error(f"Error - Input: {str(request.json)} - output: {str(err)}")
+        return None, Response.with_err(str(err))
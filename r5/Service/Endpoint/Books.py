@@ -1,13 +1,25 @@
 from flask import request
 from flask.views import MethodView
-from r5.Framework.Apis.Errors import ClientError
+from r5.Framework.Apis.Errors import ClientError, UpstreamError
 from r5.Framework import Log
 from r5.Service import Response
 
-from r5.Service.Schemas.Books import BookPayload, BookSource
-from r5.Service.Services.Books import Books as BookService, ResourceNotFoundError
-
-from r5.Service.Endpoint.Base import get_filters, app_resources_auth
+from r5.Service.Schemas.Base import InvalidCursorError
+from r5.Service.Schemas.Books import (
+    BookListPayload,
+    BookLookupPayload,
+    BookPayload,
+    BookSource,
+    BookSuggestPayload,
+    InvalidFacetError,
+)
+from r5.Service.Services.Books import (
+    Books as BookService,
+    ResourceConflictError,
+    ResourceNotFoundError,
+)
+
+from r5.Service.Endpoint.Base import get_filters, get_payload, app_resources_auth
 
 logger = Log.get_logger(__name__)
 
@@ -32,15 +44,23 @@ class Create(MethodView):
             ),
         )
 
-        page = request.args.get("page", type=int)
-        max_per_page = request.args.get("max_per_page", type=int)
+        book_list_payload = BookListPayload(
+            page=request.args.get("page", type=int),
+            max_per_page=request.args.get("max_per_page", type=int),
+            cursor=request.args.get("cursor"),
+            with_total=request.args.get("total", "").lower() in ("1", "true"),
+            approximate=request.args.get("count", "").lower() == "approximate",
+            facets=[
+                facet.strip()
+                for facet in request.args.get("facets", "").split(",")
+                if facet.strip()
+            ],
+        )
 
         book_service = BookService()
         try:
-            books = book_service.list_(
-                filters=filters, page=page, max_per_page=max_per_page
-            )
-        except ClientError as err:
+            books = book_service.list_(filters=filters, book_list_payload=book_list_payload)
+        except (ClientError, InvalidCursorError, InvalidFacetError) as err:
             return Response.with_bad_request(str(err))
 
         return Response.with_ok(dict(data=books))
@@ -49,26 +69,68 @@ class Create(MethodView):
     def post(self):
         """Create a new Book"""
 
+        book_payload, response = get_payload(BookPayload)
+        if response:
+            return response
+
+        book_service = BookService()
         try:
-            book_payload = BookPayload(
-                **request.json,
-            )
-        except ValueError as err:
+            book_info_dict, created = book_service.save(book_payload=book_payload)
+        except ResourceNotFoundError as err:
+            return Response.with_bad_request(str(err))
+        except ResourceConflictError as err:
             return Response.with_conflict(str(err))
+        except UpstreamError as err:
+            return Response.with_service_unavailable(str(err))
         except Exception as err:
             logger.error(f"Error - Input: {str(request.json)} - output: {str(err)}")
             return Response.with_err(str(err))
 
+        # Books already saved are answered as stored
+        with_saved = Response.with_created if created else Response.with_ok
+        return with_saved(book_info_dict)
+
+
+class Lookup(MethodView):
+    """Many external books at once"""
+
+    @app_resources_auth
+    def post(self):
+        """Lookup Books by source and external id"""
+
+        book_lookup_payload, response = get_payload(BookLookupPayload)
+        if response:
+            return response
+
         book_service = BookService()
         try:
-            book_info_dict = book_service.save(book_payload=book_payload)
-        except ResourceNotFoundError as err:
-            return Response.with_bad_request(str(err))
+            books = book_service.lookup(book_lookup_payload=book_lookup_payload)
         except Exception as err:
             logger.error(f"Error - Input: {str(request.json)} - output: {str(err)}")
             return Response.with_err(str(err))
 
-        return Response.with_created(book_info_dict)
+        return Response.with_ok(dict(data=books))
+
+
+class Suggest(MethodView):
+    """Type-ahead suggestions"""
+
+    @app_resources_auth
+    def get(self):
+        """Suggest titles, authors and categories by prefix"""
+
+        try:
+            book_suggest_payload = BookSuggestPayload(
+                prefix=request.args.get("prefix", ""),
+                limit=request.args.get("limit", 10),
+            )
+        except ValueError as err:
+            return Response.with_conflict(str(err))
+
+        book_service = BookService()
+        suggestions = book_service.suggest(book_suggest_payload=book_suggest_payload)
+
+        return Response.with_ok(dict(data=suggestions))
 
 
 class Details(MethodView):
@@ -89,7 +151,10 @@ class Details(MethodView):
             return Response.with_err(str(err))
 
         book_service = BookService()
-        book = book_service.get(book_id=book_id, source=books_source)
+        try:
+            book = book_service.get(book_id=book_id, source=books_source)
+        except UpstreamError as err:
+            return Response.with_service_unavailable(str(err))
 
         if not book:
             return Response.with_not_found(
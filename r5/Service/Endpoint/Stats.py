@@ -0,0 +1,21 @@
+from flask.views import MethodView
+from r5.Framework import Log
+from r5.Service import Response
+
+from r5.Service.Services.Stats import Stats as StatsService
+
+from r5.Service.Endpoint.Base import app_resources_auth
+
+logger = Log.get_logger(__name__)
+
+
+class Details(MethodView):
+    """Service counters"""
+
+    @app_resources_auth
+    def get(self):
+        """Get counters of the worker serving the request"""
+
+        stats_service = StatsService()
+
+        return Response.with_ok(dict(data=stats_service.get()))
@@ -0,0 +1,525 @@
+import heapq
+import threading
+import typing
+
+from sqlalchemy import func
+
+from r5.Framework import Log, Search, Types
+from r5.Framework.Search import Prefix, Trigram
+from r5.Service.App import db
+from r5.Service.Config import Service
+from r5.Service.Schemas.Authors import AuthorModel
+from r5.Service.Schemas.Base import table_versions
+from r5.Service.Schemas.BooksAuthors import BookAuthorModel
+from r5.Service.Schemas.BooksCategories import BookCategoryModel
+from r5.Service.Schemas.Categories import CategoryModel
+from r5.Service.Schemas.Fields import (
+    AUTHOR,
+    CATEGORY,
+    COUNT_TABLES,
+    IN_BATCH_SIZE,
+    TEXT_COLUMNS,
+    TITLE,
+)
+
+logger = Log.get_logger(__name__)
+
+
+class BookSearchIndex:
+    """Books searched in memory (R5_SEARCH_BACKEND=memory), ranked with BM25
+
+    The index covers the text columns of the books and the names of their
+    authors and categories. It is loaded from its snapshot, or rebuilt from
+    the database, on the first search of the worker, then kept up to date:
+    - with the books saved and deleted through the models of the worker,
+    - with the books written by other processes, on the searches following a
+      write to the book tables: books after the last one indexed are added and,
+      when the number of books differs, the missing and deleted ones are found.
+    """
+
+    FIELDS = TEXT_COLUMNS + (AUTHOR, CATEGORY)
+
+    # Books read per query when indexing
+    BATCH_SIZE = 1000
+
+    # Books indexed since the last snapshot that trigger a new one
+    SNAPSHOT_EVERY = 10000
+
+    def __init__(self, book_model: type, path: str):
+        """
+        Initializes an instance of the BookSearchIndex class.
+
+        Args:
+            book_model (type): Model of the books indexed.
+            path (str): Snapshot file of the index.
+        """
+        self.book_model = book_model
+        self.path = path
+        self.index: typing.Optional[Search.InvertedIndex] = None
+        self.versions: typing.Optional[tuple] = None
+        self.unsaved = 0
+
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled(filters: Types.OptionalDict) -> bool:
+        """Whether the filters are searched in memory"""
+
+        return Service.SEARCH_BACKEND == "memory" and bool(filters)
+
+    def search(self, filters: dict) -> list[tuple[int, float]]:
+        """Ids and scores of the books matching every filter, best first"""
+
+        self.sync()
+        return self.index.search(query=filters, weights=Service.SEARCH_WEIGHTS)
+
+    def sync(self) -> None:
+        """Load the index, then index the books written by other processes"""
+
+        with self._lock:
+            versions = table_versions.get(keys=COUNT_TABLES)
+            if self.index is None:
+                self._load()
+            elif versions is not None and versions == self.versions:
+                return
+
+            self._index_after(book_id=self.index.meta["last_id"])
+
+            total = db.session.query(func.count(self.book_model.id)).scalar()
+            if total != len(self.index):
+                book_ids = {row.id for row in db.session.query(self.book_model.id)}
+                indexed = set(self.index.ids())
+                for book_id in indexed - book_ids:
+                    self.index.remove(doc_id=book_id)
+                self._index(book_ids=sorted(book_ids - indexed))
+
+            self.versions = versions
+            if self.unsaved >= self.SNAPSHOT_EVERY:
+                self._save()
+
+    def save(self) -> None:
+        """Save a snapshot of the index"""
+
+        with self._lock:
+            if self.index is not None:
+                self._save()
+
+    def update(self, book_ids: list[int]) -> None:
+        """Index books saved, once the index is loaded"""
+
+        with self._lock:
+            if self.index is not None:
+                self._index(book_ids=book_ids)
+
+    def remove(self, book_id: int) -> None:
+        """Remove a book deleted, once the index is loaded"""
+
+        with self._lock:
+            if self.index is not None:
+                self.index.remove(doc_id=book_id)
+                self.unsaved += 1
+
+    def reset(self) -> None:
+        """Drop the index, it is loaded again on the next search"""
+
+        with self._lock:
+            self.index = None
+
+    def _load(self) -> None:
+        """Index of the snapshot, or a new one rebuilt from the database"""
+
+        source = db.engine.url.render_as_string(hide_password=True)
+        self.index = Search.InvertedIndex.load(path=self.path)
+        if (
+            self.index is not None
+            and self.index.fields == self.FIELDS
+            and self.index.meta.get("source") == source
+        ):
+            logger.info(f"Search index loaded from {self.path}: {len(self.index)} books")
+            return
+
+        logger.info("Search index rebuilt from the database")
+        self.index = Search.InvertedIndex(fields=self.FIELDS)
+        self.index.meta = dict(source=source, last_id=0)
+        self._index_after(book_id=0)
+        self._save()
+
+    def _save(self) -> None:
+        """Save a snapshot, errors are logged"""
+
+        try:
+            self.index.save(path=self.path)
+            self.unsaved = 0
+        except OSError as err:
+            logger.warning(f"Search index snapshot failed: {err}")
+
+    def _index_after(self, book_id: int) -> None:
+        """Index the books after an id, in batches"""
+
+        while True:
+            rows = (
+                self._query()
+                .filter(self.book_model.id > book_id)
+                .order_by(self.book_model.id)
+                .limit(self.BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                return
+
+            self._add(rows=rows)
+            book_id = rows[-1].id
+
+    def _index(self, book_ids: list[int]) -> None:
+        """Index books by id, in batches"""
+
+        for index in range(0, len(book_ids), self.BATCH_SIZE):
+            rows = (
+                self._query()
+                .filter(self.book_model.id.in_(book_ids[index : index + self.BATCH_SIZE]))
+                .all()
+            )
+            self._add(rows=rows)
+
+    def _query(self):
+        """Query of the ids and text columns of the books"""
+
+        return db.session.query(
+            self.book_model.id, *[getattr(self.book_model, column) for column in TEXT_COLUMNS]
+        )
+
+    def _add(self, rows: list) -> None:
+        """Index rows of books with the names of their authors and categories"""
+
+        book_ids = [row.id for row in rows]
+        authors = self.book_model.get_authors(book_ids=book_ids)
+        categories = self.book_model.get_categories(book_ids=book_ids)
+
+        for row in rows:
+            document = {column: getattr(row, column) for column in TEXT_COLUMNS}
+            document[AUTHOR] = " ".join(authors[row.id])
+            document[CATEGORY] = " ".join(categories[row.id])
+            self.index.add(doc_id=row.id, document=document)
+
+        if book_ids:
+            self.index.meta["last_id"] = max(self.index.meta["last_id"], *book_ids)
+        self.unsaved += len(rows)
+
+
+class BookSuggestIndex:
+    """Type-ahead suggestions of titles, author names and category names
+
+    Texts are counted by the books having them and held in a prefix index
+    (Framework.Search.Prefix) bounded by Service.SUGGEST_MAX_KEYS, the most
+    counted are kept. The index is built from the database on the first
+    suggestion of the worker, then kept up to date with the books saved and
+    deleted by the worker, and with the books added by other processes on the
+    suggestions following a write to the book tables. It is rebuilt when the
+    number of books differs, e.g. after deletes by other processes.
+    """
+
+    def __init__(self, book_model: type, max_keys: int):
+        """
+        Initializes an instance of the BookSuggestIndex class.
+
+        Args:
+            book_model (type): Model of the books suggested.
+            max_keys (int): Maximum number of keys of the prefix index.
+        """
+        self.book_model = book_model
+        self.max_keys = max_keys
+        self.index: typing.Optional[Prefix.PrefixIndex] = None
+        self.versions: typing.Optional[tuple] = None
+        self.books = 0
+        self.last_id = 0
+
+        self._lock = threading.Lock()
+
+    def suggest(self, prefix: str, limit: int) -> list[tuple[str, str, int]]:
+        """Texts, kinds and number of books of the suggestions of a prefix"""
+
+        self.sync()
+        return self.index.search(prefix=prefix, limit=limit)
+
+    def sync(self) -> None:
+        """Build the index, then add the books written by other processes"""
+
+        with self._lock:
+            versions = table_versions.get(keys=COUNT_TABLES)
+            if self.index is not None and versions is not None and versions == self.versions:
+                return
+
+            if self.index is not None:
+                self._add_after(book_id=self.last_id)
+
+            total = db.session.query(func.count(self.book_model.id)).scalar()
+            if self.index is None or total != self.books:
+                self._build(total=total)
+
+            self.versions = versions
+
+    def update(self, book_ids: list[int]) -> None:
+        """Add books saved, once the index is built"""
+
+        with self._lock:
+            if self.index is not None:
+                self._add(book_ids=book_ids)
+
+    def remove(self, title: str, authors: list[str], categories: list[str]) -> None:
+        """Uncount the title and names of a book deleted, once the index is built"""
+
+        with self._lock:
+            if self.index is not None:
+                self.index.remove(text=title, kind=TITLE)
+                for name in authors:
+                    self.index.remove(text=name, kind=AUTHOR)
+                for name in categories:
+                    self.index.remove(text=name, kind=CATEGORY)
+                self.books -= 1
+
+    def reset(self) -> None:
+        """Drop the index, it is built again on the next suggestion"""
+
+        with self._lock:
+            self.index = None
+
+    def _build(self, total: int) -> None:
+        """New index of the texts of the database, most counted first"""
+
+        last_id = db.session.query(func.max(self.book_model.id)).scalar() or 0
+
+        title_books = func.count(self.book_model.id)
+        author_books = func.count(BookAuthorModel.book_id)
+        category_books = func.count(BookCategoryModel.book_id)
+
+        # A text has one key at least, no more texts than keys are read
+        queries = {
+            TITLE: db.session.query(self.book_model.title, title_books)
+            .group_by(self.book_model.title)
+            .order_by(title_books.desc()),
+            AUTHOR: db.session.query(AuthorModel.name, author_books)
+            .join(BookAuthorModel, BookAuthorModel.author_id == AuthorModel.id)
+            .group_by(AuthorModel.id, AuthorModel.name)
+            .order_by(author_books.desc()),
+            CATEGORY: db.session.query(CategoryModel.name, category_books)
+            .join(BookCategoryModel, BookCategoryModel.category_id == CategoryModel.id)
+            .group_by(CategoryModel.id, CategoryModel.name)
+            .order_by(category_books.desc()),
+        }
+
+        def counted(kind: str, query) -> typing.Iterator[tuple[str, str, int]]:
+            for text, count in query.limit(self.max_keys):
+                yield text, kind, count
+
+        self.index = Prefix.PrefixIndex(max_keys=self.max_keys)
+        self.index.add_many(
+            entries=heapq.merge(
+                *[counted(kind=kind, query=query) for kind, query in queries.items()],
+                key=lambda entry: -entry[2],
+            )
+        )
+        self.books = total
+        self.last_id = last_id
+        logger.info(f"Suggestions built: {len(self.index)} texts of {total} books")
+
+    def _add_after(self, book_id: int) -> None:
+        """Add the books after an id"""
+
+        book_ids = [
+            row.id
+            for row in db.session.query(self.book_model.id).filter(self.book_model.id > book_id)
+        ]
+        self._add(book_ids=book_ids)
+
+    def _add(self, book_ids: list[int]) -> None:
+        """Add the title and names of books"""
+
+        if not book_ids:
+            return
+
+        authors = self.book_model.get_authors(book_ids=book_ids)
+        categories = self.book_model.get_categories(book_ids=book_ids)
+        for book_model in self.book_model.get_by_ids(_ids=book_ids):
+            self.index.add(text=book_model.title, kind=TITLE)
+            for name in authors[book_model.id]:
+                self.index.add(text=name, kind=AUTHOR)
+            for name in categories[book_model.id]:
+                self.index.add(text=name, kind=CATEGORY)
+
+        self.books += len(book_ids)
+        self.last_id = max(self.last_id, *book_ids)
+
+
+class BookFuzzyIndex:  # pylint: disable=too-many-instance-attributes
+    """Typo tolerant search of titles and author names, by trigram similarity
+
+    Titles are indexed by book id and author names by author id
+    (Framework.Search.Trigram). The indexes are built from the database on the
+    first search of the worker, then kept up to date with the books saved and
+    deleted by the worker, and with the books and authors added by other
+    processes on the searches following a write to the book tables. They are
+    rebuilt when the number of books differs, e.g. after deletes by other
+    processes.
+    """
+
+    # Rows read per query when indexing
+    BATCH_SIZE = 5000
+
+    def __init__(self, book_model: type):
+        """
+        Initializes an instance of the BookFuzzyIndex class.
+
+        Args:
+            book_model (type): Model of the books searched.
+        """
+        self.book_model = book_model
+        self.titles: typing.Optional[Trigram.TrigramIndex] = None
+        self.authors: typing.Optional[Trigram.TrigramIndex] = None
+        self.versions: typing.Optional[tuple] = None
+        self.books = 0
+        self.last_id = 0
+        self.last_author_id = 0
+
+        self._lock = threading.Lock()
+
+    def search(self, filters: dict) -> list[tuple[int, float]]:
+        """Ids and similarity of the books similar to the title and author filters
+
+        Books must be similar to every filter, their similarity is the sum of
+        the one of their title and of their most similar author.
+        """
+
+        self.sync()
+
+        scores = None
+        if TITLE in filters:
+            scores = dict(
+                self.titles.search(text=filters[TITLE], threshold=Service.FUZZY_THRESHOLD)
+            )
+
+        if AUTHOR in filters:
+            author_scores = dict(
+                self.authors.search(text=filters[AUTHOR], threshold=Service.FUZZY_THRESHOLD)
+            )
+            book_scores = {}
+            for book_id, author_id in self._author_books(author_ids=list(author_scores)):
+                book_scores[book_id] = max(
+                    book_scores.get(book_id, 0.0), author_scores[author_id]
+                )
+
+            if scores is None:
+                scores = book_scores
+            else:
+                scores = {
+                    book_id: score + book_scores[book_id]
+                    for book_id, score in scores.items()
+                    if book_id in book_scores
+                }
+
+        return sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+
+    def sync(self) -> None:
+        """Build the indexes, then add the books and authors of other processes"""
+
+        with self._lock:
+            versions = table_versions.get(keys=COUNT_TABLES)
+            if self.titles is not None and versions is not None and versions == self.versions:
+                return
+
+            if self.titles is not None:
+                self._add_after()
+
+            total = db.session.query(func.count(self.book_model.id)).scalar()
+            if self.titles is None or total != self.books:
+                self.titles = Trigram.TrigramIndex()
+                self.authors = Trigram.TrigramIndex()
+                self.books = self.last_id = self.last_author_id = 0
+                self._add_after()
+                logger.info(
+                    f"Fuzzy search built: {len(self.titles)} titles, {len(self.authors)} authors"
+                )
+
+            self.versions = versions
+
+    def update(self, book_ids: list[int]) -> None:
+        """Add books saved and their new authors, once the indexes are built"""
+
+        with self._lock:
+            if self.titles is None:
+                return
+
+            for row in db.session.query(self.book_model.id, self.book_model.title).filter(
+                self.book_model.id.in_(book_ids), self.book_model.id > self.last_id
+            ):
+                self.titles.add(text_id=row.id, text=row.title)
+                self.books += 1
+                self.last_id = max(self.last_id, row.id)
+
+            self._add_authors_after()
+
+    def remove(self, book_id: int, title: str) -> None:
+        """Remove the title of a book deleted, once the indexes are built"""
+
+        with self._lock:
+            if self.titles is not None:
+                self.titles.remove(text_id=book_id, text=title)
+                self.books -= 1
+
+    def reset(self) -> None:
+        """Drop the indexes, they are built again on the next search"""
+
+        with self._lock:
+            self.titles = self.authors = None
+
+    def _add_after(self) -> None:
+        """Add the books and authors after the last ones indexed, in batches"""
+
+        while True:
+            rows = (
+                db.session.query(self.book_model.id, self.book_model.title)
+                .filter(self.book_model.id > self.last_id)
+                .order_by(self.book_model.id)
+                .limit(self.BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+
+            for row in rows:
+                self.titles.add(text_id=row.id, text=row.title)
+            self.books += len(rows)
+            self.last_id = rows[-1].id
+
+        self._add_authors_after()
+
+    def _add_authors_after(self) -> None:
+        """Add the authors after the last one indexed, in batches"""
+
+        while True:
+            rows = (
+                db.session.query(AuthorModel.id, AuthorModel.name)
+                .filter(AuthorModel.id > self.last_author_id)
+                .order_by(AuthorModel.id)
+                .limit(self.BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                return
+
+            for row in rows:
+                self.authors.add(text_id=row.id, text=row.name)
+            self.last_author_id = rows[-1].id
+
+    @staticmethod
+    def _author_books(author_ids: list[int]) -> list[tuple[int, int]]:
+        """Book and author ids of the books of many authors, in batched IN queries"""
+
+        links = []
+        for index in range(0, len(author_ids), IN_BATCH_SIZE):
+            links.extend(
+                db.session.query(BookAuthorModel.book_id, BookAuthorModel.author_id).filter(
+                    BookAuthorModel.author_id.in_(author_ids[index : index + IN_BATCH_SIZE])
+                )
+            )
+
+        return links
@@ -31,6 +31,11 @@ def with_not_found(data):
     return data, HTTPStatus.NOT_FOUND
 
 
+def with_service_unavailable(data):
+    """Return a 503 Response with some data"""
+    return data, HTTPStatus.SERVICE_UNAVAILABLE
+
+
 def with_unauthorized(data):
     """Return a 401 Response with some data"""
     return data, HTTPStatus.UNAUTHORIZED
@@ -1,13 +1,37 @@
+import base64
+import binascii
+import json
+import re
+import typing
+
 import pydantic
 from datetime import datetime
-from sqlalchemy import Column, DateTime
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    case,
+    false,
+    func,
+    literal_column,
+    select,
+    table,
+    type_coerce,
+)
 
 from r5.Framework import Log
 from r5.Framework import Helpers
+from r5.Framework.Cache import Sqlite
 from r5.Service.App import db
 
 logger = Log.get_logger(__name__)
 
+# Version of every table, bumped on each write, shared by the worker processes
+table_versions = Sqlite.SqliteCounters(table="table_versions")
+
+# Words of a full text search, as tokenized by FTS5 unicode61
+FTS_WORD = re.compile(r"\w+")
+
 
 class ErrOnSave(Exception):
     """Error on Save"""
@@ -17,6 +41,168 @@ class ErrOnDelete(Exception):
     """Error on Delete"""
 
 
+class InvalidCursorError(ValueError):
+    """Invalid pagination cursor"""
+
+
+class CursorResults(pydantic.BaseModel):
+    """Cursor Paginated Results"""
+
+    items: list = pydantic.Field(alias="items")
+    max_per_page: int = pydantic.Field(alias="per_page")
+    next_cursor: typing.Optional[str] = pydantic.Field(alias="next_cursor")
+    total_items: typing.Optional[int] = pydantic.Field(alias="total")
+    approximate_total: bool = pydantic.Field(alias="approximate_total", default=False)
+
+
+def encode_cursor(values: dict) -> str:
+    """Opaque cursor from the sort values of the last item of a page"""
+
+    data = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Sort values of an opaque cursor"""
+
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as err:
+        raise InvalidCursorError(f"Invalid cursor {cursor}") from err
+
+    if not isinstance(values, dict) or not isinstance(values.get("id"), int):
+        raise InvalidCursorError(f"Invalid cursor {cursor}")
+
+    return values
+
+
+def insert_ignore(model, rows: list[dict]) -> int:
+    """Insert many rows in one statement, skipping the ones violating a unique key
+
+    Returns:
+        int: Rows inserted.
+    """
+
+    if not rows:
+        return 0
+
+    statement = (
+        model.__table__.insert()
+        .values(rows)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+    return db.session.execute(statement).rowcount
+
+
+def get_or_create_ids(model, names: list[str]) -> dict[str, int]:
+    """Ids of many names of a named model, missing names are created
+
+    Runs in the current transaction, one IN query to find the existing names
+    and a multi-row insert for the missing ones.
+    """
+
+    names = list(dict.fromkeys(names))
+    if not names:
+        return {}
+
+    def find(names_: list[str]) -> dict[str, int]:
+        rows = db.session.query(model.id, model.name).filter(model.name.in_(names_))
+        ids = {}
+        for row in rows.order_by(model.id):
+            ids.setdefault(row.name, row.id)
+        return ids
+
+    ids = find(names)
+    missing = [name for name in names if name not in ids]
+    if missing:
+        insert_ignore(model, [dict(name=name) for name in missing])
+        ids.update(find(missing))
+
+    # Names equal to a saved one only under the collation (case, accents)
+    for name in [name for name in names if name not in ids]:
+        row = db.session.query(model.id).filter(model.name == name).first()
+        if row:
+            ids[name] = row.id
+
+    return ids
+
+
+def match(column, value: str):
+    """Full text condition on a column, for the current dialect
+
+    MySQL matches on the FULLTEXT index of the column. SQLite has no FULLTEXT
+    indexes, rows are matched on the FTS5 table of the column's table
+    (<table>_fts, rowid being the row id) with the same semantics: rows having
+    any of the words of value.
+    """
+
+    if db.engine.dialect.name != "sqlite":
+        return column.match(value)
+
+    words = FTS_WORD.findall(value)
+    if not words:
+        return false()
+
+    fts_table, fts_match = _fts_match(column=column, words=words)
+    return column.table.c.id.in_(select(fts_table.c.rowid).where(fts_match))
+
+
+def match_score(column, value: str):
+    """Full text relevance of a column, for the current dialect, higher is better
+
+    MySQL returns the MATCH ... AGAINST relevance, SQLite the BM25 rank of the
+    FTS5 table of the column (negated, FTS5 ranks best first). Rows not
+    matching score 0.
+    """
+
+    if db.engine.dialect.name != "sqlite":
+        return type_coerce(column.match(value), Float)
+
+    words = FTS_WORD.findall(value)
+    if not words:
+        return literal_column("0")
+
+    fts_table, fts_match = _fts_match(column=column, words=words)
+    score = (
+        select(-func.bm25(literal_column(fts_table.name)))
+        .where(fts_match, fts_table.c.rowid == column.table.c.id)
+        .scalar_subquery()
+    )
+    return func.coalesce(score, 0)
+
+
+def year(column):
+    """Year a date column starts or ends with, NULL for dates without one
+
+    Dates are ISO ("1990", "1990-05-01") for most books, free text for some
+    ("c1990", "May 1990"): the first 4 characters, else the last 4, are the
+    year when they are 4 digits.
+    """
+
+    first, last = func.substr(column, 1, 4), func.substr(column, -4)
+
+    def is_year(text):
+        if db.engine.dialect.name == "sqlite":
+            return text.op("GLOB")("[0-9][0-9][0-9][0-9]")
+
+        return text.op("REGEXP")("^[0-9]{4}$")
+
+    return case((is_year(first), first), (is_year(last), last), else_=None)
+
+
+def _fts_match(column, words: list[str]) -> tuple:
+    """FTS5 table of the column and its condition matching any of the words"""
+
+    fts_name = f"{column.table.name}_fts"
+    fts_table = table(fts_name, literal_column("rowid"))
+    phrases = " OR ".join(f'"{word}"' for word in words)
+    query = f"{column.key} : ({phrases})"
+
+    return fts_table, literal_column(fts_name).op("MATCH")(query)
+
+
 class PaginatedResults(pydantic.BaseModel):
     """Paginated Results"""
 
@@ -25,6 +211,7 @@ class PaginatedResults(pydantic.BaseModel):
     max_per_page: int = pydantic.Field(alias="per_page")
     pages: int = pydantic.Field(alias="pages")
     total_items: int = pydantic.Field(alias="total")
+    approximate_total: bool = pydantic.Field(alias="approximate_total", default=False)
 
 
 class Query:
@@ -44,9 +231,12 @@ class Query:
             if hasattr(self, "after"):
                 self.after(*args, **kwargs)
         except Exception as err:
+            db.session.rollback()
             logger.error("Query Error %s", err)
             raise ErrOnDelete(err) from err
 
+        self._committed(hook=self.deleted)
+
     def save(self, *args, **kwargs):
         """Save"""
         try:
@@ -61,6 +251,20 @@ class Query:
             logger.error("Query Error %s", err)
             raise ErrOnSave(err) from err
 
+        self._committed(hook=self.saved)
+
+    def _committed(self, hook: typing.Callable) -> None:
+        """Invalidate the caches of the table and run the hook of a committed write
+
+        The write stands when they fail, the failure is logged and stale() is called.
+        """
+        try:
+            table_versions.incr(keys=self.tables())
+            hook()
+        except Exception as err:  # pylint: disable=broad-except
+            logger.error("Hook Error %s", err)
+            self.stale()
+
     @classmethod
     def to_dict(cls, obj, always_list=False):
         """Convert Object into dict"""
@@ -93,3 +297,16 @@ class Query:
     def after(self, *args, **kwargs):  # pylint: disable=unused-argument
         """After Save"""
         logger.debug(f"After {self}")
+
+    def tables(self) -> list[str]:
+        """Tables written by a save or a delete, their cached entries are invalidated"""
+        return [self.__tablename__]
+
+    def saved(self):
+        """Once saved and committed"""
+
+    def deleted(self):
+        """Once deleted and committed"""
+
+    def stale(self):
+        """Once saved or deleted and committed, when the caches or hooks failed"""
@@ -1,27 +1,96 @@
+import bisect
 import enum
+import json
+import math
 import typing
 
 import pydantic
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Index, Integer, String, Text, func, literal, select, union_all
 
 from r5.Framework import Log, Types
+from r5.Framework.Search import Prefix
+from r5.Framework.Cache import Sqlite
 from r5.Service.App import db
+from r5.Service.Config import Service
 from r5.Service.Schemas.Authors import AuthorModel
-from r5.Service.Schemas.Base import PaginatedResults, Query
+from r5.Service.Schemas.Base import (
+    CursorResults,
+    ErrOnSave,
+    PaginatedResults,
+    Query,
+    decode_cursor,
+    encode_cursor,
+    InvalidCursorError,
+    get_or_create_ids,
+    insert_ignore,
+    match,
+    match_score,
+    table_versions,
+    year,
+)
 from r5.Service.Schemas.BooksAuthors import BookAuthorModel
 from r5.Service.Schemas.BooksCategories import BookCategoryModel
 from r5.Service.Schemas.Categories import CategoryModel
+from r5.Service.Schemas.Fields import (
+    AUTHOR,
+    CATEGORY,
+    COUNT_TABLES,
+    IN_BATCH_SIZE,
+    TITLE,
+)
+from r5.Service.Indexes.Books import BookFuzzyIndex, BookSearchIndex, BookSuggestIndex
 
 logger = Log.get_logger(__name__)
 
-AUTHOR = "author"
-CATEGORY = "category"
+# Facets of the listings, the year is the one of the published date
+PUBLISHER = "publisher"
+YEAR = "year"
+FACETS = (CATEGORY, AUTHOR, PUBLISHER, YEAR)
+
+# Listing counts by normalized filters and versions of the tables they read
+count_cache = Sqlite.SqliteCache(
+    table="book_counts", max_size=Service.COUNT_CACHE_SIZE, ttl=Service.COUNT_CACHE_TTL
+)
+
+# Listing facets by normalized filters, facets and versions of the tables they read
+facet_cache = Sqlite.SqliteCache(
+    table="book_facets", max_size=Service.COUNT_CACHE_SIZE, ttl=Service.COUNT_CACHE_TTL
+)
+
+
+class InvalidFacetError(ValueError):
+    """Invalid listing facet"""
+
+
+def validate_facets(facets: list[str]) -> list[str]:
+    """Facets requested, sorted without duplicates, InvalidFacetError for unknown ones"""
+
+    unknown = [facet for facet in facets if facet not in FACETS]
+    if unknown:
+        raise InvalidFacetError(
+            f"Invalid facets {', '.join(unknown)}, available: {', '.join(FACETS)}"
+        )
+
+    return sorted(set(facets))
+
+
+def filters_key(filters: dict) -> list:
+    """Normalized filters, equivalent filters share the same key"""
+
+    return sorted(
+        (name, " ".join(str(value).split()).lower()) for name, value in filters.items()
+    )
 
 
 class BookModel(Query, db.Model):
     """Book Database Model"""
 
     __tablename__ = "books"
+    __table_args__ = (
+        Index(
+            "ux_books_source_external_id", "original_source", "external_id", unique=True
+        ),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
 
     title = Column(String(300), nullable=False)
@@ -33,115 +102,616 @@ class BookModel(Query, db.Model):
     original_source = Column(String(30), nullable=False)
     external_id = Column(String(30), nullable=True)
 
+    # Authors and categories of the book being deleted, read before the delete
+    deleted_names: tuple = ((), ())
+
     @classmethod
-    def get_all_by_filters(
-        cls, page: int, max_per_page: int, filters: Types.OptionalDict = None
-    ) -> PaginatedResults:
-        """Get all by filters"""
+    def filter_ids(cls, filters: Types.OptionalDict = None):
+        """Query of the ids of the books matching the filters"""
 
-        filters = (
-            filters.copy()
-        )  # If internal values change, replace copy with deepcopy
-        if filters is None:
-            filters = {}
+        filters = dict(filters or {})
 
         author = filters.pop(AUTHOR, None)
         category = filters.pop(CATEGORY, None)
 
         conditions = [
-            getattr(cls, column).match(value) for column, value in filters.items()
+            match(getattr(cls, column), value) for column, value in filters.items()
         ]
 
-        res = db.session.query(cls.id).distinct().filter(*conditions)
+        res = db.session.query(cls.id).filter(*conditions)
 
+        # Semi joins: matching names, then their books through the name id index,
+        # no row multiplication so no DISTINCT
         if author:
-            res = (
-                res.join(
-                    BookAuthorModel, cls.id == BookAuthorModel.book_id, isouter=True
+            res = res.filter(
+                cls.id.in_(
+                    db.session.query(BookAuthorModel.book_id)
+                    .join(AuthorModel, AuthorModel.id == BookAuthorModel.author_id)
+                    .filter(match(AuthorModel.name, author))
                 )
-                .join(
-                    AuthorModel,
-                    AuthorModel.id == BookAuthorModel.author_id,
-                    isouter=True,
-                )
-                .filter(AuthorModel.name.match(author))
             )
 
         if category:
-            res = (
-                res.join(
-                    BookCategoryModel, cls.id == BookCategoryModel.book_id, isouter=True
-                )
-                .join(
-                    CategoryModel,
-                    CategoryModel.id == BookCategoryModel.category_id,
-                    isouter=True,
+            res = res.filter(
+                cls.id.in_(
+                    db.session.query(BookCategoryModel.book_id)
+                    .join(CategoryModel, CategoryModel.id == BookCategoryModel.category_id)
+                    .filter(match(CategoryModel.name, category))
                 )
-                .filter(CategoryModel.name.match(category))
             )
 
-        offset = (page-1) * max_per_page
-        limit = max_per_page
-        sub_query = res.offset(offset).limit(limit).subquery()
+        return res
 
-        res_full = (
-            db.session.query(cls, AuthorModel.name, CategoryModel.name)
-            .join(BookAuthorModel, cls.id == BookAuthorModel.book_id, isouter=True)
-            .join(
-                AuthorModel, AuthorModel.id == BookAuthorModel.author_id, isouter=True
+    @classmethod
+    def relevance(cls, filters: dict):
+        """Relevance of the books matching the filters, higher first
+
+        Weighted sum (Service.SEARCH_WEIGHTS) of the full text score of each
+        filter, authors and categories score their best matching name.
+        """
+
+        filters = dict(filters)
+        weights = Service.SEARCH_WEIGHTS
+
+        author = filters.pop(AUTHOR, None)
+        category = filters.pop(CATEGORY, None)
+
+        scores = [
+            match_score(getattr(cls, column), value) * weights.get(column, 1.0)
+            for column, value in filters.items()
+        ]
+
+        if author:
+            scores.append(
+                select(func.max(match_score(AuthorModel.name, author)))
+                .select_from(BookAuthorModel)
+                .join(AuthorModel, AuthorModel.id == BookAuthorModel.author_id)
+                .where(BookAuthorModel.book_id == cls.id)
+                .scalar_subquery()
+                * weights.get(AUTHOR, 1.0)
             )
-            .join(BookCategoryModel, cls.id == BookCategoryModel.book_id, isouter=True)
-            .join(
-                CategoryModel,
-                CategoryModel.id == BookCategoryModel.category_id,
-                isouter=True,
+
+        if category:
+            scores.append(
+                select(func.max(match_score(CategoryModel.name, category)))
+                .select_from(BookCategoryModel)
+                .join(CategoryModel, CategoryModel.id == BookCategoryModel.category_id)
+                .where(BookCategoryModel.book_id == cls.id)
+                .scalar_subquery()
+                * weights.get(CATEGORY, 1.0)
+            )
+
+        return sum(scores[1:], scores[0])
+
+    @classmethod
+    def count_by_filters(
+        cls, filters: Types.OptionalDict = None, approximate: bool = False
+    ) -> tuple[int, bool]:
+        """Number of books matching the filters and whether it is an estimate
+
+        Counts are cached by normalized filters until one of the tables they read
+        is written. Approximate counts come from the optimizer estimate (MySQL only)
+        and are only used from Service.APPROXIMATE_COUNT_MIN rows on, smaller
+        counts are exact.
+        """
+
+        filters = filters or {}
+        if search_index.enabled(filters=filters):
+            return len(search_index.search(filters=filters)), False
+
+        versions = table_versions.get(keys=COUNT_TABLES)
+        key = json.dumps([filters_key(filters=filters), versions])
+
+        # Unknown versions (store errors) must not serve an outdated count
+        cache = versions is not None
+        if cache:
+            total = count_cache.get(key=f"exact:{key}", default=None)
+            if total is not None:
+                return total, False
+
+            if approximate:
+                total = count_cache.get(key=f"approximate:{key}", default=None)
+                if total is not None:
+                    return total, True
+
+        res = cls.filter_ids(filters=filters).order_by(None)
+
+        if approximate:
+            total = cls._estimate_count(res=res)
+            if total is not None and total >= Service.APPROXIMATE_COUNT_MIN:
+                if cache:
+                    count_cache.set(key=f"approximate:{key}", value=total)
+                return total, True
+
+        total = res.count()
+        if cache:
+            count_cache.set(key=f"exact:{key}", value=total)
+
+        return total, False
+
+    @classmethod
+    def get_facets(
+        cls, facets: list[str], filters: Types.OptionalDict = None
+    ) -> dict[str, list[tuple[str, int]]]:
+        """Most common values of facets among the books matching the filters
+
+        Every facet is counted in a single statement, a UNION ALL of the values
+        of the books matching the filters (categories and authors through their
+        link tables) grouped by facet and value, and ranked per facet to keep
+        the Service.FACETS_SIZE most common. Dates without a year are left out.
+        Results are cached by normalized filters until one of the tables they
+        read is written.
+
+        Args:
+            facets (list[str]): Facets counted, among FACETS.
+            filters (dict, optional): Filters of the listing.
+
+        Returns:
+            dict: Values and number of books of each facet, most common first.
+        """
+
+        facets = validate_facets(facets=facets)
+        if not facets:
+            return {}
+
+        filters = filters or {}
+        versions = table_versions.get(keys=COUNT_TABLES)
+        key = json.dumps([filters_key(filters=filters), facets, Service.FACETS_SIZE, versions])
+
+        # Unknown versions (store errors) must not serve outdated facets
+        cache = versions is not None
+        if cache:
+            cached = facet_cache.get(key=key, default=None)
+            if cached is not None:
+                return {
+                    facet: [tuple(value_books) for value_books in facet_values]
+                    for facet, facet_values in cached.items()
+                }
+
+        union = cls._facet_values(facets=facets, filters=filters)
+
+        grouped = (
+            select(
+                union.c.facet,
+                union.c.value,
+                func.count().label("books"),
+                func.row_number()
+                .over(partition_by=union.c.facet, order_by=(func.count().desc(), union.c.value))
+                .label("position"),
             )
-            .filter(cls.id.in_(sub_query))
+            .where(union.c.value.isnot(None), union.c.value != "")
+            .group_by(union.c.facet, union.c.value)
+            .subquery()
         )
+        rows = db.session.execute(
+            select(grouped.c.facet, grouped.c.value, grouped.c.books)
+            .where(grouped.c.position <= Service.FACETS_SIZE)
+            .order_by(grouped.c.facet, grouped.c.position)
+        )
+
+        results = {facet: [] for facet in facets}
+        for facet, value, count in rows:
+            results[facet].append((value, count))
+
+        if cache:
+            facet_cache.set(key=key, value=results)
+
+        return results
 
+    @classmethod
+    def _facet_values(cls, facets: list[str], filters: dict):
+        """Subquery of the facet and value rows of the books matching the filters"""
+
+        book_ids = cls.filter_ids(filters=filters).order_by(None)
+
+        def matching(column) -> list:
+            """Condition of the rows of the books matching the filters"""
+
+            return [column.in_(book_ids)] if filters else []
+
+        values = {
+            CATEGORY: select(literal(CATEGORY).label("facet"), CategoryModel.name.label("value"))
+            .select_from(BookCategoryModel)
+            .join(CategoryModel, CategoryModel.id == BookCategoryModel.category_id)
+            .where(*matching(BookCategoryModel.book_id)),
+            AUTHOR: select(literal(AUTHOR).label("facet"), AuthorModel.name.label("value"))
+            .select_from(BookAuthorModel)
+            .join(AuthorModel, AuthorModel.id == BookAuthorModel.author_id)
+            .where(*matching(BookAuthorModel.book_id)),
+            PUBLISHER: select(literal(PUBLISHER).label("facet"), cls.publisher.label("value"))
+            .where(*matching(cls.id)),
+            YEAR: select(
+                literal(YEAR).label("facet"),
+                year(cls.published_date).label("value"),
+            ).where(*matching(cls.id)),
+        }
+
+        return union_all(*[values[facet] for facet in facets]).subquery()
+
+    @classmethod
+    def _estimate_count(cls, res) -> Types.OptionalInt:
+        """Rows the MySQL optimizer expects the query to return, None elsewhere"""
+
+        dialect = db.engine.dialect
+        if dialect.name != "mysql":
+            return None
+
+        compiled = res.statement.compile(dialect=dialect)
         try:
-            pagination = res.paginate(page=page, per_page=max_per_page)
-            pagination_dict = pagination.__dict__
-            pagination_dict["items"] = res_full.all()
-            paginated_results = PaginatedResults(
-                pages=pagination.pages,
-                **pagination_dict,
+            plan = (
+                db.session.connection()
+                .exec_driver_sql(f"EXPLAIN {compiled}", compiled.params)
+                .mappings()
+                .first()
             )
-        except Exception as err:
-            if hasattr(err, "code") and err.code == 404:
-                return PaginatedResults(items=[], page=page, per_page=max_per_page, pages=0, total=0)
-
-            raise err
+        except Exception as err:  # pylint: disable=broad-except
+            logger.warning(f"Count estimate failed: {err}")
+            return None
 
-        return paginated_results
+        if not plan or plan.get("rows") is None:
+            return None
 
+        # The first table of the plan drives the join, filtered is a percentage
+        return int(plan["rows"] * float(plan.get("filtered") or 100) / 100)
 
     @classmethod
-    def get_by_id(
-        cls, _id: int
-    ) -> tuple["BookModel", typing.Optional[AuthorModel], typing.Optional[CategoryModel]]:
-        """Get by id"""
+    def get_all_by_filters(
+        cls,
+        page: int,
+        max_per_page: int,
+        filters: Types.OptionalDict = None,
+        approximate: bool = False,
+    ) -> PaginatedResults:
+        """Get all by filters
+
+        Filtered books are ordered by relevance then id, scored in the id query
+        so only the books of the page are loaded. Unfiltered books are in id order.
+        """
+
+        offset = (page-1) * max_per_page
+
+        if search_index.enabled(filters=filters):
+            ranked = search_index.search(filters=filters)
+            total, approximate_total = len(ranked), False
+            book_ids = [book_id for book_id, _ in ranked[offset : offset + max_per_page]]
+        else:
+            res = cls.filter_ids(filters=filters)
+            if filters:
+                res = res.order_by(cls.relevance(filters=filters).desc())
 
-        res = (
-            db.session.query(cls, AuthorModel.name, CategoryModel.name)
-            .join(BookAuthorModel, cls.id == BookAuthorModel.book_id, isouter=True)
-            .join(
-                AuthorModel, AuthorModel.id == BookAuthorModel.author_id, isouter=True
+            total, approximate_total = cls.count_by_filters(
+                filters=filters, approximate=approximate
             )
-            .join(BookCategoryModel, cls.id == BookCategoryModel.book_id, isouter=True)
-            .join(
-                CategoryModel,
-                CategoryModel.id == BookCategoryModel.category_id,
-                isouter=True,
+            book_ids = [
+                row.id for row in res.order_by(cls.id).offset(offset).limit(max_per_page)
+            ]
+
+        return PaginatedResults(
+            items=cls.get_by_ids(_ids=book_ids),
+            page=page,
+            per_page=max_per_page,
+            pages=math.ceil(total / max_per_page),
+            total=total,
+            approximate_total=approximate_total,
+        )
+
+    @classmethod
+    def get_all_by_cursor(
+        cls,
+        max_per_page: int,
+        cursor: Types.OptionalStr = None,
+        filters: Types.OptionalDict = None,
+        with_total: bool = False,
+        approximate: bool = False,
+    ) -> CursorResults:
+        """Get all by filters, the page after cursor in id order
+
+        Pages are read with WHERE id > last id instead of an OFFSET, so deep pages
+        cost the same as the first one. The total is only counted on demand.
+        Books searched in memory are paged by relevance instead.
+        """
+
+        if search_index.enabled(filters=filters):
+            return cls._get_ranked_by_cursor(
+                max_per_page=max_per_page,
+                cursor=cursor,
+                filters=filters,
+                with_total=with_total,
             )
-            .filter(cls.id==_id).all()
+
+        res = cls.filter_ids(filters=filters)
+
+        total, approximate_total = None, False
+        if with_total:
+            total, approximate_total = cls.count_by_filters(
+                filters=filters, approximate=approximate
+            )
+
+        page_res = res
+        if cursor:
+            page_res = page_res.filter(cls.id > decode_cursor(cursor=cursor)["id"])
+
+        # One more row tells whether there is a next page
+        book_ids = [row.id for row in page_res.order_by(cls.id).limit(max_per_page + 1)]
+
+        next_cursor = None
+        if len(book_ids) > max_per_page:
+            book_ids = book_ids[:max_per_page]
+            next_cursor = encode_cursor(values=dict(id=book_ids[-1]))
+
+        return CursorResults(
+            items=cls.get_by_ids(_ids=book_ids),
+            per_page=max_per_page,
+            next_cursor=next_cursor,
+            total=total,
+            approximate_total=approximate_total,
         )
 
-        if not res:
+    @classmethod
+    def _get_ranked_by_cursor(
+        cls,
+        max_per_page: int,
+        cursor: Types.OptionalStr,
+        filters: dict,
+        with_total: bool,
+    ) -> CursorResults:
+        """Books searched in memory, the page after cursor by decreasing score then id"""
+
+        ranked = search_index.search(filters=filters)
+
+        def rank(item: tuple[int, float]) -> tuple[float, int]:
+            return -item[1], item[0]
+
+        start = 0
+        if cursor:
+            values = decode_cursor(cursor=cursor)
+            score = values.get("score", math.inf)
+            if not isinstance(score, (int, float)):
+                raise InvalidCursorError(f"Invalid cursor {cursor}")
+
+            start = bisect.bisect_right(ranked, (-score, values["id"]), key=rank)
+
+        page = ranked[start : start + max_per_page + 1]
+
+        next_cursor = None
+        if len(page) > max_per_page:
+            page = page[:max_per_page]
+            book_id, score = page[-1]
+            next_cursor = encode_cursor(values=dict(id=book_id, score=score))
+
+        return CursorResults(
+            items=cls.get_by_ids(_ids=[book_id for book_id, _ in page]),
+            per_page=max_per_page,
+            next_cursor=next_cursor,
+            total=len(ranked) if with_total else None,
+            approximate_total=False,
+        )
+
+    @classmethod
+    def get_all_by_similarity(
+        cls, page: int, max_per_page: int, filters: Types.OptionalDict = None
+    ) -> typing.Optional[PaginatedResults]:
+        """Books with a title and author similar to the filters, most similar first
+
+        Typo tolerant, at most Service.FUZZY_MAX_RESULTS books. Only title and
+        author filters are searched by similarity, None for other filters.
+        """
+
+        if not filters or set(filters) - {TITLE, AUTHOR}:
             return None
 
-        return res[0]
+        ranked = fuzzy_index.search(filters=filters)[: Service.FUZZY_MAX_RESULTS]
+        offset = (page-1) * max_per_page
+
+        return PaginatedResults(
+            items=cls.get_by_ids(
+                _ids=[book_id for book_id, _ in ranked[offset : offset + max_per_page]]
+            ),
+            page=page,
+            per_page=max_per_page,
+            pages=math.ceil(len(ranked) / max_per_page),
+            total=len(ranked),
+        )
+
+    @classmethod
+    def get_by_ids(cls, _ids: list[int]) -> list["BookModel"]:
+        """Get by ids, in the order of the ids"""
+
+        if not _ids:
+            return []
+
+        book_models = {
+            book_model.id: book_model
+            for book_model in db.session.query(cls).filter(cls.id.in_(_ids))
+        }
+
+        return [book_models[_id] for _id in _ids if _id in book_models]
+
+    @classmethod
+    def get_by_id(cls, _id: int) -> typing.Optional["BookModel"]:
+        """Get by id"""
+
+        return db.session.query(cls).filter(cls.id==_id).first()
 
+    @classmethod
+    def get_by_external_id(
+        cls, source: str, external_id: str
+    ) -> typing.Optional["BookModel"]:
+        """Get by source and external id"""
+
+        return (
+            db.session.query(cls)
+            .filter(cls.original_source == source, cls.external_id == external_id)
+            .first()
+        )
+
+    @classmethod
+    def get_authors(cls, book_ids: list[int]) -> dict[int, list[str]]:
+        """Author names of many books, in batched IN queries"""
+
+        return cls._get_names(
+            book_ids=book_ids,
+            link_model=BookAuthorModel,
+            link_column=BookAuthorModel.author_id,
+            name_model=AuthorModel,
+        )
+
+    @classmethod
+    def get_categories(cls, book_ids: list[int]) -> dict[int, list[str]]:
+        """Category names of many books, in batched IN queries"""
+
+        return cls._get_names(
+            book_ids=book_ids,
+            link_model=BookCategoryModel,
+            link_column=BookCategoryModel.category_id,
+            name_model=CategoryModel,
+        )
+
+    @classmethod
+    def _get_names(
+        cls, book_ids: list[int], link_model, link_column, name_model
+    ) -> dict[int, list[str]]:
+        """Names linked to many books, one row per book and name"""
+
+        book_ids = list(dict.fromkeys(book_ids))
+        names = {book_id: [] for book_id in book_ids}
+
+        for index in range(0, len(book_ids), IN_BATCH_SIZE):
+            rows = (
+                db.session.query(link_model.book_id, name_model.name)
+                .join(name_model, name_model.id == link_column)
+                .filter(link_model.book_id.in_(book_ids[index : index + IN_BATCH_SIZE]))
+                .order_by(link_model.book_id, name_model.id)
+                .all()
+            )
+
+            for book_id, name in rows:
+                names[book_id].append(name)
+
+        return names
+
+    def save_with_names(self, authors: list[str], categories: list[str]) -> None:
+        """Save the book with its authors and categories in a single transaction
+
+        Names are resolved with one IN query per table, missing names and the
+        links are inserted with multi-row inserts ignoring existing rows.
+        """
+
+        try:
+            self.before()
+            db.session.add(self)
+            db.session.flush()
+
+            author_ids = get_or_create_ids(AuthorModel, names=authors)
+            insert_ignore(
+                BookAuthorModel,
+                [dict(book_id=self.id, author_id=author_id) for author_id in author_ids.values()],
+            )
+
+            category_ids = get_or_create_ids(CategoryModel, names=categories)
+            insert_ignore(
+                BookCategoryModel,
+                [
+                    dict(book_id=self.id, category_id=category_id)
+                    for category_id in category_ids.values()
+                ],
+            )
+
+            db.session.commit()
+            self.after()
+        except Exception as err:
+            db.session.rollback()
+            logger.error("Query Error %s", err)
+            raise ErrOnSave(err) from err
+
+        self._committed(hook=self.saved)
+
+    @classmethod
+    def save_many(cls, books: list[dict], source: str) -> int:
+        """Save many books of a source with their authors and categories in one transaction
+
+        Books are dicts of BookModel columns plus authors and categories names,
+        the ones whose external_id is already saved for the source are skipped.
+
+        Returns:
+            int: Books saved.
+        """
+
+        try:
+            external_ids = [book["external_id"] for book in books]
+            saved = {
+                row.external_id
+                for row in db.session.query(cls.external_id).filter(
+                    cls.original_source == source, cls.external_id.in_(external_ids)
+                )
+            }
+
+            new_books = {}
+            for book in books:
+                if book["external_id"] not in saved:
+                    new_books.setdefault(book["external_id"], book)
+
+            if not new_books:
+                return 0
+
+            # Books saved meanwhile by a concurrent writer are skipped by their key
+            saved_count = insert_ignore(
+                cls,
+                [
+                    dict(
+                        original_source=source,
+                        **{
+                            column: value
+                            for column, value in book.items()
+                            if column not in ("authors", "categories")
+                        },
+                    )
+                    for book in new_books.values()
+                ],
+            )
+            book_ids = {
+                row.external_id: row.id
+                for row in db.session.query(cls.id, cls.external_id).filter(
+                    cls.original_source == source, cls.external_id.in_(list(new_books))
+                )
+            }
+
+            author_ids = get_or_create_ids(
+                AuthorModel,
+                names=[name for book in new_books.values() for name in book["authors"]],
+            )
+            insert_ignore(
+                BookAuthorModel,
+                [
+                    dict(book_id=book_ids[external_id], author_id=author_ids[name])
+                    for external_id, book in new_books.items()
+                    for name in dict.fromkeys(book["authors"])
+                    if name in author_ids
+                ],
+            )
+
+            category_ids = get_or_create_ids(
+                CategoryModel,
+                names=[name for book in new_books.values() for name in book["categories"]],
+            )
+            insert_ignore(
+                BookCategoryModel,
+                [
+                    dict(book_id=book_ids[external_id], category_id=category_ids[name])
+                    for external_id, book in new_books.items()
+                    for name in dict.fromkeys(book["categories"])
+                    if name in category_ids
+                ],
+            )
+
+            db.session.commit()
+        except Exception as err:
+            db.session.rollback()
+            logger.error("Query Error %s", err)
+            raise ErrOnSave(err) from err
+
+        table_versions.incr(keys=COUNT_TABLES)
+        return saved_count
 
     @classmethod
     def delete_by_id(
@@ -152,6 +722,64 @@ class BookModel(Query, db.Model):
         model = db.session.query(cls).filter(cls.id==_id).first()
         model.delete()
 
+    def tables(self) -> list[str]:
+        """Tables of the books, their authors and categories"""
+
+        return list(COUNT_TABLES)
+
+    def saved(self):
+        """Index the book saved"""
+
+        if Service.SEARCH_BACKEND == "memory":
+            search_index.update(book_ids=[self.id])
+
+        suggest_index.update(book_ids=[self.id])
+        fuzzy_index.update(book_ids=[self.id])
+
+    def delete(self, *args, **kwargs):
+        """Delete the book and its links to authors and categories in a single transaction
+
+        The names of the book are read first to uncount them from the suggestions.
+        """
+
+        self.deleted_names = (
+            BookModel.get_authors(book_ids=[self.id])[self.id],
+            BookModel.get_categories(book_ids=[self.id])[self.id],
+        )
+
+        for link_model in (BookAuthorModel, BookCategoryModel):
+            db.session.query(link_model).filter(link_model.book_id == self.id).delete(
+                synchronize_session=False
+            )
+
+        super().delete(*args, **kwargs)
+
+    def deleted(self):
+        """Remove the book deleted from the indexes"""
+
+        if Service.SEARCH_BACKEND == "memory":
+            search_index.remove(book_id=self.id)
+
+        authors, categories = self.deleted_names
+        suggest_index.remove(title=self.title, authors=authors, categories=categories)
+        fuzzy_index.remove(book_id=self.id, title=self.title)
+
+    def stale(self):
+        """Indexes missed the write, they are loaded again on their next read"""
+
+        search_index.reset()
+        suggest_index.reset()
+        fuzzy_index.reset()
+
+
+search_index = BookSearchIndex(book_model=BookModel, path=Service.SEARCH_SNAPSHOT_PATH)
+
+
+suggest_index = BookSuggestIndex(book_model=BookModel, max_keys=Service.SUGGEST_MAX_KEYS)
+
+
+fuzzy_index = BookFuzzyIndex(book_model=BookModel)
+
 
 class BookSource(enum.Enum):
     """Book sources"""
@@ -229,15 +857,141 @@ class BookPayload(pydantic.BaseModel):
         return values
 
 
+class BookReference(pydantic.BaseModel):
+    """Book on an external source"""
+
+    source: BookSource = pydantic.Field(alias="source")
+    external_id: str = pydantic.Field(alias="external_id")
+
+    class Config:
+        """Config"""
+
+        use_enum_values = True
+
+    @pydantic.validator("source")
+    def validate_source(cls, source):  # pylint: disable=no-self-argument
+        """Validate source"""
+
+        if BookSource(source) == BookSource.INTERNAL:
+            raise ValueError("Only external sources can be looked up.")
+
+        return source
+
+
+class BookLookupPayload(pydantic.BaseModel):
+    """Book Lookup Payload Schema"""
+
+    items: list[BookReference] = pydantic.Field(alias="items")
+
+    @pydantic.validator("items")
+    def validate_items(cls, items):  # pylint: disable=no-self-argument
+        """Validate items"""
+
+        if not items:
+            raise ValueError("items parameter requires at least one book.")
+
+        if len(items) > Service.LOOKUP_MAX_ITEMS:
+            raise ValueError(
+                f"items parameter accepts at most {Service.LOOKUP_MAX_ITEMS} books."
+            )
+
+        return items
+
+
+class BookLookupResult(BookReference):
+    """Book Lookup Result Schema"""
+
+    book: typing.Optional[BookInfo] = pydantic.Field(alias="book")
+    timed_out: bool = pydantic.Field(alias="timed_out", default=False)
+    failed: bool = pydantic.Field(alias="failed", default=False)
+
+
+class BookListPayload(pydantic.BaseModel):
+    """Book List Payload Schema, options of a listing besides its filters"""
+
+    page: Types.OptionalInt = pydantic.Field(alias="page")
+    max_per_page: Types.OptionalInt = pydantic.Field(alias="max_per_page")
+    cursor: Types.OptionalStr = pydantic.Field(alias="cursor")
+    with_total: bool = pydantic.Field(alias="with_total", default=False)
+    approximate: bool = pydantic.Field(alias="approximate", default=False)
+    facets: list[str] = pydantic.Field(alias="facets", default=[])
+
+
+class BookSuggestPayload(pydantic.BaseModel):
+    """Book Suggest Payload Schema"""
+
+    prefix: str = pydantic.Field(alias="prefix")
+    limit: int = pydantic.Field(alias="limit", default=10)
+
+    @pydantic.validator("prefix")
+    def validate_prefix(cls, prefix):  # pylint: disable=no-self-argument
+        """Validate prefix"""
+
+        if not Prefix.normalize(prefix):
+            raise ValueError("prefix parameter requires at least one letter or digit.")
+
+        return prefix
+
+    @pydantic.validator("limit")
+    def validate_limit(cls, limit):  # pylint: disable=no-self-argument
+        """Validate limit"""
+
+        if not 1 <= limit <= Service.SUGGEST_MAX_ITEMS:
+            raise ValueError(
+                f"limit parameter must be between 1 and {Service.SUGGEST_MAX_ITEMS}."
+            )
+
+        return limit
+
+
+class BookSuggestion(pydantic.BaseModel):
+    """Book Suggestion Schema"""
+
+    text: str = pydantic.Field(alias="text")
+    kind: str = pydantic.Field(alias="kind")
+    books: int = pydantic.Field(alias="books")
+
+
+class FacetValue(pydantic.BaseModel):
+    """Value of a facet and its number of books"""
+
+    value: str = pydantic.Field(alias="value")
+    books: int = pydantic.Field(alias="books")
+
+
+class CursorBookResults(pydantic.BaseModel):
+    """Model representing a page of book results read by cursor."""
+
+    items: list[BookInfo] = pydantic.Field(alias="items")
+    max_per_page: int = pydantic.Field(alias="max_per_page")
+    next_cursor: Types.OptionalStr = pydantic.Field(alias="next_cursor")
+    total_items: Types.OptionalInt = pydantic.Field(alias="total_items")
+    approximate_total: bool = pydantic.Field(alias="approximate_total", default=False)
+    fuzzy: bool = pydantic.Field(alias="fuzzy", default=False)
+    facets: typing.Optional[dict[str, list[FacetValue]]] = pydantic.Field(alias="facets")
+    source: BookSource = pydantic.Field(alias="source")
+
+    class Config:
+        """Configuration"""
+
+        use_enum_values = True
+
+
 class PaginatedBookResults(pydantic.BaseModel):
     """Model representing the paginated book results."""
 
     total_items: int = pydantic.Field(alias="total_items")
+    approximate_total: bool = pydantic.Field(alias="approximate_total", default=False)
+    fuzzy: bool = pydantic.Field(alias="fuzzy", default=False)
+    facets: typing.Optional[dict[str, list[FacetValue]]] = pydantic.Field(alias="facets")
     items: list[BookInfo] = pydantic.Field(alias="items")
     page: int = pydantic.Field(alias="page")
     pages: int = pydantic.Field(alias="pages")
     max_per_page: int = pydantic.Field(alias="max_per_page")
     source: BookSource = pydantic.Field(alias="source")
+    timed_out: bool = pydantic.Field(alias="timed_out", default=False)
+    circuit_open: bool = pydantic.Field(alias="circuit_open", default=False)
+    failed: bool = pydantic.Field(alias="failed", default=False)
 
     class Config:
         """Configuration"""
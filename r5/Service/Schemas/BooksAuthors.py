@@ -1,6 +1,6 @@
 import pydantic
 
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Index, Integer, ForeignKey, UniqueConstraint
 
 from r5.Framework import Log
 from r5.Service.App import db
@@ -13,7 +13,10 @@ class BookAuthorModel(Query, db.Model):
     """BookAuthor Database Model"""
 
     __tablename__ = "book_authors"
-    __table_args__ = (UniqueConstraint("book_id", "author_id"),)
+    __table_args__ = (
+        UniqueConstraint("book_id", "author_id"),
+        Index("ix_book_authors_author_id", "author_id"),
+    )
 
     book_id = Column(Integer, ForeignKey('books.id'), nullable=False, primary_key=True)
     author_id = Column(Integer, ForeignKey('authors.id'), nullable=False, primary_key=True)
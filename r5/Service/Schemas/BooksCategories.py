@@ -1,6 +1,6 @@
 import pydantic
 
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Index, Integer, ForeignKey, UniqueConstraint
 
 from r5.Framework import Log
 from r5.Service.App import db
@@ -13,7 +13,10 @@ class BookCategoryModel(Query, db.Model):
     """BookCategory Database Model"""
 
     __tablename__ = "book_categories"
-    __table_args__ = (UniqueConstraint("book_id", "category_id"),)
+    __table_args__ = (
+        UniqueConstraint("book_id", "category_id"),
+        Index("ix_book_categories_category_id", "category_id"),
+    )
 
     book_id = Column(Integer, ForeignKey('books.id'), nullable=False, primary_key=True)
     category_id = Column(Integer, ForeignKey('categories.id'), nullable=False, primary_key=True)
@@ -1,6 +1,6 @@
 import pydantic
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String
 
 from r5.Framework import Log
 from r5.Service.App import db
@@ -13,6 +13,7 @@ class CategoryModel(Query, db.Model):
     """Category Database Model"""
 
     __tablename__ = "categories"
+    __table_args__ = (Index("ux_categories_name", "name", unique=True),)
     id = Column(Integer, primary_key=True, autoincrement=True)
 
     name = Column(String(100), nullable=False)
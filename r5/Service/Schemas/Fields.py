@@ -0,0 +1,15 @@
+# Filters on the names of the authors and categories of the books
+AUTHOR = "author"
+CATEGORY = "category"
+
+# Tables read by the listing counts
+COUNT_TABLES = ("books", "book_authors", "authors", "book_categories", "categories")
+
+# Ids per IN list when loading the authors and categories of many books
+IN_BATCH_SIZE = 500
+
+# Columns searched, by filter name
+TEXT_COLUMNS = ("title", "subtitle", "published_date", "publisher", "description")
+
+# Kinds of suggestions
+TITLE = "title"
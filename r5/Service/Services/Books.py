@@ -1,23 +1,32 @@
+import functools
 import typing
 
-from r5.Action.Books import Apis, BookItem
+from r5.Action.Books import Apis
 from r5.Action.Books import Books as BooksAction
 from r5.Action.Books import BookSearchFilters
-from r5.Framework import Types
+from r5.Framework import Log, Types
+from r5.Framework.Apis.Errors import CircuitOpenError, UpstreamError
+from r5.Framework.Helpers import Parallel
 from r5.Service.Config import Service
-from r5.Service.Schemas.Authors import AuthorModel
 from r5.Service.Schemas.Books import (
     Book,
     BookInfo,
+    BookListPayload,
+    BookLookupPayload,
+    BookLookupResult,
+    CursorBookResults,
     BookModel,
     BookPayload,
     BookSource,
+    BookSuggestion,
+    BookSuggestPayload,
+    FacetValue,
     PaginatedBookResults,
+    suggest_index,
+    validate_facets,
 )
-from r5.Service.Schemas.BooksAuthors import BookAuthorModel
-from r5.Service.Schemas.BooksCategories import BookCategoryModel
-from r5.Service.Schemas.Categories import CategoryModel
 
+logger = Log.get_logger(__name__)
 
 DEFAULT_MAX_PER_PAGE = 10
 
@@ -26,6 +35,10 @@ class ResourceNotFoundError(Exception):
     """Resource not found error"""
 
 
+class ResourceConflictError(Exception):
+    """Resource conflict error"""
+
+
 class Books:
     """Books service"""
 
@@ -35,68 +48,158 @@ class Books:
     def list_(
         self,
         filters: Types.OptionalDict = None,
-        page: Types.OptionalInt = None,
-        max_per_page: Types.OptionalInt = None,
+        book_list_payload: typing.Optional[BookListPayload] = None,
     ) -> list[dict]:
-        """List Book model"""
+        """List Book model
+
+        A cursor (an empty one for the first page) reads pages by cursor instead
+        of by page number, with the total only counted when with_total is set.
+        Totals of broad filters are estimated when approximate is set. Internal
+        results count the most common values of the facets requested.
+        """
 
-        if not page:
-            page = 1
+        book_list_payload = book_list_payload or BookListPayload()
+        facets = validate_facets(facets=book_list_payload.facets)
 
-        if not max_per_page:
-            max_per_page = DEFAULT_MAX_PER_PAGE
+        if book_list_payload.cursor is not None:
+            return self._list_by_cursor(
+                filters=filters, book_list_payload=book_list_payload, facets=facets
+            )
+
+        page = book_list_payload.page or 1
+        max_per_page = book_list_payload.max_per_page or DEFAULT_MAX_PER_PAGE
 
         book_models_info = BookModel.get_all_by_filters(
-            page=page, max_per_page=max_per_page, filters=filters
+            page=page,
+            max_per_page=max_per_page,
+            filters=filters,
+            approximate=book_list_payload.approximate,
         )
 
-        book_items = self._book_model_to_dict(
-            compound_book_items=book_models_info.items
-        )
+        book_items = self._book_model_to_dict(book_models=book_models_info.items)
+
+        if not book_items:
+            books = self._list_similar(
+                filters=filters, page=page, max_per_page=max_per_page
+            ) or self._call_apis(filters=filters, page=page, max_per_page=max_per_page)
+
+            return books
 
-        books = [
+        return [
             PaginatedBookResults(
                 items=book_items,
                 source=BookSource.INTERNAL.value,
+                facets=self._get_facets(facets=facets, filters=filters),
                 **book_models_info.dict(exclude={"items"}),
             ).dict()
         ]
 
-        if not book_items:
-            books = self._call_apis(
-                filters=filters, page=page, max_per_page=max_per_page
+    def _list_by_cursor(
+        self,
+        filters: Types.OptionalDict,
+        book_list_payload: BookListPayload,
+        facets: list[str],
+    ) -> list[dict]:
+        """List Book model by cursor"""
+
+        cursor = book_list_payload.cursor
+        max_per_page = book_list_payload.max_per_page or DEFAULT_MAX_PER_PAGE
+
+        book_models_info = BookModel.get_all_by_cursor(
+            max_per_page=max_per_page,
+            cursor=cursor,
+            filters=filters,
+            with_total=book_list_payload.with_total,
+            approximate=book_list_payload.approximate,
+        )
+
+        book_items = self._book_model_to_dict(book_models=book_models_info.items)
+
+        # Similar books, then external sources, only when nothing matches internally
+        if not book_items and not cursor:
+            # Similar books are served as a single page, without cursor
+            similar_models_info = BookModel.get_all_by_similarity(
+                page=1, max_per_page=max_per_page, filters=filters
             )
+            if similar_models_info and similar_models_info.items:
+                return [
+                    CursorBookResults(
+                        items=self._book_model_to_dict(book_models=similar_models_info.items),
+                        max_per_page=max_per_page,
+                        next_cursor=None,
+                        total_items=similar_models_info.total_items,
+                        source=BookSource.INTERNAL.value,
+                        fuzzy=True,
+                    ).dict()
+                ]
+
+            return self._call_apis(filters=filters, page=1, max_per_page=max_per_page)
+
+        return [
+            CursorBookResults(
+                items=book_items,
+                source=BookSource.INTERNAL.value,
+                facets=self._get_facets(facets=facets, filters=filters),
+                **book_models_info.dict(exclude={"items"}),
+            ).dict()
+        ]
 
-        return books
+    def _get_facets(
+        self, facets: list[str], filters: Types.OptionalDict
+    ) -> typing.Optional[dict[str, list[FacetValue]]]:
+        """Most common values of the facets requested, None when none is"""
 
-    def _book_model_to_dict(
-        self,
-        compound_book_items: list[
-            tuple[BookModel, Types.OptionalStr, Types.OptionalStr]
-        ],
-    ) -> list[BookInfo]:
-        """List of book models to list of dicts"""
+        if not facets:
+            return None
 
-        books_dict = {}
+        return {
+            facet: [FacetValue(value=value, books=books) for value, books in facet_values]
+            for facet, facet_values in BookModel.get_facets(
+                facets=facets, filters=filters
+            ).items()
+        }
 
-        for book_model, author, category in compound_book_items:
-            if book_model.id not in books_dict:
-                books_dict[book_model.id] = Book.to_dict(book_model)
+    def _list_similar(
+        self, filters: Types.OptionalDict, page: int, max_per_page: int
+    ) -> list[dict]:
+        """Books with a title or an author similar to the filters, a typo tolerant
+        fallback before the external sources. Empty when none is similar.
+        """
 
-                books_dict[book_model.id]["authors"] = set()
-                books_dict[book_model.id]["categories"] = set()
+        book_models_info = BookModel.get_all_by_similarity(
+            page=page, max_per_page=max_per_page, filters=filters
+        )
+        if not book_models_info or not book_models_info.items:
+            return []
 
-            if author:
-                books_dict[book_model.id]["authors"].add(author)
+        return [
+            PaginatedBookResults(
+                items=self._book_model_to_dict(book_models=book_models_info.items),
+                source=BookSource.INTERNAL.value,
+                fuzzy=True,
+                **book_models_info.dict(exclude={"items"}),
+            ).dict()
+        ]
 
-            if category:
-                books_dict[book_model.id]["categories"].add(category)
+    def _book_model_to_dict(self, book_models: list[BookModel]) -> list[BookInfo]:
+        """List of book models to list of book infos
+
+        Authors and categories of every book are loaded at once, one row per
+        book and name.
+        """
+
+        book_ids = [book_model.id for book_model in book_models]
+        authors = BookModel.get_authors(book_ids=book_ids)
+        categories = BookModel.get_categories(book_ids=book_ids)
 
         book_items = []
-        for book_model_id, book in books_dict.items():
-            book["authors"] = list(book["authors"])
-            book["categories"] = list(book["categories"])
-            book_info = BookInfo(id=book_model_id, **book)
+        for book_model in book_models:
+            book_info = BookInfo(
+                id=book_model.id,
+                authors=authors[book_model.id],
+                categories=categories[book_model.id],
+                **Book.to_dict(book_model),
+            )
             book_items.append(book_info)
 
         return book_items
@@ -107,50 +210,96 @@ class Books:
         page: int,
         max_per_page: int,
     ) -> list[dict]:
-        """Call Apis"""
-
-        books = []
-
-        for api_name in list(Apis):
-            book_action = BooksAction(
-                api_name=api_name, api_key=getattr(Service, f"{api_name.value}_API_KEY", "")
-            )
-            book_results = book_action.search(
-                filters=BookSearchFilters(**filters),
+        """Call Apis
+
+        Every source is searched concurrently under one overall deadline. Sources
+        that did not answer in time, failed or whose circuit is open are returned
+        empty and flagged as such.
+        """
+
+        calls = {
+            api_name: functools.partial(
+                self._search_api,
+                api_name=api_name,
+                filters=filters,
                 page=page,
                 max_per_page=max_per_page,
             )
+            for api_name in list(Apis)
+        }
+        outcomes = Parallel.run(calls=calls, timeout=Service.EXTERNAL_SEARCH_DEADLINE)
 
-            book_items = []
-            for book_item in book_results.items:
-                book_info = BookInfo(
-                    original_source=book_results.source,
-                    external_id=book_item.id,
-                    **book_item.book_info.dict(),
-                )
-                book_items.append(book_info)
+        books = []
+        for api_name, outcome in outcomes.items():
+            if outcome.done and not outcome.error:
+                books.append(outcome.result)
+                continue
 
+            if outcome.error and not isinstance(outcome.error, UpstreamError):
+                raise outcome.error
+
+            logger.warning(
+                f"Search on {api_name.value} skipped - timed out: {outcome.timed_out} - error: {outcome.error}"
+            )
             books.append(
                 PaginatedBookResults(
-                    items=book_items, **book_results.dict(exclude={"items"})
+                    total_items=0,
+                    items=[],
+                    page=page,
+                    pages=0,
+                    max_per_page=max_per_page,
+                    source=api_name.value,
+                    timed_out=outcome.timed_out,
+                    circuit_open=isinstance(outcome.error, CircuitOpenError),
+                    failed=outcome.error is not None,
                 ).dict()
             )
+
         return books
 
+    def _search_api(
+        self,
+        api_name: Apis,
+        filters: dict,
+        page: int,
+        max_per_page: int,
+    ) -> dict:
+        """Search books on a single api"""
+
+        book_action = BooksAction(
+            api_name=api_name, api_key=getattr(Service, f"{api_name.value}_API_KEY", "")
+        )
+        book_results = book_action.search(
+            filters=BookSearchFilters(**filters),
+            page=page,
+            max_per_page=max_per_page,
+        )
+
+        book_items = []
+        for book_item in book_results.items:
+            book_info = BookInfo(
+                original_source=book_results.source,
+                external_id=book_item.id,
+                **book_item.book_info.dict(),
+            )
+            book_items.append(book_info)
+
+        return PaginatedBookResults(
+            items=book_items, **book_results.dict(exclude={"items"})
+        ).dict()
+
     def get(
         self, book_id: str, source: BookSource, obj: Types.OptionalBool = False
     ) -> typing.Union[dict, BookInfo, None]:
         """Get book"""
 
         if source == BookSource.INTERNAL:
-            book_model_info = BookModel.get_by_id(_id=book_id)
+            book_model = BookModel.get_by_id(_id=book_id)
 
-            if not book_model_info:
+            if not book_model:
                 return None
 
-            book_info_list = self._book_model_to_dict(
-                compound_book_items=[book_model_info]
-            )
+            book_info_list = self._book_model_to_dict(book_models=[book_model])
             if book_info_list:
                 return book_info_list[0].dict()
 
@@ -179,52 +328,131 @@ class Books:
 
         return book_info
 
-    def save(self, book_payload: BookPayload) -> dict:
-        """Save Book"""
+    def suggest(self, book_suggest_payload: BookSuggestPayload) -> list[dict]:
+        """Titles, author names and category names starting with a prefix
 
-        book_info = self._get_book_info(book_payload=book_payload)
+        Served from the in-memory suggestions of the worker, the external
+        sources are never called.
+        """
 
-        book_model = Book(**book_info.dict(exclude={"id"})).to_model()
-        book_model.save()
+        return [
+            BookSuggestion(text=text, kind=kind, books=books).dict()
+            for text, kind, books in suggest_index.suggest(
+                prefix=book_suggest_payload.prefix, limit=book_suggest_payload.limit
+            )
+        ]
 
-        authors_names = book_info.authors
-        categories_names = book_info.categories
+    def lookup(self, book_lookup_payload: BookLookupPayload) -> list[dict]:
+        """Get many external books at once
 
-        for author_name in authors_names:
-            author_model = AuthorModel.get_by_name(name=author_name, obj=True)
+        References are grouped by source and every source is resolved
+        concurrently under Service.LOOKUP_DEADLINE. Results keep the order of
+        the payload, books not found, failed or timed out are returned empty.
+        """
 
-            if not author_model:
-                author_model = AuthorModel(name=author_name)
-                author_model.save()
+        book_ids = {}
+        for book_reference in book_lookup_payload.items:
+            book_ids.setdefault(book_reference.source, []).append(
+                book_reference.external_id
+            )
 
-            book_author_model = BookAuthorModel.get_by_ids(
-                book_id=book_model.id, author_id=author_model.id, obj=True
+        calls = {
+            source: functools.partial(
+                self._lookup_api, api_name=Apis(source), book_ids=source_book_ids
             )
+            for source, source_book_ids in book_ids.items()
+        }
+        outcomes = Parallel.run(calls=calls, timeout=Service.LOOKUP_DEADLINE)
 
-            if not book_author_model:
-                book_author_model = BookAuthorModel(
-                    book_id=book_model.id, author_id=author_model.id
+        for source, outcome in outcomes.items():
+            if outcome.error and not isinstance(outcome.error, UpstreamError):
+                raise outcome.error
+
+            if outcome.error or outcome.timed_out:
+                logger.warning(
+                    f"Lookup on {source} skipped - timed out: {outcome.timed_out} - error: {outcome.error}"
                 )
-                book_author_model.save()
 
-        for category_name in categories_names:
-            category_model = CategoryModel.get_by_name(name=category_name, obj=True)
+        results = []
+        for book_reference in book_lookup_payload.items:
+            outcome = outcomes[book_reference.source]
+            books = outcome.result or {}
+            results.append(
+                BookLookupResult(
+                    book=books.get(book_reference.external_id),
+                    timed_out=outcome.timed_out,
+                    failed=outcome.error is not None,
+                    **book_reference.dict(),
+                ).dict()
+            )
+
+        return results
+
+    def _lookup_api(
+        self, api_name: Apis, book_ids: list[str]
+    ) -> dict[str, typing.Optional[BookInfo]]:
+        """Get many books on a single api"""
 
-            if not category_model:
-                category_model = CategoryModel(name=category_name)
-                category_model.save()
+        book_action = BooksAction(
+            api_name=api_name, api_key=getattr(Service, f"{api_name.value}_API_KEY", "")
+        )
+        book_items = book_action.get_many(book_ids=book_ids)
 
-            book_category_model = BookCategoryModel.get_by_ids(
-                book_id=book_model.id, category_id=category_model.id, obj=True
+        return {
+            book_id: BookInfo(
+                external_id=book_item.id,
+                original_source=api_name.value,
+                **book_item.book_info.dict(),
             )
+            if book_item
+            else None
+            for book_id, book_item in book_items.items()
+        }
 
-            if not book_category_model:
-                book_category_model = BookCategoryModel(
-                    book_id=book_model.id, category_id=category_model.id
-                )
-                book_category_model.save()
+    def save(self, book_payload: BookPayload) -> tuple[dict, bool]:
+        """Save Book
+
+        External books already saved are returned as stored, without calling
+        their source. Concurrent saves of the same external book are merged by
+        the unique (original_source, external_id) key.
+
+        Returns:
+            tuple[dict, bool]: The book saved and whether it was created.
+        """
+
+        if book_payload.source != BookSource.INTERNAL.value:
+            book_model = BookModel.get_by_external_id(
+                source=book_payload.source, external_id=book_payload.external_id
+            )
+            if book_model:
+                return self._book_model_to_dict(book_models=[book_model])[0].dict(), False
+
+        book_info = self._get_book_info(book_payload=book_payload)
+
+        if book_payload.source == BookSource.INTERNAL.value:
+            book_model = Book(**book_info.dict(exclude={"id"})).to_model()
+            book_model.save_with_names(
+                authors=book_info.authors, categories=book_info.categories
+            )
+
+            return BookInfo(id=book_model.id, **book_info.dict(exclude={"id"})).dict(), True
+
+        # Insert ignoring the key, a concurrent save may have stored it meanwhile.
+        # The source may answer another id (e.g. a redirected work), the one stored is read.
+        created = BookModel.save_many(
+            books=[book_info.dict(exclude={"id", "original_source"})],
+            source=book_payload.source,
+        )
+        book_model = BookModel.get_by_external_id(
+            source=book_payload.source, external_id=book_info.external_id
+        )
+        if not book_model:
+            raise ResourceConflictError(
+                f"Resource {book_info.external_id} of source {book_payload.source} "
+                "was deleted while being saved"
+            )
 
-        return BookInfo(id=book_model.id, **book_info.dict(exclude={"id"})).dict()
+        return self._book_model_to_dict(book_models=[book_model])[0].dict(), bool(created)
 
     def _get_book_info(self, book_payload: BookPayload) -> BookInfo:
         """"""
@@ -248,8 +476,8 @@ class Books:
     def delete(self, book_id: str) -> None:
         """Delete book"""
 
-        book_model_info = BookModel.get_by_id(_id=book_id)
-        if not book_model_info:
+        book_model = BookModel.get_by_id(_id=book_id)
+        if not book_model:
             raise ResourceNotFoundError("Resource not found")
 
-        book_model_info[0].delete()
+        book_model.delete()
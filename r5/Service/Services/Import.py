@@ -0,0 +1,253 @@
+import functools
+import gzip
+import json
+import os
+import time
+import typing
+
+from r5.Framework import Log, Process
+from r5.Framework.Apis import OpenLibrary
+from r5.Framework.Cache import Sqlite
+from r5.Service.Schemas.Books import BookModel, BookSource
+
+logger = Log.get_logger(__name__)
+
+# Dump lines: type, key, revision, last modified and the record as JSON
+WORK_TYPE = "/type/work"
+AUTHOR_TYPE = "/type/author"
+
+# Column sizes of the internal catalogue
+TITLE_SIZE = 300
+PUBLISHED_DATE_SIZE = 30
+PUBLISHER_SIZE = 100
+EXTERNAL_ID_SIZE = 30
+NAME_SIZE = 100
+
+
+def read_record(line: str, record_type: str) -> typing.Optional[dict]:
+    """Record of a dump line, None for other types and broken lines"""
+
+    columns = line.rstrip("\n").split("\t")
+    if len(columns) < 5 or columns[0] != record_type:
+        return None
+
+    try:
+        return json.loads(columns[4])
+    except ValueError:
+        return None
+
+
+def parse_authors(lines: list[str]) -> dict[str, str]:
+    """Author names by author key of a batch of dump lines"""
+
+    names = {}
+    for line in lines:
+        record = read_record(line=line, record_type=AUTHOR_TYPE)
+        if record and record.get("key") and record.get("name"):
+            names[record["key"].split("/")[-1]] = record["name"][:NAME_SIZE]
+
+    return names
+
+
+def parse_works(lines: list[str]) -> list[dict]:
+    """Books of a batch of dump lines, mapped with OpenLibrary.BookItem"""
+
+    books = []
+    for line in lines:
+        record = read_record(line=line, record_type=WORK_TYPE)
+        if not record:
+            continue
+
+        try:
+            book_item = OpenLibrary.BookItem(**record)
+        except ValueError:
+            continue
+
+        if not book_item.title or len(book_item.id) > EXTERNAL_ID_SIZE:
+            continue
+
+        covers = [cover for cover in book_item.covers if not cover.startswith("-")]
+        image = None
+        if covers:
+            image = (
+                f"{OpenLibrary.OpenLibraryApi.COVERS_BASE_URL}/id/{covers[0]}"
+                f"-{OpenLibrary.OpenLibraryApi.COVER_SIZE}.jpg"
+            )
+
+        books.append(
+            dict(
+                external_id=book_item.id,
+                title=book_item.title[:TITLE_SIZE],
+                subtitle=(book_item.subtitle or "")[:TITLE_SIZE] or None,
+                published_date=(book_item.published_date or "")[:PUBLISHED_DATE_SIZE] or None,
+                publisher=(book_item.publisher or "")[:PUBLISHER_SIZE],
+                description=book_item.description,
+                image=image,
+                author_keys=[author_item.author.key for author_item in book_item.author_keys],
+                categories=list(
+                    dict.fromkeys(category[:NAME_SIZE] for category in book_item.categories)
+                ),
+            )
+        )
+
+    return books
+
+
+def count_lines(parser: typing.Callable, lines: list[str]) -> tuple[int, typing.Any]:
+    """Lines of a batch and the batch parsed"""
+
+    return len(lines), parser(lines)
+
+
+class Checkpoint:
+    """Lines of each dump already imported, saved to a JSON file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lines = {}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as checkpoint:
+                self.lines = json.load(checkpoint)
+
+    def get(self, dump: str) -> int:
+        """Lines of a dump already imported"""
+
+        return self.lines.get(os.path.abspath(dump), 0)
+
+    def set(self, dump: str, lines: int) -> None:
+        """Save the lines of a dump imported, atomically"""
+
+        self.lines[os.path.abspath(dump)] = lines
+
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as checkpoint:
+            json.dump(self.lines, checkpoint)
+        os.replace(temporary_path, self.path)
+
+
+class AuthorNames:
+    """Author names by key, in a table of a SQLite file kept for resumes"""
+
+    def __init__(self, path: str):
+        self.connection = Sqlite.connect(path=path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS author_names (key TEXT PRIMARY KEY, name TEXT NOT NULL)"
+        )
+
+    def set_many(self, names: dict[str, str]) -> None:
+        """Save many names by key, in a single transaction"""
+
+        with self.connection:
+            self.connection.execute("BEGIN")
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO author_names (key, name) VALUES (?, ?)", names.items()
+            )
+
+    def get_many(self, keys: typing.Iterable[str]) -> dict[str, str]:
+        """Names of many keys, unknown keys are left out"""
+
+        keys = list(dict.fromkeys(keys))
+        names = {}
+        for start in range(0, len(keys), Sqlite.GET_MANY_BATCH_SIZE):
+            batch = keys[start : start + Sqlite.GET_MANY_BATCH_SIZE]
+            names.update(
+                self.connection.execute(
+                    "SELECT key, name FROM author_names "
+                    f"WHERE key IN ({', '.join('?' * len(batch))})",
+                    batch,
+                )
+            )
+
+        return names
+
+
+class OpenLibraryImport:
+    """Import of the OpenLibrary works and authors dumps into the internal catalogue
+
+    Dumps are streamed in batches of lines parsed by a pool of worker processes,
+    each batch is then saved in a single transaction and recorded in the checkpoint,
+    an interrupted import resumes after the last batch saved.
+    """
+
+    def __init__(self, checkpoint_path: str, workers: int, batch_size: int):
+        """
+        Initializes an instance of the OpenLibraryImport class.
+
+        Args:
+            checkpoint_path (str): JSON file of the lines imported per dump.
+            workers (int): Processes parsing the dump lines.
+            batch_size (int): Lines per batch, and per transaction.
+        """
+        self.checkpoint = Checkpoint(path=checkpoint_path)
+        self.workers = workers
+        self.batch_size = batch_size
+
+        # Author names by key, read from the authors dump and kept for resumes
+        self.authors = AuthorNames(path=f"{os.path.splitext(checkpoint_path)[0]}-authors.db")
+
+    def import_authors(self, dump: str) -> None:
+        """Read the author names of an authors dump"""
+
+        for lines, names in self._parse(dump=dump, parser=parse_authors):
+            self.authors.set_many(names=names)
+            self.checkpoint.set(dump=dump, lines=lines)
+
+    def import_works(self, dump: str) -> None:
+        """Save the books of a works dump"""
+
+        saved = 0
+        for lines, books in self._parse(dump=dump, parser=parse_works):
+            names = self.authors.get_many(
+                keys=[key for book in books for key in book["author_keys"]]
+            )
+            for book in books:
+                book["authors"] = [
+                    names[key] for key in book.pop("author_keys") if key in names
+                ]
+
+            saved += BookModel.save_many(books=books, source=BookSource.OPENLIBRARY.value)
+            self.checkpoint.set(dump=dump, lines=lines)
+            logger.info(f"{dump}: {saved} books saved")
+
+    def _parse(
+        self, dump: str, parser: typing.Callable
+    ) -> typing.Iterator[tuple[int, typing.Any]]:
+        """Parse the batches of a dump not imported yet
+
+        Yields the lines read up to the end of each batch and the batch parsed.
+        """
+
+        skip = self.checkpoint.get(dump=dump)
+        if skip:
+            logger.info(f"{dump}: resuming after line {skip}")
+
+        started_at = time.monotonic()
+        lines = skip
+        for batch_lines, batch in Process.imap(
+            func=functools.partial(count_lines, parser),
+            items=self._read(dump=dump, skip=skip),
+            workers=self.workers,
+        ):
+            lines += batch_lines
+            yield lines, batch
+
+            rate = (lines - skip) / max(time.monotonic() - started_at, 1e-6)
+            logger.info(f"{dump}: {lines} lines read ({rate:.0f} lines/s)")
+
+    def _read(self, dump: str, skip: int) -> typing.Iterator[list[str]]:
+        """Batches of lines of a gzipped dump, after the first skip lines"""
+
+        with gzip.open(dump, "rt", encoding="utf-8") as dump_file:
+            batch = []
+            for number, line in enumerate(dump_file):
+                if number < skip:
+                    continue
+
+                batch.append(line)
+                if len(batch) == self.batch_size:
+                    yield batch
+                    batch = []
+
+            if batch:
+                yield batch
@@ -0,0 +1,31 @@
+from r5.Action.Books import Books as BooksAction
+from r5.Framework.Apis import GoogleBooks, OpenLibrary
+from r5.Service.Config import Service
+
+
+class Stats:
+    """Stats service"""
+
+    def __init__(self) -> None:
+        pass
+
+    def get(self) -> dict:
+        """Counters of the current worker"""
+
+        return dict(
+            search_cache=BooksAction.search_cache.stats(),
+            coalescing=dict(
+                GOOGLE=GoogleBooks.flights.stats(),
+                OPENLIBRARY=OpenLibrary.flights.stats(),
+            ),
+            quota=dict(
+                GOOGLE=GoogleBooks.GoogleBooksApi(
+                    api_key=Service.GOOGLE_API_KEY
+                ).limiter.stats(),
+            ),
+            circuits=dict(
+                GOOGLE=GoogleBooks.breaker.stats(),
+                OPENLIBRARY=OpenLibrary.breaker.stats(),
+                OPENLIBRARY_COVERS=OpenLibrary.covers_breaker.stats(),
+            ),
+        )
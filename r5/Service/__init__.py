@@ -1,6 +1,7 @@
 from r5.Service import App
 from r5.Service.Endpoint import (
     Books,
+    Stats,
     Users,
 )
 
@@ -11,10 +12,20 @@ def add_urls(app):
     app.add_url_rule(
         "/books", view_func=Books.Create.as_view("books")
     )
+    app.add_url_rule(
+        "/books/lookup", view_func=Books.Lookup.as_view("books_lookup")
+    )
+    app.add_url_rule(
+        "/books/suggest", view_func=Books.Suggest.as_view("books_suggest")
+    )
     app.add_url_rule(
         "/books/<book_id>",
         view_func=Books.Details.as_view("books_info"),
     )
+    # Stats
+    app.add_url_rule(
+        "/stats", view_func=Stats.Details.as_view("stats")
+    )
     # User
     app.add_url_rule(
         "/register", view_func=Users.Create.as_view("register")
@@ -11,6 +11,7 @@ gevent.monkey.patch_all()
 from r5 import Version
 from r5 import Service
 from r5.Service import Config
+from r5.Framework.Apis import Fake as FakeApis
 from r5.Framework.Helpers import Gunicorn
 
 from r5.Framework import Log, Process
@@ -50,6 +51,8 @@ class Start:
 
         app = Service.setup()
 
+        self.load_indexes(app=app)
+
         # Start Multiples Process
         proc = Process.New()
 
@@ -69,6 +72,24 @@ class Start:
         # Start All
         proc.start()
 
+    @staticmethod
+    def load_indexes(app):
+        """Load the in-memory indexes once, before forking the workers"""
+        from r5.Service.App import db
+        from r5.Service.Schemas.Books import fuzzy_index, search_index, suggest_index
+
+        with app.app_context():
+            suggest_index.sync()
+            fuzzy_index.sync()
+
+            if Config.Service.SEARCH_BACKEND == "memory":
+                search_index.sync()
+                search_index.save()
+
+            # Connections must not be shared with the forked workers
+            db.session.remove()
+            db.engine.dispose()
+
 
 @dataclasses.dataclass
 class Migration:
@@ -88,3 +109,86 @@ class Migration:
 
         logger.info(f"Running migration to {self.to}")
         alembic.config.main(argv=args)
+
+
+@dataclasses.dataclass
+class Import:
+    """R5 - Import OpenLibrary Dumps"""
+
+    works: str
+    authors: str = ""
+    checkpoint: str = ""
+    workers: int = 2
+    batch: int = 1000
+
+    __help__ = dict(
+        works="Works dump (ol_dump_works_*.txt.gz)",
+        authors="Authors dump (ol_dump_authors_*.txt.gz), read first to name the authors of the works",
+        checkpoint="Checkpoint file of the lines imported DEFAULT: <works>.checkpoint",
+        workers=f"Processes parsing the dumps DEFAULT: {workers}",
+        batch=f"Lines per batch and transaction DEFAULT: {batch}",
+    )
+
+    def execute(self):
+        """Execute"""
+        from r5.Service.Services.Import import OpenLibraryImport
+
+        Config.Service.show()
+        app = Service.setup()
+
+        open_library_import = OpenLibraryImport(
+            checkpoint_path=self.checkpoint or f"{self.works}.checkpoint",
+            workers=int(self.workers),
+            batch_size=int(self.batch),
+        )
+
+        with app.app_context():
+            if self.authors:
+                open_library_import.import_authors(dump=self.authors)
+
+            open_library_import.import_works(dump=self.works)
+
+
+@dataclasses.dataclass
+class Fake:  # pylint: disable=too-many-instance-attributes
+    """R5 - Start Fake External APIs"""
+
+    inet: str = "127.0.0.1"
+    port: int = 5050
+    workers: int = 1
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    items: int = 0
+    padding: int = 0
+
+    __help__ = dict(
+        inet=f"Network Address DEFAULT: {inet}",
+        port=f"Network Port DEFAULT: {port}",
+        workers=f"Workers DEFAULT: {workers}",
+        latency=f"Seconds every response is delayed DEFAULT: {latency}",
+        jitter=f"Maximum random seconds added to the latency DEFAULT: {jitter}",
+        error_rate=f"Fraction of requests answered with a 503 DEFAULT: {error_rate}",
+        items=f"Results per search page, 0 serves as many as requested DEFAULT: {items}",
+        padding=f"Characters added to every book description DEFAULT: {padding}",
+    )
+
+    def execute(self):
+        """Execute"""
+        app = FakeApis.setup(
+            latency=float(self.latency),
+            jitter=float(self.jitter),
+            error_rate=float(self.error_rate),
+            items=int(self.items),
+            padding=int(self.padding),
+        )
+
+        opts = dict(
+            bind=f"{self.inet}:{self.port}",
+            workers=self.workers,
+            worker_class="gevent",
+        )
+
+        logger.info(f"Fake external APIs on {opts['bind']}")
+        Gunicorn.App(app, opts).run()
@@ -1 +1 @@
-NUMBER = "0.1.1"
+NUMBER = "0.1.3"
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+import sqlalchemy
+
+# The service reads its settings on import, tests use files of their own
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_directory = tempfile.mkdtemp(prefix="r5-tests-")
+os.environ.setdefault("R5_DRIVER", f"sqlite:///{os.path.join(_directory, 'r5.db')}")
+os.environ.setdefault("R5_CACHE_PATH", os.path.join(_directory, "cache.db"))
+os.environ.setdefault("R5_SEARCH_SNAPSHOT_PATH", os.path.join(_directory, "search-index.json"))
+
+# Imported first like in the service, the actions and the services import each other
+import r5.Service  # pylint: disable=wrong-import-position  # noqa: E402
+from r5.Framework.Helpers.Token import Token  # pylint: disable=wrong-import-position  # noqa: E402
+from r5.Service import App  # pylint: disable=wrong-import-position  # noqa: E402
+from r5.Service.Config import Service  # pylint: disable=wrong-import-position  # noqa: E402
+from r5.Service.Schemas.Base import table_versions  # pylint: disable=wrong-import-position  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app():
+    """Service app, routes are only added once"""
+
+    return r5.Service.setup()
+
+
+@pytest.fixture
+def db(app):  # pylint: disable=redefined-outer-name
+    """Empty database tables, dropped after the test"""
+
+    with app.app_context():
+        App.db.create_all()
+        # Entries cached by earlier tests are read by table versions
+        table_versions.incr(keys=list(App.db.metadata.tables))
+        yield App.db
+        App.db.session.remove()
+        App.db.drop_all()
+
+
+@pytest.fixture
+def full_text(db):  # pylint: disable=redefined-outer-name
+    """Full text tables of SQLite, created by their migration on the database tables"""
+
+    def alembic(*args: str) -> None:
+        subprocess.run(
+            [sys.executable, "-m", "alembic", *args], cwd=_root, check=True, capture_output=True
+        )
+
+    alembic("stamp", "v0.1.2")
+    alembic("upgrade", "v0.1.3")
+    yield db
+    alembic("downgrade", "v0.1.2")
+    with db.engine.begin() as conn:
+        conn.execute(sqlalchemy.text("DROP TABLE version"))
+
+
+@pytest.fixture
+def statements(db) -> list[str]:  # pylint: disable=redefined-outer-name
+    """SQL statements run on the database during the test"""
+
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):  # pylint: disable=unused-argument
+        executed.append(statement)
+
+    sqlalchemy.event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    sqlalchemy.event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def client(app, db):  # pylint: disable=redefined-outer-name,unused-argument
+    """Client of the service, authenticated with a valid token"""
+
+    token = Token(
+        secret=Service.R5_AUTH_JWT_SECRET, data=dict(username="reader", email="reader@r5.local")
+    ).encode()
+
+    client = app.test_client()  # pylint: disable=redefined-outer-name
+    client.environ_base["HTTP_X_TOKEN"] = token
+    return client
@@ -0,0 +1,44 @@
+from r5.Service.Schemas.Books import BookListPayload, BookModel
+from r5.Service.Services.Books import Books
+
+
+def save_books(count: int) -> None:
+    for index in range(count):
+        BookModel(
+            title=f"Book {index}", publisher="Minotauro", description="", original_source="INTERNAL"
+        ).save_with_names(
+            authors=[f"Author {index}", f"Coauthor {index}"],
+            categories=[f"Category {index}", "Fantasy"],
+        )
+
+
+def reading(statements: list[str], table: str) -> list[str]:
+    return [statement for statement in statements if f"FROM {table} " in statement]
+
+
+def test_names_of_a_page_are_read_once_per_table(statements):
+    save_books(count=12)
+
+    for max_per_page in (2, 12):
+        del statements[:]
+        books = Books().list_(
+            filters={}, book_list_payload=BookListPayload(max_per_page=max_per_page)
+        )[0]["items"]
+
+        assert len(books) == max_per_page
+        assert books[-1]["authors"] == [f"Author {max_per_page - 1}", f"Coauthor {max_per_page - 1}"]
+        assert sorted(books[-1]["categories"]) == [f"Category {max_per_page - 1}", "Fantasy"]
+        # One query per name table, no row per author x category of each book
+        assert len(reading(statements, table="book_authors")) == 1
+        assert len(reading(statements, table="book_categories")) == 1
+
+
+def test_names_of_many_books_are_read_in_batches(statements, monkeypatch):
+    save_books(count=5)
+    monkeypatch.setattr("r5.Service.Schemas.Books.IN_BATCH_SIZE", 2)
+
+    del statements[:]
+    authors = BookModel.get_authors(book_ids=[1, 2, 3, 4, 5])
+
+    assert len(statements) == 3
+    assert authors[5] == ["Author 4", "Coauthor 4"]
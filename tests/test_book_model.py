@@ -0,0 +1,54 @@
+import pytest
+
+from r5.Service.Indexes.Books import BookSuggestIndex
+from r5.Service.Schemas import Books
+from r5.Service.Schemas.Books import BookModel
+
+
+def book(title: str) -> BookModel:
+    return BookModel(title=title, publisher="Minotauro", original_source="INTERNAL")
+
+
+@pytest.fixture
+def failing_index(db, monkeypatch) -> BookSuggestIndex:  # pylint: disable=unused-argument
+    """Suggestions built, then failing on every update and removal"""
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("index failure")
+
+    index = BookSuggestIndex(book_model=BookModel, max_keys=1000)
+    index.suggest(prefix="a", limit=1)
+    monkeypatch.setattr(index, "update", fail)
+    monkeypatch.setattr(index, "remove", fail)
+    monkeypatch.setattr(Books, "suggest_index", index)
+    return index
+
+
+def test_committed_writes_stand_when_the_indexes_fail(failing_index):
+    book_model = book(title="The Hobbit")
+    book_model.save()
+
+    assert BookModel.get_by_id(_id=book_model.id).title == "The Hobbit"
+    assert failing_index.index is None
+
+    failing_index.suggest(prefix="hob", limit=1)
+    book_model.delete()
+
+    assert BookModel.get_by_id(_id=book_model.id) is None
+    assert failing_index.index is None
+
+
+def test_deleted_books_leave_no_links(db):
+    book_model = book(title="The Hobbit")
+    book_model.save_with_names(authors=["Tolkien"], categories=["Fantasy"])
+    book_id = book_model.id
+
+    book_model.delete()
+
+    # SQLite reuses the id of the last book, the next one must not inherit its links
+    reused = book(title="Dune")
+    reused.save_with_names(authors=["Herbert"], categories=["Science Fiction"])
+
+    assert reused.id == book_id
+    assert BookModel.get_authors(book_ids=[book_id]) == {book_id: ["Herbert"]}
+    assert BookModel.get_categories(book_ids=[book_id]) == {book_id: ["Science Fiction"]}
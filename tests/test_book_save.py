@@ -0,0 +1,71 @@
+import pytest
+import sqlalchemy
+
+from r5.Service.Schemas import Books
+from r5.Service.Schemas.Authors import AuthorModel
+from r5.Service.Schemas.Base import ErrOnSave
+from r5.Service.Schemas.Books import BookModel
+from r5.Service.Schemas.BooksAuthors import BookAuthorModel
+from r5.Service.Schemas.BooksCategories import BookCategoryModel
+from r5.Service.Schemas.Categories import CategoryModel
+
+AUTHORS = [f"Author {number}" for number in range(10)]
+CATEGORIES = [f"Category {number}" for number in range(10)]
+
+
+def book(title: str) -> BookModel:
+    return BookModel(title=title, publisher="Minotauro", description="", original_source="INTERNAL")
+
+
+def run_on(statements: list[str], table: str) -> list[str]:
+    """Statements reading or writing a table"""
+
+    return [sql for sql in statements if f"FROM {table} " in sql or f"INTO {table} " in sql]
+
+
+@pytest.fixture
+def commits(db) -> list[bool]:
+    """Transactions committed on the database during the test"""
+
+    committed = []
+
+    def commit(conn):  # pylint: disable=unused-argument
+        committed.append(True)
+
+    sqlalchemy.event.listen(db.engine, "commit", commit)
+    yield committed
+    sqlalchemy.event.remove(db.engine, "commit", commit)
+
+
+def test_a_book_is_saved_in_one_transaction(statements, commits):
+    AuthorModel(name="Author 0").save()
+    del statements[:], commits[:]
+
+    book_model = book("The Hobbit")
+    book_model.save_with_names(authors=AUTHORS, categories=CATEGORIES)
+
+    assert len(commits) == 1
+    # Names are found, the missing ones inserted and read back, whatever their number
+    assert len(run_on(statements, table="authors")) == 3
+    assert len(run_on(statements, table="categories")) == 3
+    assert len(run_on(statements, table="book_authors")) == 1
+    assert len(run_on(statements, table="book_categories")) == 1
+    assert BookModel.get_authors(book_ids=[book_model.id]) == {book_model.id: AUTHORS}
+    assert BookModel.get_categories(book_ids=[book_model.id]) == {book_model.id: CATEGORIES}
+
+
+def test_a_failed_save_leaves_nothing_behind(db, monkeypatch):
+    original = Books.insert_ignore
+
+    def insert_ignore(model, rows):
+        if model is BookCategoryModel:
+            raise RuntimeError("links failure")
+        original(model, rows)
+
+    monkeypatch.setattr(Books, "insert_ignore", insert_ignore)
+
+    with pytest.raises(ErrOnSave):
+        book("The Hobbit").save_with_names(authors=AUTHORS, categories=CATEGORIES)
+
+    for model in (BookModel, AuthorModel, BookAuthorModel, CategoryModel, BookCategoryModel):
+        assert db.session.query(model).count() == 0
@@ -0,0 +1,91 @@
+import pytest
+import sqlalchemy
+
+from r5.Service.Schemas.Books import BookInfo, BookModel, BookPayload, BookSource
+from r5.Service.Services.Books import Books
+
+
+def book_info(external_id: str) -> BookInfo:
+    return BookInfo(
+        title="The Hobbit",
+        publisher="Allen & Unwin",
+        description="",
+        authors=["J. R. R. Tolkien"],
+        categories=["Fantasy"],
+        original_source=BookSource.OPENLIBRARY.value,
+        external_id=external_id,
+    )
+
+
+@pytest.fixture
+def calls() -> list[dict]:
+    """Calls made to the source of the book service"""
+
+    return []
+
+
+@pytest.fixture
+def book_service(db, monkeypatch, calls) -> Books:  # pylint: disable=unused-argument,redefined-outer-name
+    """Book service whose source answers OL1W for every id"""
+
+    def get(**kwargs) -> BookInfo:
+        calls.append(kwargs)
+        return book_info(external_id="OL1W")
+
+    book_service = Books()  # pylint: disable=redefined-outer-name
+    monkeypatch.setattr(book_service, "get", get)
+    return book_service
+
+
+def test_saved_external_books_are_returned_without_calling_their_source(book_service, calls):
+    book_payload = BookPayload(source=BookSource.OPENLIBRARY.value, external_id="OL1W")
+
+    book, created = book_service.save(book_payload=book_payload)
+    again, created_again = book_service.save(book_payload=book_payload)
+
+    assert created and not created_again
+    assert again == book
+    assert len(calls) == 1
+    assert BookModel.query.count() == 1
+
+
+def test_concurrent_saves_of_an_external_book_store_it_once(db, book_service):
+    book_payload = BookPayload(source=BookSource.OPENLIBRARY.value, external_id="OL1W")
+    concurrent = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):  # pylint: disable=unused-argument
+        # Another process stores the book between the existence check and the insert
+        if statement.startswith("INSERT OR IGNORE INTO books") and not concurrent:
+            with db.engine.begin() as other:
+                concurrent.append(
+                    other.execute(
+                        BookModel.__table__.insert().values(
+                            title="The Hobbit",
+                            publisher="Allen & Unwin",
+                            description="",
+                            original_source=BookSource.OPENLIBRARY.value,
+                            external_id="OL1W",
+                        )
+                    ).inserted_primary_key[0]
+                )
+
+    sqlalchemy.event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        book, created = book_service.save(book_payload=book_payload)
+    finally:
+        sqlalchemy.event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+    assert not created
+    assert book["id"] == concurrent[0]
+    assert BookModel.query.count() == 1
+
+
+def test_redirected_external_books_are_saved_by_the_id_answered(book_service):
+    book_payload = BookPayload(source=BookSource.OPENLIBRARY.value, external_id="OL2W")
+
+    book, created = book_service.save(book_payload=book_payload)
+    again, created_again = book_service.save(book_payload=book_payload)
+
+    assert created and not created_again
+    assert book["external_id"] == again["external_id"] == "OL1W"
+    assert book["id"] == again["id"]
@@ -0,0 +1,104 @@
+import pytest
+
+from r5.Action.Books import Apis, Books, BookSearchFilters
+from r5.Framework import Cache
+from r5.Framework.Apis import GoogleBooks, Http, RateLimit
+from r5.Framework.Apis.Errors import UpstreamError
+from r5.Service.Config import Service
+
+FILTERS = BookSearchFilters(title="hobbit")
+
+
+class Response:
+    """Response of the fake HTTP client"""
+
+    def __init__(self, status_code: int, data: dict):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self) -> dict:
+        return self.data
+
+    def close(self) -> None:
+        pass
+
+
+class Client:
+    """HTTP client answering the same response to every request"""
+
+    def __init__(self, status_code: int, data: dict):
+        self.response = Response(status_code=status_code, data=data)
+        self.urls = []
+
+    def get(self, url: str, read_timeout: float = None, **kwargs) -> Response:
+        self.urls.append(url)
+        return self.response
+
+
+class Api:
+    """Api returning the results of the searches given, in order"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.searches = 0
+
+    def search_books(self, filters, page: int, max_per_page: int):
+        self.searches += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+
+@pytest.fixture
+def action(monkeypatch) -> Books:
+    monkeypatch.setattr(Books, "search_cache", Cache.TTLCache(max_size=10, ttl=60))
+    return Books(api_name=Apis.GOOGLE, api_key="key")
+
+
+def google_results(titles: list[str]) -> GoogleBooks.BookSearchResults:
+    return GoogleBooks.BookSearchResults(
+        page=1,
+        max_per_page=10,
+        totalItems=len(titles),
+        items=[dict(id=title, volumeInfo=dict(title=title)) for title in titles],
+    )
+
+
+def test_background_refreshes_use_the_bulk_priority(action):
+    assert action.api.priority == RateLimit.Priority.INTERACTIVE
+    assert action.background_api.priority == RateLimit.Priority.BULK
+
+
+def test_failed_searches_are_not_cached(action):
+    action.api = Api(UpstreamError("GOOGLE answered 403"), google_results(["The Hobbit"]))
+
+    with pytest.raises(UpstreamError):
+        action.search(filters=FILTERS, page=1, max_per_page=10)
+    assert len(action.search_cache) == 0
+
+    results = action.search(filters=FILTERS, page=1, max_per_page=10)
+    results = action.search(filters=FILTERS, page=1, max_per_page=10)
+
+    assert [item.book_info.title for item in results.items] == ["The Hobbit"]
+    assert action.api.searches == 2
+
+
+def test_google_non_200_answers_are_failures():
+    client = Client(status_code=403, data=dict(error=dict(message="Daily limit exceeded")))
+    api = GoogleBooks.GoogleBooksApi(api_key="key", client=client)
+
+    with pytest.raises(UpstreamError, match="403"):
+        api.search_books(filters=GoogleBooks.BookSearchFilters(title="hobbit"), page=1, max_per_page=10)
+    assert len(client.urls) == 1
+
+
+def test_http_clients_use_the_service_settings():
+    client = Http.shared()
+
+    assert Http.settings.read_timeout == Service.HTTP_READ_TIMEOUT
+    assert client.timeout == (Service.HTTP_CONNECT_TIMEOUT, Service.HTTP_READ_TIMEOUT)
+
+    with pytest.raises(ValueError):
+        Http.configure(pool_sizes=1)
@@ -0,0 +1,45 @@
+import gevent
+import pytest
+
+from r5.Framework.Apis import Breaker, Http
+from r5.Framework.Apis.Errors import CircuitOpenError
+
+
+class Response:
+    status_code = 200
+
+
+def slow_request(seconds: float):
+    def request(read_timeout: float) -> Response:
+        gevent.sleep(seconds)
+        return Response()
+
+    return request
+
+
+def test_calls_killed_at_the_deadline_open_the_circuit():
+    breaker = Breaker.CircuitBreaker(name="SLOW")
+
+    for _ in range(Breaker.FAILURES):
+        greenlet = gevent.spawn(breaker.call, slow_request(1))
+        greenlet.join(timeout=0.02)
+        greenlet.kill()
+        assert isinstance(greenlet.value, gevent.GreenletExit)
+
+    assert breaker.state == Breaker.State.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(slow_request(0))
+
+
+def test_killed_calls_feed_the_adaptive_timeout():
+    breaker = Breaker.CircuitBreaker(name="SLOW")
+    for _ in range(Breaker.WINDOW_MIN_SIZE):
+        breaker.call(slow_request(0))
+    fast_timeout = breaker.read_timeout()
+
+    with pytest.raises(gevent.Timeout):
+        with gevent.Timeout(0.4):
+            breaker.call(slow_request(1))
+
+    assert fast_timeout == Breaker.TIMEOUT_MIN
+    assert Breaker.TIMEOUT_MIN < breaker.read_timeout() <= Http.settings.read_timeout
@@ -0,0 +1,47 @@
+from r5.Service.Schemas.Base import table_versions
+from r5.Service.Schemas.Books import BookModel
+
+
+def book(title: str) -> BookModel:
+    return BookModel(title=title, publisher="Minotauro", description="", original_source="INTERNAL")
+
+
+def count(statements: list[str]) -> tuple[int, int]:
+    """Books counted and statements run to count them"""
+
+    del statements[:]
+    total, approximate = BookModel.count_by_filters()
+    assert not approximate
+    return total, len(statements)
+
+
+def test_counts_are_cached_until_a_book_is_written(statements):
+    book("The Hobbit").save_with_names(authors=["Tolkien"], categories=["Fantasy"])
+
+    assert count(statements)[0] == 1
+    assert count(statements) == (1, 0)
+
+    dune = book("Dune")
+    dune.save()
+    assert count(statements)[0] == 2
+
+    dune.delete()
+    assert count(statements)[0] == 1
+    assert count(statements) == (1, 0)
+
+
+def test_counts_follow_the_writes_of_other_processes(db, statements):
+    book("The Hobbit").save()
+    assert count(statements)[0] == 1
+
+    # Another process bumps the versions of the tables it writes
+    with db.engine.begin() as conn:
+        conn.execute(
+            BookModel.__table__.insert().values(
+                title="Dune", publisher="Ace", original_source="INTERNAL"
+            )
+        )
+    assert count(statements) == (1, 0)
+
+    table_versions.incr(keys=["books"])
+    assert count(statements)[0] == 2
@@ -0,0 +1,47 @@
+from r5.Service.Schemas.Books import BookModel
+
+
+def save(title: str) -> BookModel:
+    book_model = BookModel(
+        title=title, publisher="Minotauro", description="", original_source="INTERNAL"
+    )
+    book_model.save_with_names(authors=["Tolkien"], categories=["Fantasy"])
+    return book_model
+
+
+def get_page(client, cursor: str = "") -> tuple[list[str], str]:
+    response = client.get("/books", query_string=dict(cursor=cursor, max_per_page=2))
+    assert response.status_code == 200
+
+    page = response.json["data"][0]
+    return [book["title"] for book in page["items"]], page["next_cursor"]
+
+
+def test_pages_are_stable_across_writes(client):
+    books = [save(title=f"Book {index}") for index in range(1, 6)]
+
+    titles, cursor = get_page(client)
+    assert titles == ["Book 1", "Book 2"]
+
+    # Books read or added meanwhile do not shift the next pages
+    books[0].delete()
+    save(title="Book 6")
+
+    titles, cursor = get_page(client, cursor=cursor)
+    assert titles == ["Book 3", "Book 4"]
+
+    assert get_page(client, cursor=cursor) == (["Book 5", "Book 6"], None)
+
+
+def test_last_page_has_no_cursor(client):
+    save(title="Book 1")
+
+    assert get_page(client) == (["Book 1"], None)
+
+
+def test_invalid_cursors_are_bad_requests(client):
+    save(title="Book 1")
+
+    for cursor in ("not-a-cursor", "eyJpZCI6ICJ4In0"):  # the last one is {"id": "x"}
+        response = client.get("/books", query_string=dict(cursor=cursor))
+        assert response.status_code == 400
@@ -0,0 +1,37 @@
+import pytest
+
+from r5.Service.Schemas.Books import BookModel, InvalidFacetError
+
+
+def save(title: str, published_date: str, authors: list[str], categories: list[str]) -> BookModel:
+    book_model = BookModel(
+        title=title, publisher="Minotauro", published_date=published_date, original_source="INTERNAL"
+    )
+    book_model.save_with_names(authors=authors, categories=categories)
+    return book_model
+
+
+def test_facets_count_the_books_left(db):  # pylint: disable=unused-argument
+    save(title="The Hobbit", published_date="1937-09-21", authors=["Tolkien"], categories=["Fantasy"])
+    save(title="Farmer Giles", published_date="c1949", authors=["Tolkien"], categories=["Fantasy"])
+    save(title="Smith", published_date="May 1967", authors=["Tolkien"], categories=["Fantasy"])
+    save(title="Letters", published_date="unknown", authors=["Tolkien"], categories=["Letters"])
+    dune = save(title="Dune", published_date="1965", authors=["Herbert"], categories=["Fantasy"])
+
+    facets = ["category", "author", "year", "publisher"]
+    assert BookModel.get_facets(facets=facets)["author"] == [("Tolkien", 4), ("Herbert", 1)]
+
+    # Links of the book are left on SQLite, its foreign keys are not enforced
+    dune.delete()
+
+    assert BookModel.get_facets(facets=facets) == {
+        "author": [("Tolkien", 4)],
+        "category": [("Fantasy", 3), ("Letters", 1)],
+        "publisher": [("Minotauro", 4)],
+        "year": [("1937", 1), ("1949", 1), ("1967", 1)],
+    }
+
+
+def test_unknown_facets_are_rejected():
+    with pytest.raises(InvalidFacetError):
+        BookModel.get_facets(facets=["category", "colour"])
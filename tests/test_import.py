@@ -0,0 +1,25 @@
+from r5.Framework.Cache import Sqlite
+from r5.Service.Services.Import import AuthorNames, parse_authors
+
+
+def test_author_names_are_kept_across_runs(tmp_path):
+    path = str(tmp_path / "works-authors.db")
+    keys = [f"OL{number}A" for number in range(Sqlite.GET_MANY_BATCH_SIZE + 10)]
+
+    AuthorNames(path=path).set_many(names={key: f"Author {key}" for key in keys})
+    AuthorNames(path=path).set_many(names={"OL1A": "Renamed"})
+
+    names = AuthorNames(path=path).get_many(keys=keys + ["OL0W"])
+    assert len(names) == len(keys)
+    assert names["OL0A"] == "Author OL0A"
+    assert names["OL1A"] == "Renamed"
+
+
+def test_parse_authors_skips_other_lines():
+    lines = [
+        '/type/author\t/authors/OL1A\t1\t2020\t{"key": "/authors/OL1A", "name": "Ursula K. Le Guin"}\n',
+        "/type/author\tbroken\n",
+        '/type/redirect\t/authors/OL2A\t1\t2020\t{"key": "/authors/OL2A"}\n',
+    ]
+
+    assert parse_authors(lines=lines) == {"OL1A": "Ursula K. Le Guin"}
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def alembic(database: str, *args: str) -> None:
+    """Run alembic on a SQLite database file"""
+
+    env = dict(os.environ, R5_DRIVER=f"sqlite:///{database}", R5_CACHE_PATH=f"{database}.cache")
+    subprocess.run(
+        [sys.executable, "-m", "alembic", *args], cwd=ROOT, env=env, check=True, capture_output=True
+    )
+
+
+@pytest.fixture
+def database(tmp_path) -> str:
+    path = str(tmp_path / "r5.db")
+    alembic(path, "upgrade", "head")
+    return path
+
+
+def test_upgrade_head_creates_full_text_tables(database):
+    with sqlite3.connect(database) as conn:
+        tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master")}
+        version = conn.execute("SELECT version_num FROM version").fetchone()
+
+    assert {"books", "authors", "categories", "books_fts", "authors_fts", "categories_fts"} <= tables
+    assert version == ("v0.1.4",)
+
+
+def test_full_text_triggers_follow_writes(database):
+    with sqlite3.connect(database) as conn:
+        conn.execute(
+            "INSERT INTO books (id, title, publisher, original_source) "
+            "VALUES (1, 'El Señor de los Anillos', 'Minotauro', 'INTERNAL')"
+        )
+        match = "SELECT rowid FROM books_fts WHERE books_fts MATCH ?"
+        assert conn.execute(match, ("senor",)).fetchall() == [(1,)]
+
+        conn.execute("UPDATE books SET title = 'El Hobbit' WHERE id = 1")
+        assert conn.execute(match, ("senor",)).fetchall() == []
+        assert conn.execute(match, ("hobbit",)).fetchall() == [(1,)]
+
+        conn.execute("DELETE FROM books WHERE id = 1")
+        assert conn.execute(match, ("hobbit",)).fetchall() == []
+
+
+def test_upgrade_merges_duplicates_before_adding_unique_keys(tmp_path):
+    database = str(tmp_path / "r5.db")
+    alembic(database, "upgrade", "v0.1.1")
+    with sqlite3.connect(database) as conn:
+        conn.execute(
+            "INSERT INTO books (id, title, publisher, original_source, external_id) VALUES "
+            "(1, 'The Hobbit', 'Allen & Unwin', 'OPENLIBRARY', 'OL1W'), "
+            "(2, 'The Hobbit', 'Allen & Unwin', 'OPENLIBRARY', 'OL1W'), "
+            "(3, 'El Hobbit', 'Minotauro', 'INTERNAL', NULL), "
+            "(4, 'El Hobbit', 'Minotauro', 'INTERNAL', NULL)"
+        )
+        conn.execute("INSERT INTO authors (id, name) VALUES (1, 'Tolkien'), (2, 'Tolkien')")
+        conn.execute("INSERT INTO categories (id, name) VALUES (1, 'Fantasy'), (2, 'Fantasy')")
+        conn.execute("INSERT INTO book_authors (book_id, author_id) VALUES (1, 1), (2, 2), (3, 2)")
+        conn.execute("INSERT INTO book_categories (book_id, category_id) VALUES (2, 2), (4, 1)")
+
+    alembic(database, "upgrade", "v0.1.2")
+
+    with sqlite3.connect(database) as conn:
+        # Internal books have no external id, they are never duplicates
+        assert conn.execute("SELECT id FROM books ORDER BY id").fetchall() == [(1,), (3,), (4,)]
+        assert conn.execute("SELECT id FROM authors").fetchall() == [(1,)]
+        assert conn.execute("SELECT id FROM categories").fetchall() == [(1,)]
+        assert conn.execute(
+            "SELECT book_id, author_id FROM book_authors ORDER BY book_id"
+        ).fetchall() == [(1, 1), (3, 1)]
+        assert conn.execute(
+            "SELECT book_id, category_id FROM book_categories ORDER BY book_id"
+        ).fetchall() == [(1, 1), (4, 1)]
+
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO authors (name) VALUES ('Tolkien')")
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO categories (name) VALUES ('Fantasy')")
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(
+                "INSERT INTO books (title, publisher, original_source, external_id) "
+                "VALUES ('The Hobbit', 'Allen & Unwin', 'OPENLIBRARY', 'OL1W')"
+            )
+
+
+def test_upgrade_deletes_the_links_of_deleted_books(tmp_path):
+    database = str(tmp_path / "r5.db")
+    alembic(database, "upgrade", "v0.1.3")
+    with sqlite3.connect(database) as conn:
+        conn.execute(
+            "INSERT INTO books (id, title, publisher, original_source) "
+            "VALUES (1, 'El Hobbit', 'Minotauro', 'INTERNAL')"
+        )
+        conn.execute("INSERT INTO authors (id, name) VALUES (1, 'Tolkien')")
+        conn.execute("INSERT INTO categories (id, name) VALUES (1, 'Fantasy')")
+        conn.execute("INSERT INTO book_authors (book_id, author_id) VALUES (1, 1), (2, 1)")
+        conn.execute("INSERT INTO book_categories (book_id, category_id) VALUES (1, 1), (2, 1)")
+
+    alembic(database, "upgrade", "head")
+
+    with sqlite3.connect(database) as conn:
+        assert conn.execute("SELECT book_id FROM book_authors").fetchall() == [(1,)]
+        assert conn.execute("SELECT book_id FROM book_categories").fetchall() == [(1,)]
+
+
+def test_downgrade_base(database):
+    alembic(database, "downgrade", "base")
+
+    with sqlite3.connect(database) as conn:
+        tables = {
+            name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+
+    assert tables == {"version"}
@@ -0,0 +1,31 @@
+import gevent
+
+from r5.Framework.Helpers import Parallel
+
+
+def test_calls_are_killed_with_the_caller():
+    children, finished = [], []
+
+    def call():
+        children.append(gevent.getcurrent())
+        gevent.sleep(0.2)
+        finished.append(1)
+
+    outer = gevent.spawn(Parallel.run, calls={index: call for index in range(5)}, timeout=1)
+    outer.join(timeout=0.05)
+    outer.kill()
+    gevent.sleep(0.3)
+
+    assert isinstance(outer.value, gevent.GreenletExit)
+    assert len(children) == 5 and all(child.dead for child in children)
+    assert not finished
+
+
+def test_calls_past_the_deadline_are_timed_out():
+    def slow():
+        gevent.sleep(1)
+
+    outcomes = Parallel.run(calls={"fast": lambda: 1, "slow": slow}, timeout=0.05)
+
+    assert outcomes["fast"].done and outcomes["fast"].result == 1
+    assert outcomes["slow"].timed_out
@@ -0,0 +1,85 @@
+import time
+
+import gevent
+import pytest
+
+from r5.Framework.Apis import Breaker, GoogleBooks, RateLimit
+from r5.Framework.Apis.Errors import CircuitOpenError, RateLimitedError
+
+FILTERS = GoogleBooks.BookSearchFilters(title="hobbit")
+
+
+class Response:
+    status_code = 200
+
+    @staticmethod
+    def json() -> dict:
+        return dict(totalItems=0, items=[])
+
+
+class Client:
+    """HTTP client answering an empty search after a delay"""
+
+    def __init__(self, seconds: float = 0):
+        self.seconds = seconds
+        self.urls = []
+
+    def get(self, url: str, read_timeout: float = None, **kwargs) -> Response:
+        self.urls.append(url)
+        gevent.sleep(self.seconds)
+        return Response()
+
+
+@pytest.fixture
+def breaker(monkeypatch) -> Breaker.CircuitBreaker:
+    breaker = Breaker.CircuitBreaker(name="GOOGLE")
+    monkeypatch.setattr(GoogleBooks, "breaker", breaker)
+    return breaker
+
+
+def google_api(tmp_path, client: Client, priority=RateLimit.Priority.INTERACTIVE):
+    api = GoogleBooks.GoogleBooksApi(api_key="key", client=client, priority=priority)
+    api.limiter = RateLimit.TokenBucket(
+        name="GOOGLE:test", rate=0.001, capacity=2, reserve=0, path=str(tmp_path / "rate.db")
+    )
+    return api
+
+
+def test_open_circuit_takes_no_token(tmp_path, breaker):
+    api = google_api(tmp_path, client=Client())
+    breaker.state = Breaker.State.OPEN
+    breaker.opened_at = time.monotonic()
+
+    with pytest.raises(CircuitOpenError):
+        api.search_books(filters=FILTERS, page=1, max_per_page=10)
+    assert api.limiter.stats()["consumed"] == 0
+
+    breaker.opened_at -= Breaker.RESET_TIMEOUT
+    api.search_books(filters=FILTERS, page=1, max_per_page=10)
+    assert api.limiter.stats()["consumed"] == 1
+    assert breaker.state == Breaker.State.CLOSED
+
+
+def test_rate_limited_probe_lets_another_through(tmp_path, breaker):
+    api = google_api(tmp_path, client=Client())
+    api.RATE_WAIT = 0
+    api.limiter.capacity = 0
+    breaker.state = Breaker.State.HALF_OPEN
+
+    with pytest.raises(RateLimitedError):
+        api.search_books(filters=FILTERS, page=1, max_per_page=10)
+    assert not breaker.is_open()
+
+
+def test_priorities_are_not_coalesced(tmp_path, breaker):  # pylint: disable=unused-argument
+    client = Client(seconds=0.05)
+    bulk = google_api(tmp_path, client=client, priority=RateLimit.Priority.BULK)
+    interactive = google_api(tmp_path, client=client)
+
+    searches = [
+        gevent.spawn(api.search_books, filters=FILTERS, page=1, max_per_page=10)
+        for api in (bulk, interactive, interactive)
+    ]
+    gevent.joinall(searches, raise_error=True)
+
+    assert len(client.urls) == 2
@@ -0,0 +1,39 @@
+from r5.Service.Config import Service
+from r5.Service.Schemas.Books import BookModel
+
+
+def save(title: str, authors: list[str]) -> int:
+    book_model = BookModel(
+        title=title, publisher="Minotauro", description="", original_source="INTERNAL"
+    )
+    book_model.save_with_names(authors=authors, categories=[])
+    return book_model.id
+
+
+def ranked(filters: dict, page: int = 1, max_per_page: int = 10) -> list[int]:
+    results = BookModel.get_all_by_filters(page=page, max_per_page=max_per_page, filters=filters)
+    return [book_model.id for book_model in results.items]
+
+
+def test_filtered_books_are_ordered_by_relevance_then_id(full_text):  # pylint: disable=unused-argument
+    children = save("Children of Dune", authors=["Frank Herbert"])
+    dune = save("Dune", authors=["Frank Herbert"])
+    save("The Hobbit", authors=["J. R. R. Tolkien"])
+    again = save("Dune", authors=["Brian Herbert"])
+
+    # Both Dune score the same, the first saved comes first on every page
+    assert ranked(filters=dict(title="dune")) == [dune, again, children]
+    assert ranked(filters=dict(title="dune"), max_per_page=2) == [dune, again]
+    assert ranked(filters=dict(title="dune"), page=2, max_per_page=2) == [children]
+
+
+def test_relevance_weights_the_score_of_each_filter(full_text, monkeypatch):  # pylint: disable=unused-argument
+    dune = save("Dune", authors=["Brian Herbert Junior"])
+    children = save("Children of Dune", authors=["Herbert"])
+    filters = dict(title="dune", author="herbert")
+
+    monkeypatch.setattr(Service, "SEARCH_WEIGHTS", dict(title=1.0, author=0.0))
+    assert ranked(filters=filters) == [dune, children]
+
+    monkeypatch.setattr(Service, "SEARCH_WEIGHTS", dict(title=0.0, author=1.0))
+    assert ranked(filters=filters) == [children, dune]
@@ -0,0 +1,58 @@
+import os
+import pickle
+
+from r5.Framework import Search
+
+FIELDS = ("title", "author")
+
+
+def build_index() -> Search.InvertedIndex:
+    index = Search.InvertedIndex(fields=FIELDS)
+    index.meta = dict(source="sqlite://", last_id=3)
+    index.add(doc_id=1, document=dict(title="El Señor de los Anillos", author="J. R. R. Tolkien"))
+    index.add(doc_id=2, document=dict(title="El Hobbit", author="J. R. R. Tolkien"))
+    index.add(doc_id=3, document=dict(title="Anillos y anillos", author="Anónimo"))
+    return index
+
+
+def test_search_ranks_every_field():
+    index = build_index()
+
+    assert [doc_id for doc_id, _ in index.search(query=dict(title="anillos"))] == [3, 1]
+    assert index.search(query=dict(title="anillos", author="tolkien"))[0][0] == 1
+    assert index.search(query=dict(title="dragon")) == []
+
+
+def test_snapshot_round_trip(tmp_path):
+    index = build_index()
+    path = str(tmp_path / "r5" / "search-index.json")
+    index.save(path=path)
+
+    loaded = Search.InvertedIndex.load(path=path)
+
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert loaded.meta == index.meta
+    assert sorted(loaded.ids()) == [1, 2, 3]
+    for query in (dict(title="anillos"), dict(author="tolkien"), dict(title="hobbit", author="tolkien")):
+        assert loaded.search(query=query) == index.search(query=query)
+
+    loaded.remove(doc_id=1)
+    assert [doc_id for doc_id, _ in loaded.search(query=dict(title="anillos"))] == [3]
+
+
+def test_snapshot_writable_by_others_is_ignored(tmp_path):
+    path = str(tmp_path / "search-index.json")
+    build_index().save(path=path)
+    os.chmod(path, 0o666)
+
+    assert Search.InvertedIndex.load(path=path) is None
+
+
+def test_snapshot_pickle_is_not_loaded(tmp_path):
+    path = str(tmp_path / "search-index.json")
+    with open(path, "wb") as snapshot:
+        pickle.dump(build_index(), snapshot)
+    os.chmod(path, 0o600)
+
+    assert Search.InvertedIndex.load(path=path) is None
+    assert Search.InvertedIndex.load(path=str(tmp_path / "missing.json")) is None
@@ -0,0 +1,60 @@
+import gevent
+
+from r5.Framework.Helpers import Parallel, SingleFlight
+
+
+def slow_call(calls: list, seconds: float):
+    """Call sleeping before returning how many times it ran"""
+
+    def call():
+        calls.append(1)
+        gevent.sleep(seconds)
+        return len(calls)
+
+    return call
+
+
+def test_concurrent_calls_are_coalesced():
+    group = SingleFlight.Group()
+    calls = []
+
+    greenlets = [gevent.spawn(group.do, "key", slow_call(calls, 0.05)) for _ in range(3)]
+    gevent.joinall(greenlets)
+
+    assert [greenlet.value for greenlet in greenlets] == [1, 1, 1]
+    assert group.stats() == dict(in_flight=0, calls=1, coalesced=2)
+
+
+def test_waiter_runs_the_call_again_when_the_leader_is_killed():
+    group = SingleFlight.Group()
+    calls = []
+    call = slow_call(calls, 0.2)
+
+    def search(timeout: float) -> Parallel.Outcome:
+        return Parallel.run(calls={"api": lambda: group.do("key", call)}, timeout=timeout)["api"]
+
+    leader = gevent.spawn(search, 0.05)
+    gevent.sleep(0.01)
+    follower = gevent.spawn(search, 1)
+    gevent.joinall([leader, follower])
+
+    assert leader.value.timed_out
+    assert follower.value.done and follower.value.error is None
+    assert follower.value.result == 2
+    assert group.stats() == dict(in_flight=0, calls=2, coalesced=1)
+
+
+def test_waiter_times_out_on_its_own_deadline():
+    group = SingleFlight.Group()
+    call = slow_call([], 0.2)
+
+    def search(timeout: float) -> Parallel.Outcome:
+        return Parallel.run(calls={"api": lambda: group.do("key", call)}, timeout=timeout)["api"]
+
+    leader = gevent.spawn(search, 1)
+    gevent.sleep(0.01)
+    follower = gevent.spawn(search, 0.05)
+    gevent.joinall([leader, follower])
+
+    assert follower.value.timed_out
+    assert leader.value.result == 1
@@ -0,0 +1,44 @@
+import pytest
+
+from r5.Service.Indexes.Books import BookSuggestIndex
+from r5.Service.Schemas import Books
+from r5.Service.Schemas.Books import AUTHOR, CATEGORY, TITLE, BookModel
+
+
+@pytest.fixture
+def suggest_index(db, monkeypatch) -> BookSuggestIndex:  # pylint: disable=unused-argument
+    index = BookSuggestIndex(book_model=BookModel, max_keys=1000)
+    monkeypatch.setattr(Books, "suggest_index", index)
+    return index
+
+
+def save(title: str, authors: list[str], categories: list[str]) -> BookModel:
+    book_model = BookModel(title=title, publisher="Minotauro", original_source="INTERNAL")
+    book_model.save_with_names(authors=authors, categories=categories)
+    return book_model
+
+
+def test_deleted_books_are_uncounted(suggest_index):
+    hobbit = save(title="The Hobbit", authors=["J. R. R. Tolkien"], categories=["Fantasy"])
+    save(title="The Silmarillion", authors=["J. R. R. Tolkien"], categories=["Fantasy"])
+
+    assert suggest_index.suggest(prefix="tolk", limit=5) == [("J. R. R. Tolkien", AUTHOR, 2)]
+
+    hobbit.delete()
+
+    assert suggest_index.suggest(prefix="tolk", limit=5) == [("J. R. R. Tolkien", AUTHOR, 1)]
+    assert suggest_index.suggest(prefix="fant", limit=5) == [("Fantasy", CATEGORY, 1)]
+    assert suggest_index.suggest(prefix="hob", limit=5) == []
+
+
+def test_deleted_books_stay_uncounted_once_rebuilt(suggest_index):
+    hobbit = save(title="The Hobbit", authors=["J. R. R. Tolkien"], categories=["Fantasy"])
+    save(title="The Silmarillion", authors=["J. R. R. Tolkien"], categories=[])
+    hobbit.delete()
+
+    # Built after the delete, from the link tables
+    assert suggest_index.suggest(prefix="t", limit=5) == [
+        ("J. R. R. Tolkien", AUTHOR, 1),
+        ("The Silmarillion", TITLE, 1),
+    ]
+    assert suggest_index.suggest(prefix="fant", limit=5) == []